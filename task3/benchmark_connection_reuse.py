@@ -0,0 +1,97 @@
+"""
+Benchmark: per-request model clients vs pooled, memoized models from config.
+
+Sends the same chat requests to a local OpenAI-compatible stand-in server,
+once with a fresh ChatOpenAI (and HTTP client) per request, as the task
+scripts used to do, and once through config.chat_model, which reuses one
+model instance and one keep-alive connection pool. Against a remote HTTPS
+endpoint every new connection also pays a TLS handshake, so the gap there
+is larger than on loopback.
+
+Run from the workshop root:
+    PYTHONPATH=. python task3/benchmark_connection_reuse.py
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+from langchain_openai import ChatOpenAI
+from workshop_bench import StandInOpenAIServer
+from workshop_config import config
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "200"))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "20"))
+MODEL = "openai/gpt-4.1-mini"
+
+
+def fresh_model(base_url):
+    return ChatOpenAI(
+        model=MODEL,
+        temperature=0,
+        api_key="bench",
+        base_url=base_url,
+        http_client=httpx.Client(),
+        http_async_client=httpx.AsyncClient()
+    )
+
+
+def pooled_model():
+    return config.chat_model(MODEL, temperature=0)
+
+
+def run_sync(make_model):
+    latencies = []
+    for i in range(REQUESTS):
+        start = time.perf_counter()
+        make_model().invoke(f"Question {i}")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_async(make_model):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def request(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await make_model().ainvoke(f"Question {i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(request(i) for i in range(REQUESTS)))
+    return latencies
+
+
+def report(label, server, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(latencies) * 1000:6.2f} ms  p95 {p95 * 1000:6.2f} ms  "
+          f"{REQUESTS / elapsed:7.1f} req/s  connections opened: {server.connections}")
+
+
+with StandInOpenAIServer() as server:
+    config.api_base = server.base_url
+    config.api_key = "bench"
+
+    print("=== Connection Reuse Benchmark ===")
+    print(f"Requests: {REQUESTS}, async concurrency: {CONCURRENCY}")
+    print(f"Pool limits: {config.http_max_connections} connections, {config.http_max_keepalive} keep-alive\n")
+
+    for label, make_model in (("fresh client (sync)", lambda: fresh_model(server.base_url)),
+                              ("pooled model (sync)", pooled_model)):
+        server.reset_counters()
+        start = time.perf_counter()
+        latencies = run_sync(make_model)
+        report(label, server, latencies, time.perf_counter() - start)
+
+    for label, make_model in (("fresh client (async)", lambda: fresh_model(server.base_url)),
+                              ("pooled model (async)", pooled_model)):
+        server.reset_counters()
+        start = time.perf_counter()
+        latencies = asyncio.run(run_async(make_model))
+        report(label, server, latencies, time.perf_counter() - start)
+
+    print(f"\nDistinct pooled model instances: {len({id(pooled_model()) for _ in range(10)})}")
@@ -1,8 +1,7 @@
-import os
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
+from workshop_config import config
 
-model = ChatOpenAI(model="openai/gpt-4.1-mini", temperature=0, base_url=os.environ.get("OPENAI_API_BASE"))
+model = config.chat_model("openai/gpt-4.1-mini", temperature=0)
 
 messages = [
     SystemMessage(content="You are a helpful Python tutor"),
@@ -1,19 +1,10 @@
-import os
-from langchain_openai import ChatOpenAI
+from workshop_config import config
 
 # Temperature demonstration
 print("=== Temperature Effects ===")
-creative_model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0.9,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+creative_model = config.chat_model("openai/gpt-4.1-mini", temperature=0.9)
 
-precise_model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+precise_model = config.chat_model("openai/gpt-4.1-mini", temperature=0)
 
 prompt = "Write a short poem about coding"
 print("Creative (temp=0.9):", creative_model.invoke(prompt).content)
@@ -21,23 +12,13 @@ print("Precise (temp=0):", precise_model.invoke(prompt).content)
 
 # Max tokens demonstration
 print("\n=== Max Tokens Control ===")
-limited_model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    max_tokens=50,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+limited_model = config.chat_model("openai/gpt-4.1-mini", temperature=0, max_tokens=50)
 
 print("Limited tokens:", limited_model.invoke("Explain machine learning").content)
 
 # Streaming demonstration
 print("\n=== Streaming Response ===")
-streaming_model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    streaming=True,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+streaming_model = config.chat_model("openai/gpt-4.1-mini", temperature=0, streaming=True)
 
 print("Streaming response:")
 for chunk in streaming_model.stream("What are the benefits of Python?"):
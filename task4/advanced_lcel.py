@@ -1,16 +1,11 @@
-import os
 import asyncio
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableLambda
+from workshop_config import config
 
 # Setup model
-model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+model = config.chat_model("openai/gpt-4.1-mini", temperature=0)
 
 # Basic chain
 prompt = PromptTemplate(
@@ -60,17 +55,9 @@ except RuntimeError:
 
 # Fallback chains
 print("\n=== Fallback Chains ===")
-primary_model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+primary_model = config.chat_model("openai/gpt-4.1-mini", temperature=0)
 
-backup_model = ChatOpenAI(
-    model="deepseek/deepseek-chat",
-    temperature=0,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+backup_model = config.chat_model("deepseek/deepseek-chat", temperature=0)
 
 # Create fallback chain
 fallback_chain = (prompt | primary_model | StrOutputParser()).with_fallbacks(
@@ -1,15 +1,10 @@
-import os
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableLambda
+from workshop_config import config
 
 # Setup model
-model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+model = config.chat_model("openai/gpt-4.1-mini", temperature=0)
 
 # Transform functions
 def uppercase_transform(text):
@@ -1,45 +1,9 @@
-import os
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import HumanMessage, AIMessage
+from workshop_config import config
+from workshop_memory import ConversationSummaryMemory, VectorMemory, WindowMemory
 
 # Setup model
-model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0.7,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
-
-# Custom ConversationSummaryMemory implementation using modern LangChain
-class ConversationSummaryMemory:
-    """Modern implementation maintaining the original interface"""
-    def __init__(self, llm, return_messages=True):
-        self.llm = llm
-        self.return_messages = return_messages
-        self.chat_memory = ChatMessageHistory()
-        self.summary_prompt = ChatPromptTemplate.from_template(
-            "Progressively summarize the lines of conversation provided, "
-            "adding onto the previous summary returning a new summary.\n\n"
-            "Current summary:\n{summary}\n\n"
-            "New lines of conversation:\n{new_lines}\n\n"
-            "New summary:"
-        )
-
-    def predict_new_summary(self, messages, existing_summary):
-        """Generate a summary of the conversation"""
-        conversation_text = "\n".join([
-            f"{'Human' if isinstance(msg, HumanMessage) else 'AI'}: {msg.content}"
-            for msg in messages
-        ])
-        chain = self.summary_prompt | self.llm | StrOutputParser()
-        summary = chain.invoke({
-            "summary": existing_summary,
-            "new_lines": conversation_text
-        })
-        return summary
+model = config.chat_model("openai/gpt-4.1-mini", temperature=0.7)
 
 # Summary Memory Implementation
 print("=== Summary Memory ===")
@@ -55,33 +19,15 @@ summary_memory.chat_memory.add_ai_message("That sounds interesting! House price
 summary_memory.chat_memory.add_user_message("I have data on square footage, number of bedrooms, bathrooms, and location")
 summary_memory.chat_memory.add_ai_message("Great features! Location is particularly important. Are you considering using linear regression or more advanced algorithms?")
 
-# Get summary
-summary = summary_memory.predict_new_summary(
-    summary_memory.chat_memory.messages,
-    ""
-)
+# The summary is updated in the background as messages arrive; only new lines are sent to the LLM
+print(f"Messages waiting to be summarized: {summary_memory.pending_messages}")
+summary = summary_memory.flush()
 print("Conversation Summary:", summary)
+print(f"Messages waiting to be summarized: {summary_memory.pending_messages}")
 
 # Window Memory Implementation
 print("\n=== Window Memory (Last K Messages) ===")
 
-class WindowMemory:
-    def __init__(self, k=4):
-        self.k = k
-        self.messages = []
-
-    def add_message(self, message):
-        self.messages.append(message)
-        # Keep only last k messages
-        if len(self.messages) > self.k:
-            self.messages = self.messages[-self.k:]
-
-    def get_messages(self):
-        return self.messages
-
-    def clear(self):
-        self.messages = []
-
 # Demo window memory
 window_memory = WindowMemory(k=4)
 
@@ -130,6 +76,14 @@ class CustomMemoryStore:
             }
         return self.sessions[session_id]["memory"]
 
+    def get_vector_session(self, session_id, k=3, window=4):
+        if session_id not in self.sessions:
+            self.sessions[session_id] = {
+                "type": "vector",
+                "memory": VectorMemory(config.get_embeddings(), k=k, window=window)
+            }
+        return self.sessions[session_id]["memory"]
+
 # Demo different memory types
 custom_store = CustomMemoryStore()
 
@@ -141,5 +95,17 @@ print("Summary memory created for long conversations")
 window_mem = custom_store.get_window_session("short_session", k=4)
 print("Window memory created for short conversations")
 
+# Vector memory for long conversations without summarization calls:
+# the recent window plus the most relevant earlier turns
+vector_mem = custom_store.get_vector_session("research_session", k=2, window=2)
+for human_msg, ai_msg in conversations:
+    vector_mem.add_message(HumanMessage(content=human_msg))
+    vector_mem.add_message(AIMessage(content=ai_msg))
+
+query = "Which library did you recommend for deep learning?"
+print(f"Vector memory recall for: {query}")
+for msg in vector_mem.get_messages(query):
+    print(f"  {msg.type}: {msg.content}")
+
 with open('/root/advanced-memory.txt', 'w') as f:
     f.write("ADVANCED_MEMORY_COMPLETE")
\ No newline at end of file
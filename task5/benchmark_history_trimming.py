@@ -0,0 +1,70 @@
+"""
+Benchmark: prompt tokens and latency vs conversation length, full vs trimmed history.
+
+Runs the Task 5 memory prompt against a local stand-in model whose
+response time grows with prompt size, once injecting the whole history
+and once through HistoryTrimmer with the configured token budget.
+
+Run from the workshop root:
+    PYTHONPATH=. python task5/benchmark_history_trimming.py
+"""
+
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from workshop_bench import StandInChatModel
+from workshop_config import config
+from workshop_memory import HistoryTrimmer, count_message_tokens
+
+TURNS = [10, 50, 200, 1000]
+
+model = StandInChatModel(first_token_latency=0.05, token_latency=0, prompt_token_latency=0.00002)
+prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant who remembers our conversation."),
+    MessagesPlaceholder(variable_name="history"),
+    ("human", "{input}")
+])
+trimmer = HistoryTrimmer(config.model_context_tokens, config.max_tokens)
+
+prompt_tokens = []
+
+def record(prompt_value):
+    prompt_tokens.append(sum(count_message_tokens(message) for message in prompt_value.to_messages()))
+    return prompt_value
+
+full_chain = prompt | RunnableLambda(record) | model | StrOutputParser()
+trimmed_chain = RunnablePassthrough.assign(history=trimmer) | prompt | RunnableLambda(record) | model | StrOutputParser()
+
+
+def conversation(turns):
+    history = []
+    for i in range(turns):
+        history.append(HumanMessage(content=f"Turn {i}: can you explain how LangChain memory keeps track of "
+                                            f"earlier messages in a long conversation like this one?"))
+        history.append(AIMessage(content=f"Answer {i}: the history object stores every message, and the prompt "
+                                         f"template injects them through a MessagesPlaceholder on each call."))
+    return history
+
+
+print("=== History Trimming Benchmark ===")
+print(f"Context: {config.model_context_tokens} tokens, reply reserve (MAX_TOKENS): {config.max_tokens}, "
+      f"history budget: {trimmer.budget()} tokens\n")
+print(f"{'turns':>6}  {'full tokens':>11}  {'full latency':>12}  {'trimmed tokens':>14}  {'trimmed latency':>15}")
+
+for turns in TURNS:
+    inputs = {"input": "What did we talk about first?", "history": conversation(turns)}
+    results = []
+    for chain in (full_chain, trimmed_chain):
+        prompt_tokens.clear()
+        start = time.perf_counter()
+        chain.invoke(inputs)
+        results.append((prompt_tokens[-1], time.perf_counter() - start))
+    (full_tokens, full_latency), (trimmed_tokens, trimmed_latency) = results
+    overflow = "*" if full_tokens + config.max_tokens > config.model_context_tokens else " "
+    print(f"{turns:>6}  {full_tokens:>10}{overflow}  {full_latency * 1000:>9.0f} ms  "
+          f"{trimmed_tokens:>14}  {trimmed_latency * 1000:>12.0f} ms")
+
+print("\n* exceeds the model context window; a real API would reject the request")
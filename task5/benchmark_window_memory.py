@@ -0,0 +1,100 @@
+"""
+Benchmark: memory per session and append throughput of WindowMemory.
+
+Compares the original list-slicing WindowMemory with the WindowMemory from
+workshop_memory across many live sessions: a message-only window, which
+keeps the message objects in a bounded deque, and a token-capped window,
+which keeps compact records with interned role tags and token counts.
+
+Run from the workshop root:
+    PYTHONPATH=. python task5/benchmark_window_memory.py
+"""
+
+import gc
+import os
+import time
+import tracemalloc
+
+from langchain_core.messages import AIMessage, HumanMessage
+from workshop_memory import WindowMemory
+
+SESSIONS = int(os.environ.get("BENCH_SESSIONS", "10000"))
+TURNS = int(os.environ.get("BENCH_TURNS", "10"))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "3"))
+K = 6
+
+
+class ListWindowMemory:
+    """The previous implementation: re-slices a list of message objects on every append"""
+    def __init__(self, k=4):
+        self.k = k
+        self.messages = []
+
+    def add_message(self, message):
+        self.messages.append(message)
+        if len(self.messages) > self.k:
+            self.messages = self.messages[-self.k:]
+
+    def get_messages(self):
+        return self.messages
+
+
+def conversation(session):
+    for turn in range(TURNS):
+        yield HumanMessage(content=f"Session {session} question {turn} about LangChain memory")
+        yield AIMessage(content=f"Session {session} answer {turn}: memory keeps recent messages")
+
+
+def build(factory, messages=None):
+    """Build every session, creating its messages unless pre-built ``messages`` are given."""
+    sessions = []
+    for session in range(SESSIONS):
+        memory = factory()
+        for message in conversation(session) if messages is None else messages[session]:
+            memory.add_message(message)
+        sessions.append(memory)
+    return sessions
+
+
+def best_time(run):
+    elapsed = float("inf")
+    for _ in range(ROUNDS):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+
+def measure(factory):
+    # Memory: bytes still allocated once every session is built (messages not kept by the window are freed)
+    gc.collect()
+    tracemalloc.start()
+    sessions = build(factory)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+
+    # Throughput: the best of ROUNDS separate, untraced runs, with and without creating the messages
+    elapsed = best_time(lambda: build(factory))
+    append_only = best_time(lambda: build(factory, prebuilt))
+    return build(factory, prebuilt), retained, elapsed, append_only
+
+
+print("=== Window Memory Benchmark ===")
+print(f"Sessions: {SESSIONS}, messages per session: {TURNS * 2}, window: {K} messages")
+print("Messages are created per append, as a chat handler would; "
+      "the last column appends pre-built messages only\n")
+
+appends = SESSIONS * TURNS * 2
+prebuilt = [list(conversation(session)) for session in range(SESSIONS)]
+expected = [message.content for message in conversation(SESSIONS - 1)][-K:]
+for label, factory in (("list + message objects", lambda: ListWindowMemory(k=K)),
+                       ("deque + message objects", lambda: WindowMemory(k=K)),
+                       ("records, 200 tokens", lambda: WindowMemory(k=K, max_tokens=200))):
+    sessions, retained, elapsed, append_only = measure(factory)
+    print(f"{label:<24} {retained / SESSIONS:8.0f} bytes/session  {appends / elapsed / 1e3:7.0f} k appends/s  "
+          f"{appends / append_only / 1e3:7.0f} k appends/s (append only)")
+    if label != "records, 200 tokens":
+        assert [message.content for message in sessions[-1].get_messages()] == expected
+    del sessions
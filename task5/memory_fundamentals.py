@@ -1,9 +1,9 @@
 import os
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnablePassthrough
 from workshop_config import config
 
 # Setup model using workshop configuration
@@ -21,16 +21,15 @@ prompt = ChatPromptTemplate.from_messages([
     ("human", "{input}")
 ])
 
-# Create chain
-chain = prompt | model | StrOutputParser()
+# Create chain; history is trimmed to the model's context budget before it reaches the prompt
+trim_history = config.history_trimmer(summarizer=model)
+chain = RunnablePassthrough.assign(history=trim_history) | prompt | model | StrOutputParser()
 
-# Create message history store
-store = {}
+# Message history store: bounded, with idle sessions spilled to disk
+store = config.session_store
 
-def get_session_history(session_id: str) -> ChatMessageHistory:
-    if session_id not in store:
-        store[session_id] = ChatMessageHistory()
-    return store[session_id]
+def get_session_history(session_id: str):
+    return store.get_session_history(session_id)
 
 # Create memory-enabled chain
 memory_chain = RunnableWithMessageHistory(
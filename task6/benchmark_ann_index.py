@@ -0,0 +1,82 @@
+"""
+Benchmark: recall@k and QPS of IVF-Flat, IVF-PQ and HNSW against exact search.
+
+Builds each index type with build_index over clustered synthetic vectors
+and sweeps nprobe / efSearch. Recall@k is the overlap with the flat
+index's top k; QPS is single-query, single-thread throughput, as one
+retrieval call sees it.
+
+Run from the workshop root (1M vectors takes several minutes to build):
+    PYTHONPATH=. BENCH_SIZES=10000,100000,1000000 python task6/benchmark_ann_index.py
+"""
+
+import os
+import time
+
+import faiss
+import numpy as np
+from workshop_vectorstore import build_index, choose_index_type, search_params
+
+SIZES = [int(n) for n in os.environ.get("BENCH_SIZES", "10000,100000,1000000").split(",")]
+DIM = int(os.environ.get("BENCH_DIM", "128"))
+QUERIES = int(os.environ.get("BENCH_QUERIES", "500"))
+K = 10
+
+SWEEPS = {
+    "ivf": [{"nprobe": 4}, {"nprobe": 16}, {"nprobe": 64}],
+    "ivfpq": [{"nprobe": 16}, {"nprobe": 64}],
+    "hnsw": [{"ef_search": 16}, {"ef_search": 64}, {"ef_search": 256}],
+}
+
+
+def clustered(n, rng, centers):
+    """Unit vectors scattered around shared cluster centres, like document embeddings."""
+    x = centers[rng.integers(len(centers), size=n)] + 0.35 * rng.standard_normal((n, DIM), dtype=np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def run(index, queries, params=None):
+    """Return (top-k ids, queries per second) searching one query at a time."""
+    ids = np.empty((len(queries), K), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        if params is None:
+            ids[i] = index.search(queries[i:i + 1], K)[1][0]
+        else:
+            ids[i] = index.search(queries[i:i + 1], K, params=params)[1][0]
+    return ids, len(queries) / (time.perf_counter() - start)
+
+
+def recall(ids, truth):
+    return np.mean([len(set(a) & set(b)) / K for a, b in zip(ids, truth)])
+
+
+faiss.omp_set_num_threads(1)
+print("=== ANN Index Benchmark ===")
+print(f"Dimension {DIM}, {QUERIES} queries, recall@{K} vs flat, single-thread QPS\n")
+print(f"{'vectors':>9}  {'index':<6} {'setting':<14} {'build s':>8}  {f'recall@{K}':>9}  {'QPS':>8}")
+
+for n in SIZES:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(16, n // 1000), DIM), dtype=np.float32)
+    data = clustered(n, rng, centers)
+    queries = clustered(QUERIES, rng, centers)
+
+    start = time.perf_counter()
+    flat = build_index(data, faiss.METRIC_INNER_PRODUCT, "flat")
+    build_seconds = time.perf_counter() - start
+    truth, qps = run(flat, queries)
+    print(f"{n:>9}  {'flat':<6} {'exact':<14} {build_seconds:>8.1f}  {1.0:>9.3f}  {qps:>8.0f}")
+    del flat
+
+    for index_type, settings in SWEEPS.items():
+        start = time.perf_counter()
+        index = build_index(data, faiss.METRIC_INNER_PRODUCT, index_type)
+        build_seconds = time.perf_counter() - start
+        for setting in settings:
+            ids, qps = run(index, queries, search_params(index, **setting))
+            label = ", ".join(f"{key}={value}" for key, value in setting.items())
+            print(f"{n:>9}  {index_type:<6} {label:<14} {build_seconds:>8.1f}  {recall(ids, truth):>9.3f}  {qps:>8.0f}")
+        del index
+    print(f"{'':>9}  auto chooses: {choose_index_type(n)}\n")
@@ -0,0 +1,88 @@
+"""
+Benchmark: batched multi-query retrieval against one query at a time.
+
+Runs similarity and MMR search for a set of queries, first in a loop that
+embeds and searches each query on its own (as the task6 demos did), then
+through WorkshopFAISS's batch API, which embeds all queries in one model
+call, issues one FAISS search and runs MMR for every query as NumPy array
+operations. Query embeddings take a simulated per-call model latency plus
+a per-text cost (StandInEmbeddings), which batching pays once. Batch MMR
+results are checked against LangChain's per-query MMR.
+
+Run from the workshop root:
+    PYTHONPATH=. BENCH_SIZE=100000 python task6/benchmark_batch_retrieval.py
+"""
+
+import os
+import time
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from workshop_bench import StandInEmbeddings
+from workshop_vectorstore import WorkshopFAISS
+
+SIZE = int(os.environ.get("BENCH_SIZE", "100000"))
+DIM = int(os.environ.get("BENCH_DIM", "384"))
+BATCH_SIZES = [int(n) for n in os.environ.get("BENCH_BATCH_SIZES", "8,32,128").split(",")]
+K = 4
+FETCH_K = 20
+
+
+def clustered(n, rng, centers):
+    """Unit vectors scattered around shared cluster centres, like document embeddings."""
+    x = centers[rng.integers(len(centers), size=n)] + 0.35 * rng.standard_normal((n, DIM), dtype=np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+faiss.omp_set_num_threads(1)
+rng = np.random.default_rng(0)
+centers = rng.standard_normal((max(16, SIZE // 1000), DIM), dtype=np.float32)
+index = faiss.IndexFlatL2(DIM)
+index.add(clustered(SIZE, rng, centers))
+ids = [str(i) for i in range(SIZE)]
+docstore = InMemoryDocstore({id_: Document(page_content=f"chunk {id_}", id=id_) for id_ in ids})
+# A fixed cost per forward pass plus a small cost per text, like a local sentence-transformer
+embeddings = StandInEmbeddings(size=DIM, call_latency=0.005, text_latency=0.0002)
+store = WorkshopFAISS(embeddings, index, docstore, dict(enumerate(ids)))
+queries = [f"question {i}" for i in range(max(BATCH_SIZES))]
+
+# Batch MMR must select exactly what LangChain's FAISS selects query by query
+for query, docs in zip(queries, store.max_marginal_relevance_search_batch(queries, k=K, fetch_k=FETCH_K)):
+    expected = FAISS.max_marginal_relevance_search_with_score_by_vector(
+        store, embeddings.embed_query(query), k=K, fetch_k=FETCH_K)
+    assert [doc.id for doc in docs] == [doc.id for doc, _ in expected], f"MMR results differ for {query!r}"
+    assert [doc.id for doc in docs] == [doc.id for doc in store.max_marginal_relevance_search(
+        query, k=K, fetch_k=FETCH_K)], f"batch and single MMR differ for {query!r}"
+for query, docs in zip(queries, store.similarity_search_batch(queries, k=K)):
+    assert docs == store.similarity_search(query, k=K), f"similarity results differ for {query!r}"
+
+SEARCHES = {
+    "similarity": (lambda query: store.similarity_search(query, k=K),
+                   lambda batch: store.similarity_search_batch(batch, k=K)),
+    "mmr": (lambda query: store.max_marginal_relevance_search(query, k=K, fetch_k=FETCH_K),
+            lambda batch: store.max_marginal_relevance_search_batch(batch, k=K, fetch_k=FETCH_K)),
+}
+
+
+def timed(run):
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+print("=== Batch Retrieval Benchmark ===")
+print(f"{SIZE} vectors, dimension {DIM}, k={K}, fetch_k={FETCH_K}, "
+      f"{embeddings.call_latency * 1000:.0f} ms + {embeddings.text_latency * 1000:.1f} ms/text simulated embedding\n")
+print(f"{'search':<11} {'queries':>7}  {'loop ms/query':>13}  {'batch ms/query':>14}  "
+      f"{'loop QPS':>8}  {'batch QPS':>9}  {'speedup':>7}")
+for name, (single, batched) in SEARCHES.items():
+    for size in BATCH_SIZES:
+        batch = queries[:size]
+        loop_seconds = timed(lambda: [single(query) for query in batch])
+        batch_seconds = timed(lambda: batched(batch))
+        print(f"{name:<11} {size:>7}  {loop_seconds * 1000 / size:>13.2f}  {batch_seconds * 1000 / size:>14.2f}  "
+              f"{size / loop_seconds:>8.0f}  {size / batch_seconds:>9.0f}  {loop_seconds / batch_seconds:>6.1f}x")
@@ -0,0 +1,110 @@
+"""
+Benchmark: prompt tokens and LLM latency of packed vs concatenated RAG context.
+
+Splits data/sample_documents.txt with the workshop's text splitter
+(chunk_size=200, chunk_overlap=50), retrieves the top chunks for the Task 6
+and Task 7 test questions with BM25, and builds the prompt context either by
+joining every chunk (format_docs) or with ContextPacker at several token
+budgets. A second knowledge base also holds the same file split with the
+markdown splitter, as when one document is ingested from two places. Latency is the RAG chain's time per question against a stand-in
+model that takes a simulated time per prompt token. Without a real model,
+answer quality is approximated by coverage: the share of the retrieved
+chunks' word trigrams that reach the prompt.
+
+Run from the workshop root:
+    PYTHONPATH=. python task6/benchmark_context_packing.py
+"""
+
+import os
+import time
+
+from langchain_core.documents import Document
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+from workshop_bench import StandInChatModel
+from workshop_hybrid import BM25Index
+from workshop_ingest import load_and_split
+from workshop_memory import count_tokens
+from workshop_rag import ContextPacker, _shingles, build_rag_chain, format_docs
+
+K = int(os.environ.get("BENCH_K", "6"))
+BUDGETS = [int(n) for n in os.environ.get("BENCH_BUDGETS", "1500,300,150").split(",")]
+
+QUESTIONS = [
+    # task6/retrieval_chain.py
+    "What is LCEL and how does it work?",
+    "Explain Retrieval-Augmented Generation",
+    "What are the benefits of using vector stores?",
+    "How do memory systems work in LangChain?",
+    "What types of document loaders are available?",
+    "How can I create reusable prompts?",
+    "What is the difference between a chain and an agent?",
+    "How do I split large documents for processing?",
+    # task7/app.py sample prompts
+    "How do I create prompt templates?",
+    "What are the different types of memory in LangChain?",
+    "How do vector stores work?",
+    "What's the difference between chains and agents?",
+    "How can I load documents from different sources?",
+    "Tell me about LangChain's main components",
+]
+
+text_chunks = load_and_split("data/sample_documents.txt", "text")
+# The same document again under another source, split at different boundaries
+second_copy = [
+    Document(page_content=doc.page_content, metadata={**doc.metadata, "source": "sample_documents.md"})
+    for doc in load_and_split("data/sample_documents.txt", "markdown")
+]
+CORPORA = {"sample_documents.txt": text_chunks, "+ markdown-split copy": text_chunks + second_copy}
+
+
+class KeywordRetriever:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.index = BM25Index.from_texts(doc.page_content for doc in chunks)
+
+    def __call__(self, question):
+        _, positions = self.index.search(question, K)
+        return [self.chunks[i] for i in positions]
+
+
+prompt = PromptTemplate.from_template("Use the following context to answer the question.\n\n"
+                                      "Context:\n{context}\n\nQuestion: {question}\n\nAnswer:")
+# About 2000 prompt tokens per second of prefill, plus a fixed time to first token
+model = StandInChatModel(first_token_latency=0.05, token_latency=0, prompt_token_latency=0.0005)
+
+
+def coverage(docs, context):
+    retrieved = set().union(*(_shingles(doc.page_content) for doc in docs))
+    return len(retrieved & _shingles(context)) / len(retrieved) if retrieved else 1.0
+
+
+def run(retrieve, build_context):
+    chain = build_rag_chain(RunnableLambda(retrieve), prompt, model, context_packer=build_context)
+    tokens, covered = [], []
+    for question in QUESTIONS:
+        docs = retrieve(question)
+        context = build_context(docs)
+        tokens.append(count_tokens(prompt.format(context=context, question=question)))
+        covered.append(coverage(docs, context))
+    start = time.perf_counter()
+    for question in QUESTIONS:
+        chain.invoke(question)
+    ms = (time.perf_counter() - start) * 1000 / len(QUESTIONS)
+    return sum(tokens) / len(tokens), ms, sum(covered) / len(covered)
+
+
+print("=== Context Packing Benchmark ===")
+print(f"{len(QUESTIONS)} questions, top {K} chunks by BM25, "
+      f"{model.prompt_token_latency * 1000:.1f} ms simulated prefill per prompt token\n")
+print(f"{'knowledge base':<24} {'context':<20} {'prompt tokens':>13}  {'vs joined':>9}  "
+      f"{'LLM ms/question':>15}  {'coverage':>8}")
+for name, chunks in CORPORA.items():
+    retrieve = KeywordRetriever(chunks)
+    baseline = None
+    for label, build_context in [("format_docs", format_docs)] + [
+            (f"ContextPacker {budget}", ContextPacker(max_tokens=budget)) for budget in BUDGETS]:
+        tokens, ms, covered = run(retrieve, build_context)
+        baseline = baseline or tokens
+        print(f"{name:<24} {label:<20} {tokens:>13.0f}  {tokens / baseline - 1:>+9.0%}  {ms:>15.1f}  {covered:>8.3f}")
+    print()
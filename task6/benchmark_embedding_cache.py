@@ -0,0 +1,70 @@
+"""
+Benchmark: cold vs warm FAISS index build with the persistent embedding cache.
+
+Run from the workshop root:
+    PYTHONPATH=. python task6/benchmark_embedding_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from workshop_config import config
+from workshop_embeddings import CachedEmbeddings
+
+NUM_DOCS = int(os.environ.get("BENCH_DOCS", "2000"))
+DATA_PATH = "data/sample_documents.txt"
+
+# Build a corpus from the sample documents, varied so every chunk is unique
+splitter = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=50)
+with open(DATA_PATH, encoding="utf-8") as f:
+    base_chunks = splitter.split_text(f.read())
+
+documents = [
+    Document(
+        page_content=f"[{i // len(base_chunks)}] {base_chunks[i % len(base_chunks)]}",
+        metadata={"source": "sample_documents", "chunk": i}
+    )
+    for i in range(NUM_DOCS)
+]
+
+print("=== Embedding Cache Benchmark ===")
+print(f"Documents: {len(documents)}")
+
+# Load the model once so only embedding time is measured
+model = HuggingFaceEmbeddings(model_name=config.embedding_model)
+model.embed_query("warm up")
+
+with tempfile.TemporaryDirectory() as tmp:
+    cache_path = os.path.join(tmp, "embeddings.sqlite")
+
+    cold_cache = CachedEmbeddings(model, config.embedding_model, cache_path)
+    start = time.perf_counter()
+    FAISS.from_documents(documents, cold_cache)
+    cold_time = time.perf_counter() - start
+    print(f"\nCold build: {cold_time:.2f}s  {cold_cache.stats()}")
+
+    # A fresh wrapper on the same file simulates a process restart
+    warm_cache = CachedEmbeddings(model, config.embedding_model, cache_path)
+    start = time.perf_counter()
+    FAISS.from_documents(documents, warm_cache)
+    warm_time = time.perf_counter() - start
+    print(f"Warm build: {warm_time:.2f}s  {warm_cache.stats()}")
+
+    # Re-ingest with 1% of the documents changed
+    changed = [
+        Document(page_content=doc.page_content + " (updated)", metadata=doc.metadata)
+        if i % 100 == 0 else doc
+        for i, doc in enumerate(documents)
+    ]
+    partial_cache = CachedEmbeddings(model, config.embedding_model, cache_path)
+    start = time.perf_counter()
+    FAISS.from_documents(changed, partial_cache)
+    partial_time = time.perf_counter() - start
+    print(f"1% changed: {partial_time:.2f}s  {partial_cache.stats()}")
+
+print(f"\nWarm speedup: {cold_time / warm_time:.1f}x")
@@ -0,0 +1,116 @@
+"""
+Benchmark: latency and completeness of metadata-filtered similarity search.
+
+Compares LangChain's FAISS post-filter (top fetch_k=20, then filter) with
+WorkshopFAISS, which resolves the filter through its inverted metadata
+index, for filters matching 0.1%, 1%, 10% and 50% of the documents. Every
+planner strategy is run forced as well as "auto". Completeness is the
+fraction of the k requested results returned; recall@k is the overlap
+with the exact top k among matching documents.
+
+Run from the workshop root:
+    PYTHONPATH=. BENCH_SIZE=200000 python task6/benchmark_filtered_search.py
+"""
+
+import os
+import time
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from workshop_bench import StandInEmbeddings
+from workshop_vectorstore import WorkshopFAISS
+
+SIZE = int(os.environ.get("BENCH_SIZE", "200000"))
+DIM = int(os.environ.get("BENCH_DIM", "384"))
+QUERIES = int(os.environ.get("BENCH_QUERIES", "200"))
+INDEX_TYPES = os.environ.get("BENCH_INDEX_TYPES", "flat,hnsw,ivf").split(",")
+K = 10
+
+# "bucket" is uniform over 0..999, so these match 0.1%, 1%, 10% and 50% of documents
+FILTERS = {
+    "0.1%": {"bucket": 7},
+    "1%": {"bucket": {"$lt": 10}},
+    "10%": {"bucket": {"$lt": 100}},
+    "50%": {"bucket": {"$lt": 500}},
+}
+STRATEGIES = ("auto", "scan", "prefilter", "postfilter")
+
+
+def clustered(n, rng, centers):
+    """Unit vectors scattered around shared cluster centres, like document embeddings."""
+    x = centers[rng.integers(len(centers), size=n)] + 0.35 * rng.standard_normal((n, DIM), dtype=np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def make_store(data, buckets):
+    index = faiss.IndexFlatL2(DIM)
+    index.add(data)
+    ids = [str(i) for i in range(len(data))]
+    docstore = InMemoryDocstore({
+        id_: Document(page_content=f"chunk {id_}", metadata={"bucket": int(bucket)}, id=id_)
+        for id_, bucket in zip(ids, buckets)
+    })
+    return WorkshopFAISS(StandInEmbeddings(size=DIM), index, docstore, dict(enumerate(ids)))
+
+
+def post_filter(embedding, k, filter, fetch_k=20):
+    """LangChain's FAISS filtering: search fetch_k candidates, keep the matching ones."""
+    scores, indices = store._search(np.array([embedding], dtype=np.float32), fetch_k)
+    filter_func = store._create_filter_func(filter)
+    docs = [(store._document(i), score) for i, score in zip(indices[0], scores[0]) if i != -1]
+    return [(doc, score) for doc, score in docs if filter_func(doc.metadata)][:k]
+
+
+def run(search, queries, filter):
+    """Return (ms per query, results per query) for one-at-a-time searches."""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([int(doc.id) for doc, _ in search(query.tolist(), k=K, filter=filter)])
+    return (time.perf_counter() - start) * 1000 / len(queries), results
+
+
+def score(results, truth):
+    complete = np.mean([len(r) / len(t) for r, t in zip(results, truth)])
+    recall = np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)])
+    return complete, recall
+
+
+faiss.omp_set_num_threads(1)
+rng = np.random.default_rng(0)
+centers = rng.standard_normal((max(16, SIZE // 1000), DIM), dtype=np.float32)
+data = clustered(SIZE, rng, centers)
+queries = clustered(QUERIES, rng, centers)
+buckets = rng.integers(1000, size=SIZE)
+store = make_store(data, buckets)
+
+# Exact filtered top k, brute force over the matching vectors
+truth = {}
+for label, filter in FILTERS.items():
+    matched = store.metadata_index().resolve(filter)
+    distances = (data[matched] ** 2).sum(axis=1) - 2 * queries @ data[matched].T
+    truth[label] = [list(matched[np.argsort(row, kind="stable")[:K]]) for row in distances]
+
+print("=== Filtered Search Benchmark ===")
+print(f"{SIZE} vectors, dimension {DIM}, {QUERIES} queries, k={K}\n")
+print(f"{'index':<6} {'match':<5} {'strategy':<22} {'ms/query':>9}  {'complete':>8}  {f'recall@{K}':>9}")
+
+for index_type in INDEX_TYPES:
+    store.reindex(index_type)
+    # Built once per store version; not part of the query latency
+    store.metadata_index()
+    for label, filter in FILTERS.items():
+        ms, results = run(post_filter, queries, filter)
+        complete, recall = score(results, truth[label])
+        print(f"{index_type:<6} {label:<5} {'post-filter fetch_k=20':<22} {ms:>9.2f}  {complete:>8.3f}  {recall:>9.3f}")
+        for strategy in STRATEGIES:
+            store.filter_strategy = strategy
+            ms, results = run(store.similarity_search_with_score_by_vector, queries, filter)
+            complete, recall = score(results, truth[label])
+            name = f"auto ({store.plan_filter(filter, K)[0]})" if strategy == "auto" else strategy
+            print(f"{index_type:<6} {label:<5} {name:<22} {ms:>9.2f}  {complete:>8.3f}  {recall:>9.3f}")
+        store.filter_strategy = "auto"
+    print()
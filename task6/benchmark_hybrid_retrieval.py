@@ -0,0 +1,103 @@
+"""
+Benchmark: hybrid BM25 + vector retrieval QPS against vector-only retrieval.
+
+Builds a WorkshopFAISS store and its BM25 index over a synthetic corpus
+with a Zipf-distributed vocabulary, then reports single-client queries
+per second for the vector retriever, BM25 alone, and the hybrid
+retriever with its two searches run one after the other and concurrently.
+Query embeddings take a simulated model latency (StandInEmbeddings), which
+the concurrent hybrid search overlaps with the BM25 search. Also reports
+the BM25 build time, size on disk and memory-mapped load time.
+
+Run from the workshop root:
+    PYTHONPATH=. BENCH_SIZE=100000 python task6/benchmark_hybrid_retrieval.py
+"""
+
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from workshop_bench import StandInEmbeddings
+from workshop_hybrid import BM25Index, reciprocal_rank_fusion
+from workshop_vectorstore import _MMAP_FLAG, WorkshopFAISS
+
+SIZE = int(os.environ.get("BENCH_SIZE", "100000"))
+QUERIES = int(os.environ.get("BENCH_QUERIES", "300"))
+WORDS = 60
+K = 4
+
+faiss.omp_set_num_threads(1)
+rng = np.random.default_rng(0)
+vocab = np.array([f"term{i}" for i in range(50_000)])
+
+
+def text(n):
+    # Zipf-distributed term ranks, like natural-language word frequencies
+    return " ".join(vocab[np.minimum(rng.zipf(1.2, size=n), len(vocab)) - 1])
+
+
+texts = [text(WORDS) for _ in range(SIZE)]
+# Queries mix common words with a rarer exact term taken from a random document
+queries = [f"{text(3)} {rng.choice(texts[rng.integers(SIZE)].split())}" for _ in range(QUERIES)]
+
+embeddings = StandInEmbeddings(text_latency=0)
+store = WorkshopFAISS.from_texts(texts, embeddings)
+store.reindex("auto")
+embeddings.text_latency = StandInEmbeddings().text_latency
+
+start = time.perf_counter()
+store.keyword_index()
+build_seconds = time.perf_counter() - start
+
+with tempfile.TemporaryDirectory() as tmp:
+    store.save_local(tmp)
+    keyword_dir = os.path.join(tmp, WorkshopFAISS.KEYWORD_INDEX_DIR)
+    disk_mb = sum(os.path.getsize(os.path.join(keyword_dir, f)) for f in os.listdir(keyword_dir)) / 1024 / 1024
+    start = time.perf_counter()
+    loaded = WorkshopFAISS.load_local(tmp, embeddings, allow_dangerous_deserialization=True,
+                                      io_flags=_MMAP_FLAG, memory_mapped=True)
+    load_seconds = time.perf_counter() - start
+    # Memory-mapped postings must rank exactly like the in-memory ones
+    for query in queries[:50]:
+        expected = store.keyword_index().search(query, 20)
+        actual = loaded.keyword_index().search(query, 20)
+        assert np.array_equal(expected[1], actual[1]), f"mmap BM25 results differ for {query!r}"
+    del loaded
+
+vector_retriever = store.as_retriever(search_kwargs={"k": K})
+hybrid_retriever = store.as_hybrid_retriever(k=K)
+
+
+def sequential_hybrid(query):
+    """The hybrid retriever's work without running the two searches concurrently."""
+    dense = hybrid_retriever._dense(query)
+    keyword = hybrid_retriever._keyword(query)
+    return [store._document(i) for i, _ in reciprocal_rank_fusion([dense, keyword])[:K]]
+
+
+def qps(search):
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return len(queries) / (time.perf_counter() - start)
+
+
+for query in queries[:20]:
+    assert sequential_hybrid(query) == hybrid_retriever.invoke(query)
+
+print("=== Hybrid Retrieval Benchmark ===")
+print(f"{SIZE} documents of {WORDS} words, {store.index_type} index, {QUERIES} queries, k={K}, "
+      f"{embeddings.text_latency * 1000:.1f} ms simulated query embedding\n")
+index = store.keyword_index()
+print(f"BM25 index: {len(index.vocab)} terms, {len(index.postings)} postings, built in {build_seconds:.1f} s, "
+      f"{disk_mb:.1f} MB on disk, memory-mapped load {load_seconds * 1000:.0f} ms (with FAISS)\n")
+print(f"{'retriever':<28} {'QPS':>8}")
+for label, search in (
+    ("vector only", vector_retriever.invoke),
+    ("BM25 only", lambda query: index.search(query, 20)),
+    ("hybrid, sequential", sequential_hybrid),
+    ("hybrid, concurrent", hybrid_retriever.invoke),
+):
+    print(f"{label:<28} {qps(search):>8.0f}")
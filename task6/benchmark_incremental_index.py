@@ -0,0 +1,96 @@
+"""
+Benchmark: re-indexing a changed corpus incrementally vs rebuilding it.
+
+Builds a FAISS index over a synthetic corpus with IndexManager, changes
+1% of the chunks (edits, additions and removals), then times the
+incremental update against a full rebuild and checks both indexes return
+the same search results. A final run removes a quarter of the sources to
+show compaction.
+
+Run from the workshop root:
+    PYTHONPATH=. python task6/benchmark_incremental_index.py
+"""
+
+import os
+import random
+import time
+
+from langchain_core.documents import Document
+from workshop_bench import StandInEmbeddings
+from workshop_vectorstore import IndexManager, WorkshopFAISS
+
+SOURCES = int(os.environ.get("BENCH_SOURCES", "200"))
+CHUNKS_PER_SOURCE = int(os.environ.get("BENCH_CHUNKS", "100"))
+CHANGE = 0.01
+
+embeddings = StandInEmbeddings()
+rng = random.Random(0)
+
+
+def corpus():
+    return {
+        f"doc_{s:04d}.txt": [f"Document {s} chunk {c}: notes on retrieval, embeddings and vector search."
+                             for c in range(CHUNKS_PER_SOURCE)]
+        for s in range(SOURCES)
+    }
+
+
+def documents(sources):
+    return [
+        Document(page_content=text, metadata={"source": source, "chunk": i})
+        for source, texts in sources.items()
+        for i, text in enumerate(texts)
+    ]
+
+
+def change(sources, fraction):
+    """Edit, insert and remove about ``fraction`` of all chunks, a third each."""
+    sources = {source: list(texts) for source, texts in sources.items()}
+    total = sum(len(texts) for texts in sources.values())
+    for n in range(int(total * fraction)):
+        texts = sources[rng.choice(list(sources))]
+        i = rng.randrange(len(texts))
+        if n % 3 == 0:
+            texts[i] = texts[i] + " (revised)"
+        elif n % 3 == 1:
+            texts.insert(i, f"New chunk {n}: an added paragraph about indexing.")
+        else:
+            texts.pop(i)
+    return sources
+
+
+def top_ids(store, queries):
+    return [[doc.page_content for doc in store.similarity_search(query, k=5)] for query in queries]
+
+
+print("=== Incremental Index Benchmark ===")
+print(f"Corpus: {SOURCES} sources x {CHUNKS_PER_SOURCE} chunks, "
+      f"embedding cost {embeddings.text_latency * 1000:.1f} ms/chunk\n")
+
+original = corpus()
+manager = IndexManager(embeddings)
+stats = manager.update(documents(original))
+print(f"Initial build:       {stats['seconds']:6.2f} s  ({stats['added']} chunks embedded)")
+
+changed = change(original, CHANGE)
+changed_docs = documents(changed)
+
+start = time.perf_counter()
+rebuilt = WorkshopFAISS.from_documents(changed_docs, embeddings)
+rebuild_seconds = time.perf_counter() - start
+print(f"Full rebuild:        {rebuild_seconds:6.2f} s  ({len(changed_docs)} chunks embedded)")
+
+stats = manager.sync(changed_docs)
+print(f"Incremental ({CHANGE:.0%}):   {stats['seconds']:6.2f} s  ({stats['added']} embedded, {stats['deleted']} deleted, "
+      f"{stats['metadata_updated']} metadata refreshed) = {stats['seconds'] / rebuild_seconds:.1%} of a rebuild")
+
+queries = [text for texts in list(changed.values())[:20] for text in texts[:1]]
+assert top_ids(manager.store, queries) == top_ids(rebuilt, queries), "search results differ"
+assert manager.store.index.ntotal - manager.store.deleted_count == len(rebuilt.index_to_docstore_id)
+print("✅ Search results match the rebuilt index")
+
+remaining = dict(list(changed.items())[SOURCES // 4:])
+stats = manager.sync(documents(remaining))
+print(f"\nRemoved {SOURCES - len(remaining)} sources: {stats['deleted']} chunks deleted, "
+      f"{stats['compacted']} vectors compacted in {stats['seconds']:.2f} s")
+print(f"Manager: {manager.stats()}")
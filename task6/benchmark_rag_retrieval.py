@@ -0,0 +1,101 @@
+"""
+Benchmark: retriever calls per question, legacy wrapper vs single-pass RAG chain.
+
+Run from the workshop root:
+    PYTHONPATH=. python task6/benchmark_rag_retrieval.py
+"""
+
+import asyncio
+import time
+
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnablePassthrough
+from workshop_bench import CountingRetriever, StandInChatModel
+from workshop_config import config
+from workshop_rag import RetrievalQAWrapper, build_rag_chain, format_docs
+from workshop_vectorstore import WorkshopFAISS
+
+knowledge_docs = [
+    Document(page_content="LCEL (LangChain Expression Language) is a declarative way to compose chains.", metadata={"source": "lcel_guide"}),
+    Document(page_content="Retrieval-Augmented Generation (RAG) combines information retrieval with text generation.", metadata={"source": "rag_explained"}),
+    Document(page_content="Vector stores are databases optimized for storing and searching high-dimensional vectors.", metadata={"source": "vector_stores"}),
+    Document(page_content="Memory systems in LangChain include conversation buffer memory and summary memory.", metadata={"source": "memory_systems"}),
+    Document(page_content="Document loaders in LangChain support PDF, CSV, HTML, and text files.", metadata={"source": "document_loaders"}),
+    Document(page_content="Prompt templates allow you to create reusable, parameterized prompts.", metadata={"source": "prompt_templates"}),
+    Document(page_content="LangChain agents can use tools to interact with external APIs.", metadata={"source": "agents_guide"}),
+    Document(page_content="Text splitters break large documents into chunks.", metadata={"source": "text_splitters"}),
+]
+
+test_questions = [
+    "What is LCEL and how does it work?",
+    "Explain Retrieval-Augmented Generation",
+    "What are the benefits of using vector stores?",
+    "How do memory systems work in LangChain?",
+    "What types of document loaders are available?",
+    "How can I create reusable prompts?",
+    "What is the difference between a chain and an agent?",
+    "How do I split large documents for processing?"
+]
+
+prompt = PromptTemplate.from_template("Context:\n{context}\n\nQuestion: {question}\n\nAnswer:")
+model = StandInChatModel(first_token_latency=0, token_latency=0)
+vector_store = WorkshopFAISS.from_documents(knowledge_docs, config.get_embeddings())
+
+
+class LegacyRetrievalQAWrapper:
+    """The previous wrapper: the chain retrieves, then sources are retrieved again"""
+    def __init__(self, chain, retriever):
+        self.chain = chain
+        self.retriever = retriever
+
+    def __call__(self, inputs):
+        query = inputs.get("query")
+        result = self.chain.invoke(query)
+        source_docs = self.retriever.invoke(query)
+        return {"result": result, "source_documents": source_docs}
+
+
+def report(label, retriever, elapsed):
+    per_question = retriever.calls / len(test_questions)
+    print(f"{label:<28} {per_question:>4.1f} retriever calls/question  {elapsed * 1000 / len(test_questions):7.2f} ms/question")
+
+
+print("=== RAG Retrieval Benchmark ===")
+
+retriever = CountingRetriever(retriever=vector_store.as_retriever(search_kwargs={"k": 3}))
+legacy_chain = {"context": retriever | format_docs, "question": RunnablePassthrough()} | prompt | model | StrOutputParser()
+legacy_qa = LegacyRetrievalQAWrapper(legacy_chain, retriever)
+start = time.perf_counter()
+for question in test_questions:
+    legacy_qa({"query": question})
+report("Legacy wrapper (invoke)", retriever, time.perf_counter() - start)
+
+retriever = CountingRetriever(retriever=vector_store.as_retriever(search_kwargs={"k": 3}))
+qa_chain = RetrievalQAWrapper(build_rag_chain(retriever, prompt, model))
+start = time.perf_counter()
+for question in test_questions:
+    qa_chain({"query": question})
+report("Single pass (invoke)", retriever, time.perf_counter() - start)
+
+retriever.calls = 0
+start = time.perf_counter()
+qa_chain.batch([{"query": question} for question in test_questions])
+report("Single pass (batch)", retriever, time.perf_counter() - start)
+
+retriever.calls = 0
+start = time.perf_counter()
+for question in test_questions:
+    for _ in qa_chain.stream({"query": question}):
+        pass
+report("Single pass (stream)", retriever, time.perf_counter() - start)
+
+
+async def run_async():
+    await asyncio.gather(*(qa_chain.acall({"query": question}) for question in test_questions))
+
+retriever.calls = 0
+start = time.perf_counter()
+asyncio.run(run_async())
+report("Single pass (async)", retriever, time.perf_counter() - start)
@@ -0,0 +1,90 @@
+"""
+Benchmark: peak memory of whole-file vs memory-mapped streaming splitting.
+
+Checks that StreamingTextSplitter produces exactly the chunks of
+RecursiveCharacterTextSplitter for every Task 6 splitter configuration,
+then splits a large synthetic file both ways in fresh processes and
+reports each one's peak resident memory.
+
+Run from the workshop root:
+    PYTHONPATH=. python task6/benchmark_streaming_splitter.py
+"""
+
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from workshop_ingest import SPLITTER_CONFIGS
+from workshop_splitters import StreamingTextSplitter
+
+SIZE_MB = int(os.environ.get("BENCH_SIZE_MB", "200"))
+DATA_PATH = "data/sample_documents.txt"
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, path):
+    """Split path in this process and print chunk count, seconds and peak RSS."""
+    start = time.perf_counter()
+    if mode == "whole":
+        with open(path, encoding="utf-8", errors="replace") as f:
+            count = len(RecursiveCharacterTextSplitter(**SPLITTER_CONFIGS["text"]).split_text(f.read()))
+    else:
+        count = sum(1 for _ in StreamingTextSplitter(**SPLITTER_CONFIGS["text"]).iter_split_file(path))
+    print(count, time.perf_counter() - start, peak_rss_mb())
+
+
+def synthetic_file(directory, size_mb):
+    """Write a corpus of sample paragraphs, with some long lines and non-ASCII text."""
+    with open(DATA_PATH, encoding="utf-8") as f:
+        paragraphs = [p for p in f.read().split("\n\n") if p.strip()]
+    paragraphs += ["Überblick über Vektorspeicher — Einbettungen und Ähnlichkeitssuche. " * 8,
+                   "long_identifier_without_spaces_" * 20]
+    rng = random.Random(0)
+    path = os.path.join(directory, "corpus.txt")
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        while written < target:
+            block = "\n\n".join(rng.choice(paragraphs) for _ in range(1000)) + "\n\n"
+            written += f.write(block)
+    return path
+
+
+def check_equal(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    for name, settings in SPLITTER_CONFIGS.items():
+        expected = RecursiveCharacterTextSplitter(**settings).split_text(text)
+        actual = StreamingTextSplitter(**settings).split_file(path)
+        assert actual == expected, f"{name} chunks differ for {path}"
+        print(f"✅ {name:<8} {len(actual):>6} identical chunks  ({os.path.basename(path)})")
+
+
+if __name__ == "__main__" and len(sys.argv) == 3:
+    child(sys.argv[1], sys.argv[2])
+    sys.exit()
+
+print("=== Streaming Splitter Benchmark ===\n")
+with tempfile.TemporaryDirectory() as tmp:
+    check_equal(DATA_PATH)
+    check_equal(synthetic_file(tmp, 2))
+
+    path = synthetic_file(tmp, SIZE_MB)
+    print(f"\nSplitting a {os.path.getsize(path) / 1024 / 1024:.0f} MB file with the 'text' configuration:")
+    counts = {}
+    for mode, label in (("whole", "read + split_text"), ("stream", "mmap + iter_split_file")):
+        out = subprocess.run([sys.executable, __file__, mode, path], capture_output=True, text=True,
+                             check=True, env={**os.environ, "PYTHONPATH": os.getcwd()})
+        count, seconds, rss = out.stdout.split()
+        counts[mode] = count
+        print(f"{label:<24} {int(count):>9} chunks  {float(seconds):6.1f} s  peak RSS {float(rss):7.0f} MB")
+    assert counts["whole"] == counts["stream"]
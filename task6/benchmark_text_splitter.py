@@ -0,0 +1,96 @@
+"""
+Benchmark: RecursiveCharacterTextSplitter vs FastTextSplitter throughput.
+
+Splits synthetic corpora with every Task 6 splitter configuration, using
+character lengths and token lengths, checks that both splitters return
+identical chunks and reports MB/s. Token lengths use the cl100k tokenizer
+when it is available locally and a regex word/punctuation tokenizer
+otherwise; neither is cached, as with a plain tokenizer-based
+length_function.
+
+Run from the workshop root (sizes in MB, 1000 needs several GB of RAM):
+    PYTHONPATH=. BENCH_SIZES_MB=1,10,100 python task6/benchmark_text_splitter.py
+"""
+
+import os
+import random
+import re
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from workshop_ingest import SPLITTER_CONFIGS
+from workshop_memory import _encoding
+from workshop_splitters import FastTextSplitter
+
+SIZES_MB = [int(size) for size in os.environ.get("BENCH_SIZES_MB", "1,10,100").split(",")]
+# Token-length runs are much slower with the base splitter; cap their corpus size
+TOKEN_MAX_MB = int(os.environ.get("BENCH_TOKEN_MAX_MB", "10"))
+
+encoding = _encoding()
+if encoding is not None:
+    def token_length(text):
+        return len(encoding.encode(text))
+    token_label = "cl100k tokens"
+else:
+    _TOKEN = re.compile(r"\w+|[^\w\s]")
+
+    def token_length(text):
+        return len(_TOKEN.findall(text))
+    token_label = "regex tokens"
+
+
+def corpus(size_mb, seed=0):
+    """Random prose, markdown headings and code-like lines, without repeated paragraphs."""
+    rng = random.Random(seed)
+    syllables = ["lang", "chain", "vec", "tor", "em", "bed", "ding", "re", "triev", "al", "mo", "del",
+                 "prompt", "to", "ken", "chunk", "in", "dex", "que", "ry", "graph", "ent"]
+    vocab = ["".join(rng.choices(syllables, k=rng.randint(1, 4))) for _ in range(5000)]
+    target = size_mb * 1024 * 1024
+    parts, size = [], 0
+    while size < target:
+        words = rng.choices(vocab, k=4000)
+        paragraphs, i = [], 0
+        while i < len(words):
+            n = rng.randint(20, 120)
+            kind = rng.random()
+            if kind < 0.1:
+                paragraphs.append(f"## {' '.join(words[i:i + 4]).title()}")
+                n = 4
+            elif kind < 0.2:
+                paragraphs.append("\n".join(f"    {w} = {w}_fn({i})" for w in words[i:i + n // 4]))
+            else:
+                paragraphs.append(". ".join(" ".join(words[j:j + 12]).capitalize()
+                                            for j in range(i, i + n, 12)) + ".")
+            i += n
+        block = "\n\n".join(paragraphs) + "\n\n"
+        parts.append(block)
+        size += len(block)
+    return "".join(parts)
+
+
+def timed(splitter, text):
+    start = time.perf_counter()
+    chunks = splitter.split_text(text)
+    return chunks, time.perf_counter() - start
+
+
+print("=== Text Splitter Benchmark ===")
+print(f"Token length function: {token_label}\n")
+print(f"{'corpus':>7}  {'config':<9} {'length':<6} {'chunks':>8}  {'base MB/s':>9}  {'fast MB/s':>9}  {'speedup':>7}")
+
+for size_mb in SIZES_MB:
+    text = corpus(size_mb)
+    mb = len(text.encode("utf-8")) / 1024 / 1024
+    for name, settings in SPLITTER_CONFIGS.items():
+        for label, length_function in (("chars", len), ("tokens", token_length)):
+            if label == "tokens" and size_mb > TOKEN_MAX_MB:
+                continue
+            expected, base_seconds = timed(
+                RecursiveCharacterTextSplitter(**settings, length_function=length_function), text)
+            fast = FastTextSplitter(**settings, length_function=length_function)
+            chunks, fast_seconds = timed(fast, text)
+            assert chunks == expected, f"{name}/{label} chunks differ"
+            print(f"{size_mb:>5}MB  {name:<9} {label:<6} {len(chunks):>8}  {mb / base_seconds:>9.1f}  "
+                  f"{mb / fast_seconds:>9.1f}  {base_seconds / fast_seconds:>6.1f}x")
+            del expected, chunks
+    del text
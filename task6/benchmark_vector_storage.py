@@ -0,0 +1,96 @@
+"""
+Benchmark: memory per vector and recall@k of compact vector storage.
+
+Builds float32, fp16 and int8 storage for flat, IVF-Flat and HNSW indexes,
+plus the binary prefilter reranking k_factor * k candidates with float32
+or int8 vectors, over clustered synthetic 384-dimensional vectors (the
+all-MiniLM-L6-v2 size).
+Memory is the serialized index size divided by the vector count, which
+includes graph links and inverted-list ids but not the docstore. Recall@k
+is the overlap with the float32 flat index's top k.
+
+Run from the workshop root:
+    PYTHONPATH=. BENCH_SIZE=100000 python task6/benchmark_vector_storage.py
+"""
+
+import os
+import time
+
+import faiss
+import numpy as np
+from workshop_vectorstore import build_index, search_params
+
+SIZE = int(os.environ.get("BENCH_SIZE", "100000"))
+DIM = int(os.environ.get("BENCH_DIM", "384"))
+QUERIES = int(os.environ.get("BENCH_QUERIES", "500"))
+K = 10
+
+CONFIGS = [
+    ("flat", {"storage": "fp16"}),
+    ("flat", {"storage": "int8"}),
+    ("flat", {"prefilter": "binary", "refine_k_factor": 8}),
+    ("flat", {"prefilter": "binary", "refine_k_factor": 32}),
+    ("flat", {"prefilter": "binary", "refine_k_factor": 128}),
+    ("flat", {"prefilter": "binary", "storage": "int8", "refine_k_factor": 32}),
+    ("ivf", {}),
+    ("ivf", {"storage": "fp16"}),
+    ("ivf", {"storage": "int8"}),
+    ("hnsw", {}),
+    ("hnsw", {"storage": "fp16"}),
+    ("hnsw", {"storage": "int8"}),
+]
+
+
+def clustered(n, rng, centers):
+    """Unit vectors scattered around shared cluster centres, like document embeddings."""
+    x = centers[rng.integers(len(centers), size=n)] + 0.35 * rng.standard_normal((n, DIM), dtype=np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def bytes_per_vector(index):
+    return faiss.serialize_index(index).nbytes / index.ntotal
+
+
+def run(index, queries):
+    """Return (top-k ids, queries per second) searching one query at a time."""
+    params = search_params(index)
+    ids = np.empty((len(queries), K), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        if params is None:
+            ids[i] = index.search(queries[i:i + 1], K)[1][0]
+        else:
+            ids[i] = index.search(queries[i:i + 1], K, params=params)[1][0]
+    return ids, len(queries) / (time.perf_counter() - start)
+
+
+def recall(ids, truth):
+    return np.mean([len(set(a) & set(b)) / K for a, b in zip(ids, truth)])
+
+
+faiss.omp_set_num_threads(1)
+rng = np.random.default_rng(0)
+centers = rng.standard_normal((max(16, SIZE // 1000), DIM), dtype=np.float32)
+data = clustered(SIZE, rng, centers)
+queries = clustered(QUERIES, rng, centers)
+
+print("=== Vector Storage Benchmark ===")
+print(f"{SIZE} vectors, dimension {DIM}, {QUERIES} queries, recall@{K} vs float32 flat\n")
+print(f"{'index':<6} {'storage':<22} {'bytes/vector':>12}  {'vs float32':>10}  {f'recall@{K}':>9}  {'QPS':>7}")
+
+flat = build_index(data, faiss.METRIC_INNER_PRODUCT, "flat")
+baseline = bytes_per_vector(flat)
+truth, qps = run(flat, queries)
+print(f"{'flat':<6} {'float32':<22} {baseline:>12.0f}  {1.0:>9.2f}x  {1.0:>9.3f}  {qps:>7.0f}")
+del flat
+
+for index_type, options in CONFIGS:
+    index = build_index(data, faiss.METRIC_INNER_PRODUCT, index_type, **options)
+    size = bytes_per_vector(index)
+    ids, qps = run(index, queries)
+    label = options.get("storage", "float32")
+    if options.get("prefilter"):
+        label = f"binary x{options['refine_k_factor']} + {label}"
+    print(f"{index_type:<6} {label:<22} {size:>12.0f}  {size / baseline:>9.2f}x  {recall(ids, truth):>9.3f}  {qps:>7.0f}")
+    del index
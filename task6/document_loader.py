@@ -1,5 +1,9 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from workshop_splitters import FastTextSplitter
 from langchain_core.documents import Document
+from workshop_config import config
+from workshop_ingest import SPLITTER_CONFIGS, ingest, print_ingest_stats
+from workshop_memory import count_tokens
+from workshop_rag import format_docs
 
 # Sample documents for demonstration
 sample_docs = [
@@ -53,13 +57,8 @@ LCEL has a number of benefits:
 - Input and output schemas
 """
 
-# Create text splitter
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=200,
-    chunk_overlap=50,
-    length_function=len,
-    separators=["\n\n", "\n", " ", ""]
-)
+# Create text splitter (chunk_size=200, chunk_overlap=50; configurations shared with ingestion)
+text_splitter = FastTextSplitter(**SPLITTER_CONFIGS["text"])
 
 # Split the large document
 chunks = text_splitter.split_text(large_doc)
@@ -76,7 +75,8 @@ chunk_documents = [
         metadata={
             "source": "langchain_overview",
             "chunk": i,
-            "total_chunks": len(chunks)
+            "total_chunks": len(chunks),
+            "tokens": count_tokens(chunk)
         }
     )
     for i, chunk in enumerate(chunks)
@@ -85,16 +85,17 @@ chunk_documents = [
 print(f"\n=== Document Objects Created ===")
 print(f"Total chunk documents: {len(chunk_documents)}")
 
+# Adjacent chunks repeat up to chunk_overlap characters; the RAG context packer writes them once
+joined_tokens = count_tokens(format_docs(chunk_documents))
+packed_tokens = count_tokens(config.context_packer()(chunk_documents))
+print(f"Prompt context for all chunks: {joined_tokens} tokens joined, {packed_tokens} tokens packed")
+
 # Best practices demonstration
 print("\n=== Best Practices ===")
 
 # Different splitter configurations
 print("1. Code-specific splitter:")
-code_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=100,
-    chunk_overlap=20,
-    separators=["\n\n", "\n", " ", ""]
-)
+code_splitter = FastTextSplitter(**SPLITTER_CONFIGS["code"])
 
 sample_code = """
 def calculate_fibonacci(n):
@@ -114,11 +115,7 @@ code_chunks = code_splitter.split_text(sample_code)
 print(f"Code split into {len(code_chunks)} chunks")
 
 print("\n2. Markdown-aware splitter:")
-markdown_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=150,
-    chunk_overlap=30,
-    separators=["## ", "# ", "\n\n", "\n", " ", ""]
-)
+markdown_splitter = FastTextSplitter(**SPLITTER_CONFIGS["markdown"])
 
 sample_markdown = """
 # LangChain Tutorial
@@ -143,5 +140,17 @@ LangChain supports many advanced features like chains and agents.
 md_chunks = markdown_splitter.split_text(sample_markdown)
 print(f"Markdown split into {len(md_chunks)} chunks")
 
+# Ingest files from disk: stream, split in worker processes, embed in batches into FAISS
+print("\n=== Ingesting data/sample_documents.txt ===")
+print(f"Splitter configurations: {', '.join(SPLITTER_CONFIGS)}")
+sample_store, ingest_stats = ingest(
+    "data/sample_documents.txt",
+    config.get_embeddings(),
+    batch_size=config.ingest_batch_size,
+    workers=config.ingest_workers
+)
+print_ingest_stats(ingest_stats)
+print(f"Vector store now holds {sample_store.index.ntotal} chunks")
+
 with open('/root/document-loader.txt', 'w') as f:
     f.write("DOCUMENT_LOADER_COMPLETE")
\ No newline at end of file
@@ -1,23 +1,14 @@
-import os
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import PromptTemplate
 from langchain_core.documents import Document
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from workshop_config import config
+from workshop_rag import RetrievalQAWrapper, build_rag_chain
+from workshop_vectorstore import index_registry
 
 # Setup model
-model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+model = config.chat_model("openai/gpt-4.1-mini", temperature=0)
 
-# Initialize embeddings
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+# Initialize embeddings (cached on disk, so unchanged documents are not re-encoded)
+embeddings = config.get_embeddings()
 
 # Create comprehensive knowledge base
 knowledge_docs = [
@@ -64,7 +55,7 @@ knowledge_docs = [
 ]
 
 print("=== Creating Knowledge Base ===")
-vector_store = FAISS.from_documents(knowledge_docs, embeddings)
+vector_store = index_registry.load_or_build("task6_knowledge", knowledge_docs, embeddings)
 print(f"Knowledge base created with {len(knowledge_docs)} documents")
 
 # Create retriever
@@ -99,39 +90,10 @@ Answer:"""
 # Create RAG chain using modern LCEL
 print("\n=== Creating RetrievalQA Chain ===")
 
-def format_docs(docs):
-    """Format retrieved documents for the prompt"""
-    return "\n\n".join(doc.page_content for doc in docs)
-
-# Build the LCEL chain
-rag_chain = (
-    {
-        "context": retriever | format_docs,
-        "question": RunnablePassthrough()
-    }
-    | custom_prompt
-    | model
-    | StrOutputParser()
-)
+# Build the LCEL RAG chain; it retrieves once and returns the answer with its sources
+rag_chain = build_rag_chain(retriever, custom_prompt, model)
 
-# Wrapper class to maintain RetrievalQA interface
-class RetrievalQAWrapper:
-    """Wrapper to maintain compatibility with old RetrievalQA interface"""
-    def __init__(self, chain, retriever):
-        self.chain = chain
-        self.retriever = retriever
-
-    def __call__(self, inputs):
-        """Execute chain and return result with source documents"""
-        query = inputs.get("query")
-        result = self.chain.invoke(query)
-        source_docs = self.retriever.invoke(query)
-        return {
-            "result": result,
-            "source_documents": source_docs
-        }
-
-qa_chain = RetrievalQAWrapper(rag_chain, retriever)
+qa_chain = RetrievalQAWrapper(rag_chain)
 
 # Test questions
 test_questions = [
@@ -146,11 +108,10 @@ test_questions = [
 ]
 
 print("\n=== Testing RAG System ===")
-for question in test_questions:
+# One batch embeds every question in a single forward pass and searches FAISS once
+results = qa_chain.batch([{"query": question} for question in test_questions])
+for question, result in zip(test_questions, results):
     print(f"\nQ: {question}")
-
-    result = qa_chain({"query": question})
-
     print(f"A: {result['result']}")
 
     # Show sources
@@ -175,6 +136,11 @@ mmr_docs = mmr_retriever.invoke("LangChain components")
 for i, doc in enumerate(mmr_docs):
     print(f"{i+1}. {doc.page_content[:100]}...")
 
+# Several queries at once: MMR runs for all of them as one set of matrix operations
+mmr_queries = ["LangChain components", "prompt templates", "vector databases"]
+for query, docs in zip(mmr_queries, mmr_retriever.batch(mmr_queries)):
+    print(f"MMR batch '{query}': {[doc.metadata.get('source', 'unknown') for doc in docs]}")
+
 # Top-k retriever (returns only top k most similar)
 topk_retriever = vector_store.as_retriever(
     search_type="similarity",
@@ -192,10 +158,17 @@ filter_retriever = vector_store.as_retriever(
     search_kwargs={"k": 3, "filter": {"topic": "memory"}}
 )
 
-print("\nFiltered Retrieval for memory-related content:")
+strategy, matches = vector_store.plan_filter({"topic": "memory"}, k=3)
+print(f"\nFiltered Retrieval for memory-related content ({len(matches)} matching documents, {strategy}):")
 filtered_docs = filter_retriever.invoke("conversation context")
 for doc in filtered_docs:
     print(f"- {doc.page_content}")
 
+# Hybrid retrieval: BM25 catches exact terms such as class names, fused with the vector results
+hybrid_retriever = vector_store.as_hybrid_retriever(k=3)
+print("\nHybrid Retrieval for 'RecursiveCharacterTextSplitter':")
+for doc in hybrid_retriever.invoke("RecursiveCharacterTextSplitter"):
+    print(f"- {doc.metadata.get('source', 'unknown')}: {doc.page_content[:80]}...")
+
 with open('/root/retrieval-chain.txt', 'w') as f:
     f.write("RETRIEVAL_CHAIN_COMPLETE")
\ No newline at end of file
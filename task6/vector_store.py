@@ -1,13 +1,12 @@
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from workshop_config import config
+from workshop_vectorstore import IndexManager, index_registry
 
-# Initialize embeddings
 print("=== Initializing Embeddings ===")
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+# Initialize embeddings (cached on disk, so unchanged documents are not re-encoded)
+embeddings = config.get_embeddings()
 
 # Test embedding
 sample_text = "LangChain is a powerful framework for building AI applications"
@@ -55,9 +54,13 @@ documents = [
 print(f"\n=== Creating Vector Store ===")
 print(f"Processing {len(documents)} documents...")
 
-# Create FAISS vector store
-vector_store = FAISS.from_documents(documents, embeddings)
+# Create FAISS vector store (reuses the saved snapshot if the corpus is unchanged)
+# This store gets new documents below, so it is loaded into memory rather than memory-mapped
+vector_store = index_registry.load_or_build("task6_vector_store", documents, embeddings, mmap=False)
 print("Vector store created successfully!")
+if hasattr(embeddings, "stats"):
+    cache_stats = embeddings.stats()
+    print(f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
 
 # Save the vector store
 vector_store.save_local("faiss_index")
@@ -101,6 +104,11 @@ print(f"MMR Query: {query}")
 for i, doc in enumerate(mmr_results):
     print(f"MMR Result {i+1}: {doc.page_content}")
 
+# Batch MMR: one embedding call and one FAISS search for every query
+batch_queries = [query, "How do I write prompts?", "Where are embeddings stored?"]
+for batch_query, docs in zip(batch_queries, vector_store.max_marginal_relevance_search_batch(batch_queries, k=2)):
+    print(f"MMR batch '{batch_query}': {[doc.metadata['source'] for doc in docs]}")
+
 # Filter search by metadata
 print("\n=== Filtered Search ===")
 filter_results = vector_store.similarity_search(
@@ -109,7 +117,8 @@ filter_results = vector_store.similarity_search(
     filter={"category": "framework"}
 )
 
-print("Results filtered by category='framework':")
+strategy, matches = vector_store.plan_filter({"category": "framework"}, k=5)
+print(f"Results filtered by category='framework' ({len(matches)} matching documents, {strategy}):")
 for doc in filter_results:
     print(f"- {doc.page_content}")
 
@@ -135,5 +144,39 @@ print("\nVerification search for 'text processing':")
 for doc in verification_results:
     print(f"- {doc.page_content}")
 
+# Incremental updates: content-hash ids and a source manifest mean only changed chunks are embedded
+print("\n=== Incremental Updates ===")
+manager = IndexManager(embeddings)
+stats = manager.update(documents + new_docs)
+print(f"Indexed {stats['added']} chunks from {manager.stats()['sources']} sources")
+
+edited_docs = [
+    Document(
+        page_content="Memory systems let chatbots keep conversation context across turns.",
+        metadata={"source": "memory", "category": "conversation"}
+    ),
+    documents[0],  # unchanged, so neither re-embedded nor duplicated
+]
+stats = manager.update(edited_docs)
+print(f"Re-ingested 'memory' and 'intro': {stats['added']} embedded, {stats['deleted']} deleted, "
+      f"{stats['unchanged']} unchanged")
+manager.delete_source("agents")
+print(f"Deleted source 'agents': {manager.stats()}")
+for doc in manager.store.similarity_search("conversation context", k=2):
+    print(f"- {doc.page_content}")
+
+print("\n=== Compact Vector Storage ===")
+# Each option is registered under its own name, so the variants never evict each other's snapshots
+query = "How do vector stores search embeddings?"
+for label, name, options in (("float32", "float32", {"storage": "float32"}),
+                             ("fp16", "fp16", {"storage": "fp16"}),
+                             ("int8", "int8", {"storage": "int8"}),
+                             ("binary + int8 rerank", "binary_int8", {"storage": "int8", "prefilter": "binary"})):
+    store = index_registry.load_or_build(f"task6_vector_store_{name}", documents, embeddings,
+                                         index_type="flat", **options)
+    stats = store.index_stats()
+    top = [doc.metadata.get("source") for doc in store.similarity_search(query, k=3)]
+    print(f"{label:<22} {stats['bytes_per_vector']:7.0f} bytes/vector  top 3: {top}")
+
 with open('/root/vector-store.txt', 'w') as f:
     f.write("VECTOR_STORE_COMPLETE")
\ No newline at end of file
@@ -1,26 +1,19 @@
-import os
 import gradio as gr
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.documents import Document
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
+from workshop_cache import SemanticCache
+from workshop_config import config
+from workshop_rag import RetrievalQAWrapper, astream_response, build_rag_chain, stream_response
+from workshop_vectorstore import index_registry
 
 # Initialize model
-model = ChatOpenAI(
-    model="openai/gpt-4.1-mini",
-    temperature=0.7,
-    base_url=os.environ.get("OPENAI_API_BASE")
-)
+model = config.chat_model("openai/gpt-4.1-mini", temperature=0.7)
 
-# Initialize embeddings
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+# Initialize embeddings (cached on disk, so unchanged documents are not re-encoded)
+embeddings = config.get_embeddings()
 
 # Create knowledge base
 knowledge_docs = [
@@ -61,8 +54,8 @@ knowledge_docs = [
 print("Initializing LangChain AI Assistant...")
 print("Creating vector store...")
 
-# Create vector store
-vector_store = FAISS.from_documents(knowledge_docs, embeddings)
+# Load the vector store snapshot, rebuilding it only when the knowledge base changes
+vector_store = index_registry.load_or_build("task7_knowledge", knowledge_docs, embeddings)
 retriever = vector_store.as_retriever(search_kwargs={"k": 3})
 
 # Create RAG chain
@@ -78,47 +71,25 @@ Question: {question}
 Answer:"""
 )
 
-def format_docs(docs):
-    """Format retrieved documents for the prompt"""
-    return "\n\n".join(doc.page_content for doc in docs)
-
-# Build the LCEL RAG chain
-rag_chain = (
-    {
-        "context": retriever | format_docs,
-        "question": RunnablePassthrough()
-    }
-    | rag_prompt
-    | model
-    | StrOutputParser()
-)
+# Build the LCEL RAG chain; it retrieves once and returns the answer with its sources
+rag_chain = build_rag_chain(retriever, rag_prompt, model)
+
+qa_chain = RetrievalQAWrapper(rag_chain)
+
+# Semantic answer cache: paraphrases of earlier questions reuse the stored answer and sources
+semantic_cache = SemanticCache(
+    embeddings,
+    threshold=config.semantic_cache_threshold,
+    max_entries=config.semantic_cache_size,
+    ttl_seconds=config.semantic_cache_ttl,
+    vector_store=vector_store
+) if config.semantic_cache else None
 
-# Wrapper class to maintain RetrievalQA interface
-class RetrievalQAWrapper:
-    """Wrapper to maintain compatibility with old RetrievalQA interface"""
-    def __init__(self, chain, retriever):
-        self.chain = chain
-        self.retriever = retriever
-
-    def __call__(self, inputs):
-        """Execute chain and return result with source documents"""
-        query = inputs.get("query")
-        result = self.chain.invoke(query)
-        source_docs = self.retriever.invoke(query)
-        return {
-            "result": result,
-            "source_documents": source_docs
-        }
-
-qa_chain = RetrievalQAWrapper(rag_chain, retriever)
-
-# Memory setup for conversation
-memory_store = {}
-
-def get_session_history(session_id: str) -> ChatMessageHistory:
-    if session_id not in memory_store:
-        memory_store[session_id] = ChatMessageHistory()
-    return memory_store[session_id]
+# Memory setup for conversation: one history per browser session, bounded and spilled to disk
+memory_store = config.session_store
+
+def get_session_history(session_id: str):
+    return memory_store.get_session_history(session_id)
 
 # Chat chain with memory
 chat_prompt = ChatPromptTemplate.from_messages([
@@ -127,7 +98,10 @@ chat_prompt = ChatPromptTemplate.from_messages([
     ("human", "{input}")
 ])
 
-chat_chain = chat_prompt | model | StrOutputParser()
+# Fit the history to the model's context window instead of sending the whole conversation
+trim_history = config.history_trimmer(summarizer=config.chat_model("openai/gpt-4.1-mini", temperature=0))
+
+chat_chain = RunnablePassthrough.assign(history=trim_history) | chat_prompt | model | StrOutputParser()
 
 memory_chat_chain = RunnableWithMessageHistory(
     chat_chain,
@@ -136,40 +110,44 @@ memory_chat_chain = RunnableWithMessageHistory(
     history_messages_key="history",
 )
 
-def chat_with_rag(message, history, use_rag=True):
-    """Main chat function that can use RAG or regular conversation"""
-    try:
-        if use_rag:
-            # Use RAG for knowledge-based questions
-            result = qa_chain({"query": message})
-            response = result['result']
-
-            # Add source information
-            if result.get('source_documents'):
-                sources = [doc.metadata.get('source', 'unknown') for doc in result['source_documents']]
-                unique_sources = list(set(sources))
-                if unique_sources:
-                    response += f"\n\n*Sources: {', '.join(unique_sources)}*"
-        else:
-            # Use conversational chain with memory
-            session_config = {"configurable": {"session_id": "default_session"}}
-            response = memory_chat_chain.invoke(
-                {"input": message},
-                config=session_config
-            )
+def stream_chat_with_rag(message, history, use_rag=True, session_id="default_session"):
+    """Stream the response as the model emits tokens, yielding the text so far"""
+    yield from stream_response(qa_chain, memory_chat_chain, message, use_rag, session_id,
+                               semantic_cache=semantic_cache)
 
-    except Exception as e:
-        response = f"I apologize, but I encountered an error: {str(e)}. Please try again."
+async def astream_chat_with_rag(message, history, use_rag=True, session_id="default_session"):
+    """Async version of stream_chat_with_rag; used by the Gradio handlers"""
+    async for response in astream_response(qa_chain, memory_chat_chain, message, use_rag, session_id,
+                                           semantic_cache=semantic_cache):
+        yield response
 
+def chat_with_rag(message, history, use_rag=True, session_id="default_session"):
+    """Main chat function that can use RAG or regular conversation"""
+    response = ""
+    for response in stream_chat_with_rag(message, history, use_rag, session_id):
+        pass
     return response
 
-def gradio_chat(message, history, use_rag):
-    """Gradio-compatible chat function"""
-    response = chat_with_rag(message, history, use_rag)
-
-    # Format for Gradio
-    history.append([message, response])
-    return "", history
+def cache_stats_text():
+    """Summarize semantic and retrieval cache effectiveness for the sidebar"""
+    if semantic_cache is None:
+        text = "Semantic cache disabled"
+    else:
+        stats = semantic_cache.stats()
+        text = (f"Cache hit rate: {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})  \n"
+                f"Latency saved: {stats['latency_saved']:.1f}s")
+    if vector_store.retrieval_cache is not None:
+        stats = vector_store.retrieval_cache.stats()
+        text += (f"  \nQuery embeddings: {stats['query_hit_rate']:.0%} hits  \n"
+                 f"Search results: {stats['result_hit_rate']:.0%} hits")
+    return text
+
+async def gradio_chat(message, history, use_rag, session_id="default_session"):
+    """Gradio-compatible chat function that streams the response into the chatbot"""
+    history.append([message, ""])
+    async for response in astream_chat_with_rag(message, history, use_rag, session_id):
+        history[-1][1] = response
+        yield "", history
 
 # Sample prompts for testing
 sample_prompts = [
@@ -221,25 +199,38 @@ with gr.Blocks(title="LangChain AI Assistant", theme=gr.themes.Soft()) as demo:
                     outputs=msg
                 )
 
+            gr.Markdown("### ⚡ Caches")
+            cache_info = gr.Markdown(cache_stats_text())
+
     # Event handlers
-    def submit_message(message, history, rag_mode):
+    async def submit_message(message, history, rag_mode, request: gr.Request):
         if message.strip():
-            return gradio_chat(message, history, rag_mode)
-        return message, history
+            # Each browser session keeps its own conversation memory
+            async for update in gradio_chat(message, history, rag_mode, request.session_hash):
+                yield update
+        else:
+            yield message, history
 
     send_btn.click(
         submit_message,
         inputs=[msg, chatbot, use_rag],
         outputs=[msg, chatbot]
-    )
+    ).then(cache_stats_text, outputs=cache_info)
 
     msg.submit(
         submit_message,
         inputs=[msg, chatbot, use_rag],
         outputs=[msg, chatbot]
-    )
+    ).then(cache_stats_text, outputs=cache_info)
+
+    def clear_chat(request: gr.Request):
+        memory_store.clear(request.session_hash)
+        return []
+
+    clear.click(clear_chat, outputs=[chatbot], show_progress=False)
 
-    clear.click(lambda: ([], {}), outputs=[chatbot], show_progress=False)
+# Handlers are async, so concurrent requests wait on the event loop instead of holding worker threads
+demo.queue(default_concurrency_limit=config.gradio_concurrency)
 
 print("LangChain AI Assistant ready!")
 print("Starting Gradio interface...")
@@ -0,0 +1,93 @@
+"""
+Load test: concurrency of the sync vs async assistant request path.
+
+Drives the same stream_response / astream_response handlers the Gradio app
+uses, against a local stand-in model, with many simultaneous users. Sync
+handlers run on a thread pool sized like Gradio's default worker limit.
+
+Run from the workshop root:
+    PYTHONPATH=. python task7/benchmark_async_load.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from langchain_core.runnables.history import RunnableWithMessageHistory
+from workshop_bench import StandInChatModel
+from workshop_memory import SessionStore
+from workshop_rag import RetrievalQAWrapper, astream_response, build_rag_chain, stream_response
+from workshop_vectorstore import WorkshopFAISS
+
+USERS = int(os.environ.get("BENCH_USERS", "200"))
+THREAD_LIMIT = int(os.environ.get("BENCH_THREADS", "40"))
+
+model = StandInChatModel(first_token_latency=0.5, token_latency=0.02)
+
+documents = [
+    Document(page_content=f"Knowledge base entry {i} about LangChain topic {i % 7}.", metadata={"source": f"doc_{i}"})
+    for i in range(200)
+]
+vector_store = WorkshopFAISS.from_documents(documents, DeterministicFakeEmbedding(size=384))
+retriever = vector_store.as_retriever(search_kwargs={"k": 3})
+rag_prompt = PromptTemplate.from_template("Context:\n{context}\n\nQuestion: {question}\n\nAnswer:")
+qa_chain = RetrievalQAWrapper(build_rag_chain(retriever, rag_prompt, model))
+
+memory_store = SessionStore(os.path.join(tempfile.mkdtemp(), "sessions.sqlite"))
+
+def get_session_history(session_id: str):
+    return memory_store.get_session_history(session_id)
+
+chat_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful LangChain expert assistant."),
+    MessagesPlaceholder(variable_name="history"),
+    ("human", "{input}")
+])
+memory_chat_chain = RunnableWithMessageHistory(
+    chat_prompt | model | StrOutputParser(),
+    get_session_history,
+    input_messages_key="input",
+    history_messages_key="history",
+)
+
+
+def run_sync(use_rag):
+    def handle(user):
+        for _ in stream_response(qa_chain, memory_chat_chain, f"Question {user}", use_rag, f"sync-{use_rag}-{user}"):
+            pass
+
+    with ThreadPoolExecutor(max_workers=THREAD_LIMIT) as pool:
+        list(pool.map(handle, range(USERS)))
+
+
+async def run_async(use_rag):
+    async def handle(user):
+        async for _ in astream_response(qa_chain, memory_chat_chain, f"Question {user}", use_rag, f"async-{use_rag}-{user}"):
+            pass
+
+    await asyncio.gather(*(handle(user) for user in range(USERS)))
+
+
+print("=== Async Load Test ===")
+print(f"Users: {USERS}, sync worker threads: {THREAD_LIMIT}")
+print(f"Stand-in model: {model.first_token_latency * 1000:.0f} ms to first token, {model.token_latency * 1000:.0f} ms/token\n")
+
+for use_rag in (True, False):
+    mode = "rag" if use_rag else "memory"
+    for label, runner in (("sync", lambda: run_sync(use_rag)), ("async", lambda: asyncio.run(run_async(use_rag)))):
+        model.reset_counters()
+        start = time.perf_counter()
+        # The handlers log timing per request; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner()
+        elapsed = time.perf_counter() - start
+        print(f"{mode:<6} {label:<5}  peak concurrent model calls: {model.peak_in_flight:>4}  "
+              f"total: {elapsed:6.2f}s  throughput: {USERS / elapsed:6.1f} req/s")
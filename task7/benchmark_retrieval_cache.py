@@ -0,0 +1,81 @@
+"""
+Benchmark: retrieval latency with and without the two-level retrieval cache.
+
+Replays a stream of questions drawn with Zipf-distributed popularity (a few
+questions, like the app's sample prompts, are asked far more often than the
+rest) through similarity and MMR retrievers, as task7/app.py does on every
+RAG request. New documents are added to the knowledge base during the run,
+which must invalidate cached results. Query embeddings take a simulated
+model latency (StandInEmbeddings). Reports ms per request and the hit rate
+of each cache level, and checks every cached result against an uncached
+search of the same store.
+
+Run from the workshop root:
+    PYTHONPATH=. python task7/benchmark_retrieval_cache.py
+"""
+
+import os
+import time
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from workshop_bench import StandInEmbeddings
+from workshop_cache import RetrievalCache
+from workshop_vectorstore import WorkshopFAISS
+
+SIZE = int(os.environ.get("BENCH_SIZE", "50000"))
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "2000"))
+DISTINCT = int(os.environ.get("BENCH_QUESTIONS", "300"))
+# The knowledge base gets new documents this often
+ADD_EVERY = int(os.environ.get("BENCH_ADD_EVERY", "500"))
+
+faiss.omp_set_num_threads(1)
+rng = np.random.default_rng(0)
+embeddings = StandInEmbeddings(text_latency=0)
+store = WorkshopFAISS.from_texts([f"Knowledge base entry {i}" for i in range(SIZE)], embeddings,
+                                 metadatas=[{"source": f"doc_{i}"} for i in range(SIZE)])
+# A fixed cost per forward pass, like a local sentence-transformer
+embeddings.call_latency = 0.005
+
+questions = [f"Question {i} about LangChain" for i in range(DISTINCT)]
+requests = [questions[min(rank, DISTINCT) - 1] for rank in rng.zipf(1.3, size=REQUESTS)]
+search_types = rng.choice(["similarity", "mmr"], size=REQUESTS)
+retrievers = {
+    "similarity": store.as_retriever(search_kwargs={"k": 3}),
+    "mmr": store.as_retriever(search_type="mmr", search_kwargs={"k": 3, "fetch_k": 10}),
+}
+
+
+def replay(cache):
+    """Return (ms per request, per-request document sources), adding documents every ADD_EVERY requests."""
+    store.retrieval_cache = cache
+    results = []
+    added = []
+    start = time.perf_counter()
+    for i, (question, search_type) in enumerate(zip(requests, search_types)):
+        if i and i % ADD_EVERY == 0:
+            # Same text as the first question, so the new documents change its results
+            added += store.add_documents([Document(page_content=requests[0], metadata={"source": f"new_{i}"})])
+        results.append([doc.metadata["source"] for doc in retrievers[search_type].invoke(question)])
+    seconds = time.perf_counter() - start
+    store.delete(added)
+    return seconds * 1000 / REQUESTS, results
+
+
+uncached_ms, expected = replay(None)
+cache = RetrievalCache(store, max_queries=1024, max_results=1024)
+cached_ms, actual = replay(cache)
+assert actual == expected, "cached retrieval returned different documents"
+
+stats = cache.stats()
+print("=== Retrieval Cache Benchmark ===")
+print(f"{SIZE} documents, {REQUESTS} requests over {DISTINCT} distinct questions (Zipf), "
+      f"similarity and MMR, documents added every {ADD_EVERY} requests, "
+      f"{embeddings.call_latency * 1000:.0f} ms simulated query embedding\n")
+print(f"{'retrieval':<10} {'ms/request':>10}")
+print(f"{'uncached':<10} {uncached_ms:>10.2f}")
+print(f"{'cached':<10} {cached_ms:>10.2f}  ({uncached_ms / cached_ms:.1f}x)\n")
+print(f"Query embedding level: {stats['query_hit_rate']:.1%} hits ({stats['query_hits']}/{REQUESTS})")
+print(f"Search result level:   {stats['result_hit_rate']:.1%} hits ({stats['result_hits']}/{REQUESTS})")
+print("Cached results identical to uncached searches, including after every add")
@@ -0,0 +1,223 @@
+"""
+LangChain Workshop Benchmark Helpers
+Local stand-ins for models and retrievers so benchmarks run without an API.
+"""
+
+import asyncio
+import json
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+
+class StandInChatModel(BaseChatModel):
+    """Local chat model that answers with a fixed response after a simulated delay."""
+
+    response: str = "This is a stand-in answer from the local benchmark model."
+    first_token_latency: float = 0.05
+    token_latency: float = 0.005
+    # Simulated prompt processing time per prompt token (about four characters per token)
+    prompt_token_latency: float = 0.0
+
+    # Number of calls currently being served, and the highest value seen
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stand-in"
+
+    def _tokens(self) -> List[str]:
+        return re.findall(r"\S+\s*", self.response)
+
+    def _prefill(self, messages: List[BaseMessage]) -> float:
+        return self.prompt_token_latency * sum(len(str(message.content)) for message in messages) / 4
+
+    @contextmanager
+    def _track(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        with self._track():
+            time.sleep(self._prefill(messages) + self.first_token_latency + self.token_latency * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        with self._track():
+            await asyncio.sleep(self._prefill(messages) + self.first_token_latency + self.token_latency * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        with self._track():
+            time.sleep(self._prefill(messages) + self.first_token_latency)
+            for token in self._tokens():
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+                time.sleep(self.token_latency)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        with self._track():
+            await asyncio.sleep(self._prefill(messages) + self.first_token_latency)
+            for token in self._tokens():
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+                await asyncio.sleep(self.token_latency)
+
+    def reset_counters(self) -> None:
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+
+class CountingRetriever(BaseRetriever):
+    """Retriever wrapper that counts how often retrieval runs."""
+
+    retriever: BaseRetriever
+    calls: int = 0
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        self.calls += 1
+        return self.retriever.invoke(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: Any) -> List[Document]:
+        self.calls += 1
+        return await self.retriever.ainvoke(query)
+
+
+class StandInEmbeddings(DeterministicFakeEmbedding):
+    """
+    Deterministic embeddings that take a simulated time per text, like a local model.
+
+    ``call_latency`` is the fixed cost of one forward pass, paid once per
+    call however many texts it embeds.
+    """
+
+    size: int = 384
+    text_latency: float = 0.0002
+    call_latency: float = 0.0
+    embedded: int = 0
+    calls: int = 0
+
+    def _forward(self, count: int) -> None:
+        time.sleep(self.call_latency + self.text_latency * count)
+        self.calls += 1
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._forward(len(texts))
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._forward(1)
+        return super().embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Several queries in one simulated forward pass."""
+        self._forward(len(texts))
+        return [super(StandInEmbeddings, self).embed_query(text) for text in texts]
+
+
+class _ChatCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        payload = json.dumps({
+            "id": f"chatcmpl-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stand-in"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.response},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInOpenAIServer:
+    """
+    Local OpenAI-compatible chat completions endpoint with HTTP/1.1 keep-alive.
+
+    Counts accepted TCP connections and served requests, so benchmarks can
+    show how many connections a client opened. Use as a context manager;
+    ``base_url`` is ready to pass to ChatOpenAI.
+    """
+
+    def __init__(self, response: str = "This is a stand-in answer from the local benchmark server.",
+                 latency: float = 0.0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatCompletionHandler)
+        self._server.daemon_threads = True
+        self._server.lock = threading.Lock()
+        self._server.response = response
+        self._server.latency = latency
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.reset_counters()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def reset_counters(self) -> None:
+        self._server.connections = 0
+        self._server.requests = 0
+
+    def __enter__(self) -> "StandInOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,427 @@
+"""
+LangChain Workshop Caches
+Answer and retrieval caches that let repeated questions skip work.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+
+class _SemanticEntry:
+    __slots__ = ("question", "vector", "answer", "source_documents", "created", "latency")
+
+    def __init__(self, question, vector, answer, source_documents, latency):
+        self.question = question
+        self.vector = vector
+        self.answer = answer
+        self.source_documents = source_documents
+        self.created = time.monotonic()
+        self.latency = latency
+
+
+class SemanticCache:
+    """
+    In-memory answer cache matched by question similarity.
+
+    Questions are embedded with the workshop embeddings and compared by
+    cosine similarity against previously answered questions, so paraphrases
+    of a cached question return the stored answer and sources. Entries are
+    evicted LRU once ``max_entries`` is reached and expire after
+    ``ttl_seconds``. If a ``vector_store`` is given, the cache empties itself
+    whenever the store's version changes.
+    """
+
+    def __init__(self, embeddings: Embeddings, threshold: float = 0.92,
+                 max_entries: int = 256, ttl_seconds: float = 3600.0, vector_store=None):
+        """
+        Args:
+            embeddings: Embeddings model used for questions
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of cached answers
+            ttl_seconds: Lifetime of a cached answer
+            vector_store: Knowledge base whose changes invalidate the cache
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.vector_store = vector_store
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+        self._entries: "OrderedDict[str, _SemanticEntry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._version = getattr(vector_store, "version", None)
+        self._last_query = (None, None)
+        self._lock = threading.Lock()
+
+    def _embed(self, question: str) -> np.ndarray:
+        # One read of the tuple: another thread may replace it between two
+        last_question, last_vector = self._last_query
+        if last_question == question:
+            return last_vector
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        self._last_query = (question, vector)
+        return vector
+
+    def _check_version(self) -> None:
+        version = getattr(self.vector_store, "version", None)
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a stored answer for a question or a close paraphrase.
+
+        Args:
+            question: User question
+
+        Returns:
+            {"result", "source_documents", "similarity"} on a hit, None on a miss
+        """
+        vector = self._embed(question)
+        with self._lock:
+            self._check_version()
+            self._expire()
+            if self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[key].vector for key in self._keys])
+                similarities = self._matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key = self._keys[best]
+                    entry = self._entries[key]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.latency_saved += entry.latency
+                    return {
+                        "result": entry.answer,
+                        "source_documents": entry.source_documents,
+                        "similarity": float(similarities[best]),
+                    }
+            self.misses += 1
+            return None
+
+    def store(self, question: str, answer: str, source_documents: List[Any], latency: float) -> None:
+        """
+        Store the answer to a question.
+
+        Args:
+            question: User question
+            answer: Generated answer
+            source_documents: Documents the answer was generated from
+            latency: Seconds it took to produce the answer, credited on later hits
+        """
+        vector = self._embed(question)
+        with self._lock:
+            self._check_version()
+            self._entries[question] = _SemanticEntry(question, vector, answer, source_documents, latency)
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self) -> None:
+        """Drop every cached answer, e.g. after the knowledge base changes."""
+        with self._lock:
+            self._clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit rate, counters and total latency saved in seconds."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "latency_saved": self.latency_saved,
+            "entries": len(self._entries),
+        }
+
+
+class RetrievalCache:
+    """
+    Two-level in-memory cache in front of a vector store's searches.
+
+    The first level maps query text to its embedding, so repeated questions
+    skip the embedding model. The second maps an embedding together with
+    the search type and search kwargs to the ids of the documents found, so
+    repeated searches skip FAISS. Both levels are bounded LRUs. Results
+    are tied to the store's ``version``: the result level empties itself
+    when the version changes, and a search that overlapped a change is
+    not stored, so a hit never predates the latest write.
+    """
+
+    def __init__(self, vector_store, max_queries: int = 1024, max_results: int = 1024):
+        """
+        Args:
+            vector_store: WorkshopFAISS whose searches are cached
+            max_queries: Number of query embeddings kept
+            max_results: Number of search results kept
+        """
+        self.vector_store = vector_store
+        self.max_queries = max_queries
+        self.max_results = max_results
+        self.query_hits = 0
+        self.query_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+
+        self._queries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._results: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._version = getattr(vector_store, "version", None)
+        self._lock = threading.Lock()
+
+    def embed(self, queries: List[str], embed: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Embeddings for queries, calling ``embed`` once for all cache misses.
+
+        Args:
+            queries: Query texts
+            embed: Function embedding a list of queries
+
+        Returns:
+            One embedding per query
+        """
+        with self._lock:
+            found = {}
+            for query in queries:
+                if query in self._queries:
+                    self._queries.move_to_end(query)
+                    found[query] = self._queries[query]
+            missing = list(dict.fromkeys(query for query in queries if query not in found))
+            self.query_misses += sum(1 for query in queries if query not in found)
+            self.query_hits += len(queries) - sum(1 for query in queries if query not in found)
+        if missing:
+            vectors = embed(missing)
+            with self._lock:
+                for query, vector in zip(missing, vectors):
+                    self._queries[query] = vector
+                    self._queries.move_to_end(query)
+                while len(self._queries) > self.max_queries:
+                    self._queries.popitem(last=False)
+            found.update(zip(missing, vectors))
+        return [found[query] for query in queries]
+
+    @staticmethod
+    def _key(embedding: List[float], search_type: str, search_kwargs: Dict[str, Any]) -> Optional[str]:
+        try:
+            params = json.dumps([search_type, search_kwargs], sort_keys=True)
+        except TypeError:
+            # Callable filters have no stable key
+            return None
+        digest = hashlib.sha256(np.asarray(embedding, dtype=np.float32).tobytes())
+        digest.update(params.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _check_version(self, version) -> None:
+        if version != self._version:
+            self._results.clear()
+            self._version = version
+
+    def search(self, embeddings: List[List[float]], search_type: str, search_kwargs: Dict[str, Any],
+               search: Callable[[List[List[float]]], List[List[Document]]]) -> List[List[Document]]:
+        """
+        Search results for query embeddings, calling ``search`` once for all cache misses.
+
+        Args:
+            embeddings: Query embeddings
+            search_type: Search type, part of the cache key
+            search_kwargs: Search kwargs (k, filter, ...), part of the cache key
+            search: Function searching a list of embeddings
+
+        Returns:
+            One list of documents per embedding
+        """
+        store = self.vector_store
+        version = store.version
+        keys = [self._key(embedding, search_type, search_kwargs) for embedding in embeddings]
+        results: List[Optional[List[Document]]] = [None] * len(embeddings)
+        with self._lock:
+            self._check_version(version)
+            for row, key in enumerate(keys):
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    results[row] = [store.docstore.search(id_) for id_ in self._results[key]]
+            missing = [row for row, found in enumerate(results) if found is None]
+            self.result_hits += len(embeddings) - len(missing)
+            self.result_misses += len(missing)
+        if missing:
+            for row, docs in zip(missing, search([embeddings[row] for row in missing])):
+                results[row] = docs
+            with self._lock:
+                # A write during the search may have changed what it saw
+                if store.version == version:
+                    self._check_version(version)
+                    for row in missing:
+                        ids = [doc.id for doc in results[row]]
+                        if keys[row] is not None and None not in ids:
+                            self._results[keys[row]] = ids
+                            self._results.move_to_end(keys[row])
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+        return results
+
+    def clear(self) -> None:
+        """Drop every cached embedding and result."""
+        with self._lock:
+            self._queries.clear()
+            self._results.clear()
+
+    @property
+    def query_hit_rate(self) -> float:
+        total = self.query_hits + self.query_misses
+        return self.query_hits / total if total else 0.0
+
+    @property
+    def result_hit_rate(self) -> float:
+        total = self.result_hits + self.result_misses
+        return self.result_hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and hit rate for each level."""
+        return {
+            "query_hits": self.query_hits,
+            "query_misses": self.query_misses,
+            "query_hit_rate": self.query_hit_rate,
+            "result_hits": self.result_hits,
+            "result_misses": self.result_misses,
+            "result_hit_rate": self.result_hit_rate,
+            "queries": len(self._queries),
+            "results": len(self._results),
+        }
+
+
+class ResponseCache(BaseCache):
+    """
+    Exact-match LLM response cache with an in-memory LRU and an SQLite tier.
+
+    LangChain passes the serialized messages as ``prompt`` and the model
+    parameters (model name, temperature, max_tokens, ...) as ``llm_string``,
+    so identical requests to identically configured models share an entry.
+    """
+
+    def __init__(self, path: str, max_entries: int = 512):
+        """
+        Args:
+            path: Path of the SQLite cache file
+            max_entries: Number of responses kept in memory
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._memory: "OrderedDict[str, Sequence[Generation]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, generations TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, generations: Sequence[Generation]) -> None:
+        self._memory[key] = generations
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        """Look up a cached response in memory, then on disk."""
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            generations = self._memory.get(key)
+            if generations is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return generations
+
+            row = self._conn.execute(
+                "SELECT generations FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            generations = [loads(item) for item in json.loads(row[0])]
+            self._remember(key, generations)
+            self.hits += 1
+            self.disk_hits += 1
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Store a response in both tiers."""
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            self._remember(key, return_val)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, generations) VALUES (?, ?)",
+                (key, json.dumps([dumps(generation) for generation in return_val])),
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters, including hits served from disk."""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
@@ -4,6 +4,7 @@ Provides consistent model configuration across all workshop tasks.
 """
 
 import os
+import threading
 from langchain_openai import ChatOpenAI
 from typing import Optional
 
@@ -27,6 +28,87 @@ class WorkshopConfig:
         self.max_tokens = int(os.environ.get("MAX_TOKENS", "1000"))
         self.debug_mode = os.environ.get("DEBUG_MODE", "false").lower() == "true"
 
+        # HTTP Connection Pool Configuration (shared by every chat model)
+        self.http_max_connections = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+        self.http_keepalive_expiry = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self._http_client = None
+        self._http_async_client = None
+        self._models = {}
+        self._models_lock = threading.Lock()
+
+        # Embedding Configuration
+        self.embedding_model = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.embedding_cache = os.environ.get("EMBEDDING_CACHE", "true").lower() == "true"
+        self.embedding_cache_path = os.environ.get("EMBEDDING_CACHE_PATH", ".workshop_cache/embeddings.sqlite")
+        self.embedding_cache_max_mb = int(os.environ.get("EMBEDDING_CACHE_MAX_MB", "512"))
+        self._embeddings = None
+
+        # Vector Store Configuration
+        self.faiss_index_dir = os.environ.get("FAISS_INDEX_DIR", "faiss_indexes")
+        # Fraction of deleted vectors that triggers compaction of an incrementally updated index
+        self.index_compact_ratio = float(os.environ.get("INDEX_COMPACT_RATIO", "0.2"))
+        # Index type: flat, ivf, ivfpq, hnsw or auto (by corpus size); 0 = derived from the corpus
+        self.faiss_index_type = os.environ.get("FAISS_INDEX_TYPE", "auto").lower()
+        self.faiss_nlist = int(os.environ.get("FAISS_NLIST", "0"))
+        self.faiss_nprobe = int(os.environ.get("FAISS_NPROBE", "16"))
+        self.faiss_pq_m = int(os.environ.get("FAISS_PQ_M", "0"))
+        self.faiss_hnsw_m = int(os.environ.get("FAISS_HNSW_M", "32"))
+        self.faiss_ef_construction = int(os.environ.get("FAISS_EF_CONSTRUCTION", "80"))
+        self.faiss_ef_search = int(os.environ.get("FAISS_EF_SEARCH", "64"))
+        self.faiss_train_size = int(os.environ.get("FAISS_TRAIN_SIZE", "100000"))
+        # Vector storage (float32, fp16, int8) and optional binary-code prefilter reranked with stored vectors
+        self.faiss_storage = os.environ.get("FAISS_STORAGE", "float32").lower()
+        self.faiss_prefilter = os.environ.get("FAISS_PREFILTER", "none").lower()
+        self.faiss_refine_k_factor = int(os.environ.get("FAISS_REFINE_K_FACTOR", "32"))
+        # Filtered search: auto, scan, prefilter or postfilter, and the thresholds auto uses
+        self.filter_strategy = os.environ.get("FILTER_STRATEGY", "auto").lower()
+        self.filter_scan_max = int(os.environ.get("FILTER_SCAN_MAX", "4096"))
+        self.filter_postfilter_selectivity = float(os.environ.get("FILTER_POSTFILTER_SELECTIVITY", "0.9"))
+
+        # Ingestion Configuration (0 workers = one per CPU, 1 = split in-process)
+        self.ingest_batch_size = int(os.environ.get("INGEST_BATCH_SIZE", "64"))
+        self.ingest_workers = int(os.environ.get("INGEST_WORKERS", "0"))
+
+        # Retrieval Cache Configuration: query text -> embedding, and search -> document ids
+        self.retrieval_cache = os.environ.get("RETRIEVAL_CACHE", "true").lower() == "true"
+        self.query_cache_size = int(os.environ.get("QUERY_CACHE_SIZE", "1024"))
+        self.retrieval_cache_size = int(os.environ.get("RETRIEVAL_CACHE_SIZE", "1024"))
+
+        # Semantic Answer Cache Configuration (Task 7 RAG mode)
+        self.semantic_cache = os.environ.get("SEMANTIC_CACHE", "true").lower() == "true"
+        self.semantic_cache_threshold = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self.semantic_cache_size = int(os.environ.get("SEMANTIC_CACHE_SIZE", "256"))
+        self.semantic_cache_ttl = float(os.environ.get("SEMANTIC_CACHE_TTL", "3600"))
+
+        # LLM Response Cache Configuration (opt-in, temperature=0 models only)
+        self.llm_cache = os.environ.get("LLM_CACHE", "false").lower() == "true"
+        self.llm_cache_path = os.environ.get("LLM_CACHE_PATH", ".workshop_cache/llm_responses.sqlite")
+        self.llm_cache_size = int(os.environ.get("LLM_CACHE_SIZE", "512"))
+        self._response_cache = None
+
+        # Chat Session Store Configuration (Task 5 and Task 7 memory)
+        # "sqlite": bounded in-memory store that spills idle sessions to SQLite
+        # "log": persistent append-only message log that survives restarts
+        self.session_backend = os.environ.get("SESSION_BACKEND", "sqlite").lower()
+        self.session_log_dir = os.environ.get("SESSION_LOG_DIR", ".workshop_cache/session_log")
+        self.session_store_path = os.environ.get("SESSION_STORE_PATH", ".workshop_cache/sessions.sqlite")
+        self.session_store_max = int(os.environ.get("SESSION_STORE_MAX", "1000"))
+        self.session_idle_ttl = float(os.environ.get("SESSION_IDLE_TTL", "1800"))
+        self.session_store_shards = int(os.environ.get("SESSION_STORE_SHARDS", "16"))
+        self._session_store = None
+
+        # Conversation History Budget (history is trimmed to fit the model context)
+        self.model_context_tokens = int(os.environ.get("MODEL_CONTEXT_TOKENS", "8192"))
+        self.history_summary = os.environ.get("HISTORY_SUMMARY", "false").lower() == "true"
+
+        # RAG Context Packing (retrieved chunks are deduplicated, merged and fit to a token budget)
+        self.context_max_tokens = int(os.environ.get("CONTEXT_MAX_TOKENS", "1500"))
+        self.context_duplicate_threshold = float(os.environ.get("CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+
+        # Gradio Configuration (requests the task7 app handles at once)
+        self.gradio_concurrency = int(os.environ.get("GRADIO_CONCURRENCY", "64"))
+
     @property
     def is_api_configured(self) -> bool:
         """Check if API is properly configured."""
@@ -56,16 +138,153 @@ class WorkshopConfig:
 
         model_name = model_names.get(model_type, self.default_model)
 
-        return ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            openai_api_key=self.api_key,
-            openai_api_base=self.api_base,
-            timeout=self.api_timeout,
-            max_tokens=self.max_tokens,
-            **kwargs
+        kwargs.setdefault("max_tokens", self.max_tokens)
+        return self.chat_model(model_name, temperature=temperature, **kwargs)
+
+    def chat_model(self, model_name: str, temperature: float = 0, **kwargs) -> ChatOpenAI:
+        """
+        Get a shared ChatOpenAI instance for a model name and parameters.
+
+        Instances are memoized per (model_name, temperature, kwargs), and all
+        of them send requests through the same keep-alive connection pool,
+        so repeated calls skip client construction and connection setup.
+        Temperature-0 models share the LLM response cache unless ``cache`` is given.
+
+        Args:
+            model_name: Model identifier sent to the API
+            temperature: Temperature setting for the model
+            **kwargs: Additional parameters for ChatOpenAI
+
+        Returns:
+            ChatOpenAI instance
+        """
+        # Only deterministic calls are safe to answer from the cache
+        if temperature == 0 and "cache" not in kwargs:
+            kwargs["cache"] = self.response_cache
+
+        key = (model_name, temperature, tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is None:
+                if self.api_key:
+                    kwargs.setdefault("openai_api_key", self.api_key)
+                if self.api_base:
+                    kwargs.setdefault("openai_api_base", self.api_base)
+                model = ChatOpenAI(
+                    model=model_name,
+                    temperature=temperature,
+                    timeout=self.api_timeout,
+                    http_client=self.http_client,
+                    http_async_client=self.http_async_client,
+                    **kwargs
+                )
+                self._models[key] = model
+            return model
+
+    def _http_limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.http_max_connections,
+            max_keepalive_connections=self.http_max_keepalive,
+            keepalive_expiry=self.http_keepalive_expiry
         )
 
+    @property
+    def http_client(self):
+        """Shared httpx.Client used by every sync model call."""
+        if self._http_client is None:
+            import httpx
+
+            self._http_client = httpx.Client(limits=self._http_limits(), timeout=self.api_timeout)
+        return self._http_client
+
+    @property
+    def http_async_client(self):
+        """Shared httpx.AsyncClient used by every async model call."""
+        if self._http_async_client is None:
+            import httpx
+
+            self._http_async_client = httpx.AsyncClient(limits=self._http_limits(), timeout=self.api_timeout)
+        return self._http_async_client
+
+    @property
+    def response_cache(self):
+        """Shared LLM response cache, or None if LLM_CACHE is not enabled."""
+        if self.llm_cache and self._response_cache is None:
+            from workshop_cache import ResponseCache
+
+            self._response_cache = ResponseCache(self.llm_cache_path, max_entries=self.llm_cache_size)
+        return self._response_cache
+
+    @property
+    def session_store(self):
+        """Shared chat session store (SessionStore, or MessageLog if SESSION_BACKEND=log)."""
+        if self._session_store is None:
+            from workshop_memory import MessageLog, SessionStore
+
+            if self.session_backend == "log":
+                self._session_store = MessageLog(self.session_log_dir, max_loaded=self.session_store_max)
+            else:
+                self._session_store = SessionStore(
+                    self.session_store_path,
+                    max_sessions=self.session_store_max,
+                    idle_ttl=self.session_idle_ttl,
+                    shards=self.session_store_shards
+                )
+        return self._session_store
+
+    def context_packer(self):
+        """
+        Get a ContextPacker with the CONTEXT_MAX_TOKENS budget.
+
+        Returns:
+            ContextPacker instance
+        """
+        from workshop_rag import ContextPacker
+
+        return ContextPacker(self.context_max_tokens, self.context_duplicate_threshold)
+
+    def history_trimmer(self, summarizer=None):
+        """
+        Get a HistoryTrimmer sized to the model context and MAX_TOKENS.
+
+        Args:
+            summarizer: Chat model that summarizes dropped turns; only used if HISTORY_SUMMARY is enabled
+
+        Returns:
+            HistoryTrimmer instance
+        """
+        from workshop_memory import HistoryTrimmer
+
+        return HistoryTrimmer(
+            self.model_context_tokens,
+            self.max_tokens,
+            summarizer=summarizer if self.history_summary else None
+        )
+
+    def get_embeddings(self):
+        """
+        Get the shared embeddings model, wrapped in the on-disk cache if enabled.
+
+        Returns:
+            HuggingFaceEmbeddings instance, or CachedEmbeddings around it
+        """
+        if self._embeddings is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            from workshop_embeddings import CachedEmbeddings
+
+            embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
+            if self.embedding_cache:
+                embeddings = CachedEmbeddings(
+                    embeddings,
+                    model_name=self.embedding_model,
+                    cache_path=self.embedding_cache_path,
+                    max_bytes=self.embedding_cache_max_mb * 1024 * 1024
+                )
+            self._embeddings = embeddings
+        return self._embeddings
+
     def print_status(self):
         """Print current configuration status."""
         print(f"🔧 Workshop Configuration:")
@@ -76,6 +295,24 @@ class WorkshopConfig:
         print(f"   Fast Model: {self.fast_model}")
         print(f"   Coding Model: {self.coding_model}")
         print(f"   Creative Model: {self.creative_model}")
+        print(f"   HTTP Pool: {self.http_max_connections} connections, {self.http_max_keepalive} keep-alive")
+        print(f"   Embedding Model: {self.embedding_model}")
+        if self._embeddings is not None and hasattr(self._embeddings, "stats"):
+            stats = self._embeddings.stats()
+            print(f"   Embedding Cache: {stats['hits']} hits / {stats['misses']} misses")
+        else:
+            print(f"   Embedding Cache: {'Enabled' if self.embedding_cache else 'Disabled'}")
+        if self._response_cache is not None:
+            stats = self._response_cache.stats()
+            print(f"   LLM Cache: {stats['hits']} hits ({stats['disk_hits']} from disk) / {stats['misses']} misses")
+        else:
+            print(f"   LLM Cache: {'Enabled' if self.llm_cache else 'Disabled'}")
+        if self._session_store is not None:
+            stats = self._session_store.stats()
+            if self.session_backend == "log":
+                print(f"   Sessions: {stats['sessions']} in {stats['segments']} log segments ({stats['loaded']} loaded)")
+            else:
+                print(f"   Sessions: {stats['in_memory']} in memory / {stats['on_disk']} on disk")
         print()
 
 # Global configuration instance
@@ -0,0 +1,214 @@
+"""
+LangChain Workshop Embedding Cache
+Persistent, content-addressed cache in front of the workshop embedding model.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite limits the number of bound parameters per statement
+_SQLITE_BATCH = 500
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several queries, in one model call where that gives the same vectors.
+
+    Embeddings that define ``embed_queries`` use it. HuggingFaceEmbeddings
+    without query-specific encode kwargs embed queries exactly like
+    documents, so the whole batch goes through one ``embed_documents``
+    forward pass. Any other model embeds the queries one by one.
+
+    Args:
+        embeddings: Embeddings model
+        texts: Queries
+
+    Returns:
+        One embedding per query, equal to ``embed_query`` of that query
+    """
+    if not texts:
+        return []
+    batch = getattr(embeddings, "embed_queries", None)
+    if batch is not None:
+        return batch(texts)
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:
+        HuggingFaceEmbeddings = None
+    if (HuggingFaceEmbeddings is not None and isinstance(embeddings, HuggingFaceEmbeddings)
+            and not getattr(embeddings, "query_encode_kwargs", None)):
+        return embeddings.embed_documents(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that stores document vectors in a local SQLite file.
+
+    Vectors are keyed by a hash of the model name plus the text, so unchanged
+    documents are never re-encoded across restarts or re-ingests. When the
+    cache grows past ``max_bytes`` the least recently used vectors are evicted.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache_path: str,
+                 max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            underlying: Embeddings model used for cache misses
+            model_name: Name of the underlying model (part of every cache key)
+            cache_path: Path of the SQLite cache file
+            max_bytes: Size limit for stored vectors before eviction kicks in
+        """
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+            "nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, bytes]:
+        found = {}
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            ).fetchall()
+            found.update(rows)
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+        return found
+
+    def _store(self, entries: Dict[str, bytes]) -> None:
+        now = time.time()
+        # Replaced rows must not be counted twice
+        existing = 0
+        keys = list(entries)
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            existing += self._conn.execute(
+                f"SELECT COALESCE(SUM(nbytes), 0) FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            ).fetchone()[0]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, nbytes, last_used) VALUES (?, ?, ?, ?)",
+            [(key, blob, len(blob), now) for key, blob in entries.items()],
+        )
+        self._total_bytes += sum(len(blob) for blob in entries.values()) - existing
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used vectors until the cache is back under 90% of its limit."""
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for key, nbytes in self._conn.execute(
+            "SELECT key, nbytes FROM embeddings ORDER BY last_used"
+        ):
+            if self._total_bytes <= target:
+                break
+            victims.append((key,))
+            self._total_bytes -= nbytes
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, encoding only texts that are not in the cache.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per input text, in input order
+        """
+        keys = [self._key(text) for text in texts]
+        with self._lock:
+            found = self._lookup(keys)
+
+            # Encode each missing text once, even if it repeats within the batch
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in missing:
+                    missing[key] = text
+            self.hits += len(texts) - sum(1 for key in keys if key in missing)
+            self.misses += sum(1 for key in keys if key in missing)
+
+            if missing:
+                vectors = self.underlying.embed_documents(list(missing.values()))
+                new_entries = {
+                    key: np.asarray(vector, dtype=np.float32).tobytes()
+                    for key, vector in zip(missing, vectors)
+                }
+                self._store(new_entries)
+                found.update(new_entries)
+            self._conn.commit()
+
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query. Queries are not cached here and go straight to the model."""
+        return self.underlying.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries with the underlying model, batched where possible."""
+        return embed_queries(self.underlying, texts)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of document lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current cache size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size_bytes": self._total_bytes,
+        }
+
+    def clear(self) -> None:
+        """Remove every cached vector and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
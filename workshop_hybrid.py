@@ -0,0 +1,227 @@
+"""
+LangChain Workshop Hybrid Retrieval
+BM25 keyword search next to FAISS, merged by reciprocal rank fusion.
+"""
+
+import asyncio
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import run_in_executor
+
+# Identifiers such as RecursiveCharacterTextSplitter or max_tokens stay single terms
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens used for both documents and queries."""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of texts, stored as compact posting lists.
+
+    Postings are kept per term in three flat arrays (CSR layout): ``offsets``
+    into ``postings`` (document positions, int32) and ``weights`` (float32).
+    Each weight is the term's full BM25 contribution for that document, so a
+    query only gathers the postings of its terms and sums them per document.
+    Saved arrays are plain .npy files that can be memory-mapped on load.
+    """
+
+    FILES = ("offsets", "postings", "weights")
+
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, postings: np.ndarray,
+                 weights: np.ndarray, size: int, k1: float = 1.5, b: float = 0.75):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.size = size
+        self.k1 = k1
+        self.b = b
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Index texts by position.
+
+        Args:
+            texts: Document texts; a text's position is its document id
+            k1: Term frequency saturation
+            b: Document length normalization
+
+        Returns:
+            BM25Index over the texts
+        """
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        frequencies: List[int] = []
+        lengths: List[int] = []
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            counts = Counter(tokens)
+            term_ids.extend(vocab.setdefault(term, len(vocab)) for term in counts)
+            doc_ids.extend([position] * len(counts))
+            frequencies.extend(counts.values())
+
+        size = len(lengths)
+        term_ids = np.array(term_ids, dtype=np.int64)
+        # Stable, so each posting list stays in document order
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=offsets[1:])
+        postings = np.array(doc_ids, dtype=np.int32)[order]
+        tf = np.array(frequencies, dtype=np.float64)[order]
+
+        df = np.diff(offsets)
+        idf = np.log1p((size - df + 0.5) / (df + 0.5))
+        lengths = np.array(lengths, dtype=np.float64)
+        average = lengths.mean() if size and lengths.mean() > 0 else 1.0
+        norm = k1 * (1 - b + b * lengths / average)
+        weights = np.repeat(idf, df) * tf * (k1 + 1) / (tf + norm[postings])
+        return cls(vocab, offsets, postings, weights.astype(np.float32), size, k1, b)
+
+    def search(self, query: str, k: int = 4,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top k documents for a query.
+
+        Args:
+            query: Query text; repeated terms count repeatedly, as in BM25
+            k: Number of results
+            allowed: Optional sorted positions the results are restricted to
+
+        Returns:
+            (scores, positions), best first; only documents sharing a term
+            with the query are returned
+        """
+        terms = [self.vocab[term] for term in tokenize(query) if term in self.vocab]
+        if not terms:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        postings = np.concatenate([self.postings[self.offsets[t]:self.offsets[t + 1]] for t in terms])
+        weights = np.concatenate([self.weights[self.offsets[t]:self.offsets[t + 1]] for t in terms])
+        if allowed is not None:
+            keep = np.isin(postings, allowed)
+            postings, weights = postings[keep], weights[keep]
+        if len(terms) == 1:
+            positions, scores = postings.astype(np.int64), weights
+        elif len(postings) * 8 < self.size:
+            # Few postings: sum per matched document instead of over every document
+            positions, inverse = np.unique(postings, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        else:
+            scores = np.bincount(postings, weights=weights, minlength=self.size).astype(np.float32)
+            positions = np.arange(self.size)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+            positions, scores = positions[top], scores[top]
+        # Documents without a query term score 0 in the dense accumulator
+        matched = scores > 0
+        positions, scores = positions[matched], scores[matched]
+        # Ties keep document order
+        order = np.lexsort((positions, -scores))
+        return scores[order], positions[order].astype(np.int64)
+
+    def save(self, folder_path: str) -> None:
+        """Write the index to a directory of .npy arrays and a JSON vocabulary."""
+        os.makedirs(folder_path, exist_ok=True)
+        for name in self.FILES:
+            np.save(os.path.join(folder_path, f"{name}.npy"), getattr(self, name))
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(folder_path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump({"size": self.size, "k1": self.k1, "b": self.b, "terms": terms}, f)
+
+    @classmethod
+    def load(cls, folder_path: str, mmap: bool = False) -> "BM25Index":
+        """Read an index written by save, memory-mapping the arrays if requested."""
+        with open(os.path.join(folder_path, "vocab.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(folder_path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in cls.FILES}
+        vocab = {term: i for i, term in enumerate(meta["terms"])}
+        return cls(vocab, size=meta["size"], k1=meta["k1"], b=meta["b"], **arrays)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Any]], k: int = 60) -> List[Tuple[Any, float]]:
+    """
+    Merge ranked lists by summing 1 / (k + rank) for every list an item is in.
+
+    Args:
+        rankings: Ranked lists of hashable items, best first
+        k: Rank smoothing constant; 60 as in the original RRF paper
+
+    Returns:
+        (item, fused score) pairs, best first; ties keep first-seen order
+    """
+    fused: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda pair: pair[1], reverse=True)
+
+
+# Keyword searches run here while the calling thread embeds the query and searches FAISS
+_keyword_executor = ThreadPoolExecutor(thread_name_prefix="bm25")
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever that runs FAISS and BM25 searches concurrently and fuses them.
+
+    Each side returns its top ``fetch_k`` positions in the store; the
+    lists are merged by reciprocal rank fusion and the best ``k``
+    documents returned. A metadata ``filter`` restricts both sides.
+    """
+
+    vector_store: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    filter: Optional[Any] = None
+
+    def _dense(self, query: str) -> List[int]:
+        embedding = self.vector_store._embed_query(query)
+        _, positions = self.vector_store.search_positions(embedding, self.fetch_k, filter=self.filter)
+        return [int(i) for i in positions[0] if i != -1]
+
+    def _keyword(self, query: str) -> List[int]:
+        store = self.vector_store
+        allowed = None
+        if self.filter is not None:
+            allowed = store.metadata_index().resolve(self.filter)
+            if allowed is None:
+                # Filters the metadata index cannot resolve (callables) are checked against every live document
+                filter_func = store._create_filter_func(self.filter)
+                allowed = np.array([i for i in sorted(store.index_to_docstore_id) if i not in store._deleted
+                                    and filter_func(store._document(i).metadata)], dtype=np.int64)
+        _, positions = store.keyword_index().search(query, self.fetch_k, allowed=allowed)
+        return positions.tolist()
+
+    def _fuse(self, dense: List[int], keyword: List[int]) -> List[Document]:
+        fused = reciprocal_rank_fusion([dense, keyword], k=self.rrf_k)
+        return [self.vector_store._document(i) for i, _ in fused[:self.k]]
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        keyword = _keyword_executor.submit(self._keyword, query)
+        dense = self._dense(query)
+        return self._fuse(dense, keyword.result())
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: Any) -> List[Document]:
+        dense, keyword = await asyncio.gather(run_in_executor(None, self._dense, query),
+                                              run_in_executor(None, self._keyword, query))
+        return self._fuse(dense, keyword)
@@ -0,0 +1,234 @@
+"""
+LangChain Workshop Ingestion
+Streams files into chunks and embeds them into FAISS in bounded batches.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from workshop_memory import count_tokens
+from workshop_splitters import StreamingTextSplitter
+
+# Splitter configurations used in Task 6
+SPLITTER_CONFIGS = {
+    "text": {"chunk_size": 200, "chunk_overlap": 50, "separators": ["\n\n", "\n", " ", ""]},
+    "code": {"chunk_size": 100, "chunk_overlap": 20, "separators": ["\n\n", "\n", " ", ""]},
+    "markdown": {"chunk_size": 150, "chunk_overlap": 30, "separators": ["## ", "# ", "\n\n", "\n", " ", ""]},
+}
+
+# File extension -> splitter configuration when splitter="auto"
+EXTENSION_SPLITTERS = {
+    ".txt": "text",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".py": "code",
+    ".js": "code",
+    ".ts": "code",
+    ".java": "code",
+}
+
+
+@lru_cache(maxsize=None)
+def make_splitter(name: str = "text") -> StreamingTextSplitter:
+    """
+    Get the splitter for a named configuration.
+
+    StreamingTextSplitter is a RecursiveCharacterTextSplitter that can also
+    split files through mmap without reading them into memory.
+
+    Args:
+        name: Key of SPLITTER_CONFIGS
+
+    Returns:
+        Shared splitter instance
+    """
+    return StreamingTextSplitter(**SPLITTER_CONFIGS[name])
+
+
+def splitter_for(path: str, splitter: str = "auto") -> str:
+    """Resolve the splitter configuration name for a file."""
+    if splitter != "auto":
+        return splitter
+    return EXTENSION_SPLITTERS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def iter_files(paths: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Yield the files under the given files and directories, in sorted order.
+
+    Only extensions listed in EXTENSION_SPLITTERS are picked up from directories.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in EXTENSION_SPLITTERS:
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def iter_load_and_split(path: str, splitter: str = "auto") -> Iterator[Document]:
+    """
+    Lazily split one file into chunk documents.
+
+    The file is memory-mapped and chunks are produced one at a time, so
+    only the chunk being built is ever decoded.
+
+    Args:
+        path: File to read
+        splitter: SPLITTER_CONFIGS name, or "auto" to choose by extension
+
+    Yields:
+        Chunk documents with source, chunk and tokens metadata
+    """
+    chunks = make_splitter(splitter_for(path, splitter)).iter_split_file(path)
+    for i, chunk in enumerate(chunks):
+        # Token counts are taken once here so context packing never re-tokenizes chunks
+        yield Document(page_content=chunk, metadata={"source": path, "chunk": i, "tokens": count_tokens(chunk)})
+
+
+def load_and_split(path: str, splitter: str = "auto") -> List[Document]:
+    """
+    Split one file into a list of chunk documents.
+
+    Runs in the ingestion worker processes for files up to
+    ``STREAM_FILE_BYTES``.
+
+    Args:
+        path: File to read
+        splitter: SPLITTER_CONFIGS name, or "auto" to choose by extension
+
+    Returns:
+        Chunk documents with source, chunk and tokens metadata
+    """
+    return list(iter_load_and_split(path, splitter))
+
+
+# Files larger than this are split lazily in the ingesting process instead of
+# being split whole in a worker and sent back as one list
+STREAM_FILE_BYTES = 8 * 1024 * 1024
+
+
+def iter_chunks(paths: Union[str, Iterable[str]], splitter: str = "auto", workers: int = 0,
+                stream_bytes: int = STREAM_FILE_BYTES) -> Iterator[Iterator[Document]]:
+    """
+    Stream the chunks of every file, one iterator per file, in file order.
+
+    Files up to ``stream_bytes`` are split across a process pool with at most
+    ``2 * workers`` files in flight. Larger files are split lazily in this
+    process when their turn comes, so no file is ever held as a whole list
+    of chunks however big it is. Each iterator must be consumed before the
+    next one is requested.
+
+    Args:
+        paths: Files and/or directories
+        splitter: SPLITTER_CONFIGS name, or "auto" to choose by extension
+        workers: Worker processes; 0 uses every CPU, 1 splits in this process
+        stream_bytes: Size above which a file is split lazily in this process
+    """
+    files = iter_files(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in files:
+            yield iter_load_and_split(path, splitter)
+        return
+
+    def chunks(pending) -> Iterator[Document]:
+        if isinstance(pending, str):
+            return iter_load_and_split(pending, splitter)
+        return iter(pending.result())
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for path in files:
+            # Large files stay queued as a path and are split here, in order
+            in_flight.append(path if os.path.getsize(path) > stream_bytes
+                             else pool.submit(load_and_split, path, splitter))
+            if len(in_flight) >= 2 * workers:
+                yield chunks(in_flight.popleft())
+        while in_flight:
+            yield chunks(in_flight.popleft())
+
+
+def ingest(paths: Union[str, Iterable[str]], embeddings: Embeddings, vector_store=None,
+           splitter: str = "auto", batch_size: int = 64, workers: int = 0,
+           index_type: Optional[str] = None) -> Tuple[object, Dict[str, float]]:
+    """
+    Chunk, embed and index files into a FAISS store in fixed-size batches.
+
+    Splitting runs in worker processes while this process embeds (files
+    over ``STREAM_FILE_BYTES`` are split lazily here instead), and each
+    batch of ``batch_size`` chunks is appended to the store as soon as it is
+    embedded, so only one batch of vectors is held at a time.
+
+    Args:
+        paths: Files and/or directories to ingest
+        embeddings: Embeddings model
+        vector_store: Existing WorkshopFAISS store to append to, or None to create one
+        splitter: SPLITTER_CONFIGS name, or "auto" to choose by extension
+        batch_size: Chunks embedded and added per batch
+        workers: Worker processes; 0 uses every CPU, 1 splits in this process
+        index_type: Index type of a newly created store (FAISS_INDEX_TYPE)
+
+    Returns:
+        (vector_store, stats) where stats has docs, chunks, embeddings, seconds,
+        docs_per_sec, chunks_per_sec and embeddings_per_sec
+    """
+    from workshop_config import config
+    from workshop_vectorstore import WorkshopFAISS
+
+    stats = {"docs": 0, "chunks": 0, "embeddings": 0, "seconds": 0.0, "embed_seconds": 0.0}
+    start = time.perf_counter()
+    created = vector_store is None
+    batch: List[Document] = []
+
+    def flush():
+        nonlocal vector_store
+        texts = [doc.page_content for doc in batch]
+        embed_start = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        stats["embed_seconds"] += time.perf_counter() - embed_start
+        text_embeddings = list(zip(texts, vectors))
+        metadatas = [doc.metadata for doc in batch]
+        if vector_store is None:
+            vector_store = WorkshopFAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas)
+        else:
+            vector_store.add_embeddings(text_embeddings, metadatas=metadatas)
+        stats["embeddings"] += len(batch)
+        batch.clear()
+
+    for chunks in iter_chunks(paths, splitter, workers):
+        stats["docs"] += 1
+        for chunk in chunks:
+            stats["chunks"] += 1
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    if created and vector_store is not None:
+        vector_store.reindex(index_type or config.faiss_index_type)
+
+    seconds = time.perf_counter() - start
+    stats["seconds"] = seconds
+    stats["docs_per_sec"] = stats["docs"] / seconds if seconds else 0.0
+    stats["chunks_per_sec"] = stats["chunks"] / seconds if seconds else 0.0
+    stats["embeddings_per_sec"] = stats["embeddings"] / stats["embed_seconds"] if stats["embed_seconds"] else 0.0
+    return vector_store, stats
+
+
+def print_ingest_stats(stats: Dict[str, float]) -> None:
+    """Print ingestion throughput."""
+    print(f"📥 Ingested {stats['docs']} docs -> {stats['chunks']} chunks in {stats['seconds']:.2f}s")
+    print(f"   {stats['docs_per_sec']:.1f} docs/s, {stats['chunks_per_sec']:.1f} chunks/s, "
+          f"{stats['embeddings_per_sec']:.1f} embeddings/s")
@@ -0,0 +1,927 @@
+"""
+LangChain Workshop Memory
+Chat session storage, history trimming and memory strategies shared by Task 5 and Task 7.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    message_to_dict,
+    messages_from_dict,
+    messages_to_dict,
+    trim_messages,
+)
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+
+class SessionHistory(BaseChatMessageHistory):
+    """
+    Chat history handle for one session in a SessionStore.
+
+    The handle holds no messages itself; reads and writes go to the store,
+    so a handle stays valid after its session is spilled to disk.
+    """
+
+    def __init__(self, store: "SessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.store.get_messages(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.store.add_messages(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.store.clear(self.session_id)
+
+
+class _Shard:
+    __slots__ = ("lock", "sessions")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # session_id -> (messages, last_used), least recently used first
+        self.sessions: "OrderedDict[str, list]" = OrderedDict()
+
+
+class SessionStore:
+    """
+    Bounded in-memory chat session store with SQLite spill.
+
+    Sessions are spread over ``shards`` independently locked LRU maps, so
+    concurrent users rarely contend. A shard spills its least recently used
+    sessions to SQLite once it holds more than its share of
+    ``max_sessions``, and sessions idle for longer than ``idle_ttl``
+    seconds are spilled whenever their shard is next touched. Spilled
+    sessions are reloaded transparently on their next read or write.
+    """
+
+    def __init__(self, path: str, max_sessions: int = 1000, idle_ttl: float = 1800.0, shards: int = 16):
+        """
+        Args:
+            path: Path of the SQLite file cold sessions are spilled to
+            max_sessions: Maximum number of sessions kept in memory
+            idle_ttl: Seconds of inactivity after which a session is spilled
+            shards: Number of independently locked session maps
+        """
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.spills = 0
+        self.reloads = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._shard_capacity = max(1, -(-max_sessions // len(self._shards)))
+        self._disk_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, messages BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_session_history(self, session_id: str) -> SessionHistory:
+        """History factory for RunnableWithMessageHistory."""
+        return SessionHistory(self, session_id)
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[zlib.crc32(session_id.encode("utf-8")) % len(self._shards)]
+
+    def _spill(self, session_id: str, messages: List[BaseMessage]) -> None:
+        payload = zlib.compress(json.dumps(messages_to_dict(messages)).encode("utf-8"))
+        with self._disk_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, messages, updated) VALUES (?, ?, ?)",
+                (session_id, payload, time.time()),
+            )
+            self._conn.commit()
+        self.spills += 1
+
+    def _reload(self, session_id: str) -> List[BaseMessage]:
+        with self._disk_lock:
+            row = self._conn.execute(
+                "SELECT messages FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return []
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+        self.reloads += 1
+        return messages_from_dict(json.loads(zlib.decompress(row[0]).decode("utf-8")))
+
+    def _evict(self, shard: _Shard, now: float) -> None:
+        cutoff = now - self.idle_ttl
+        while shard.sessions:
+            session_id, entry = next(iter(shard.sessions.items()))
+            if len(shard.sessions) <= self._shard_capacity and entry[1] >= cutoff:
+                break
+            del shard.sessions[session_id]
+            if entry[0]:
+                self._spill(session_id, entry[0])
+
+    def _entry(self, shard: _Shard, session_id: str) -> list:
+        # Caller holds shard.lock
+        now = time.monotonic()
+        entry = shard.sessions.get(session_id)
+        if entry is None:
+            entry = [self._reload(session_id), now]
+            shard.sessions[session_id] = entry
+        else:
+            entry[1] = now
+            shard.sessions.move_to_end(session_id)
+        self._evict(shard, now)
+        return entry
+
+    def get_messages(self, session_id: str) -> List[BaseMessage]:
+        """Return a copy of a session's messages, reloading it from disk if needed."""
+        shard = self._shard(session_id)
+        with shard.lock:
+            return list(self._entry(shard, session_id)[0])
+
+    def add_messages(self, session_id: str, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to a session, reloading it from disk if needed."""
+        shard = self._shard(session_id)
+        with shard.lock:
+            self._entry(shard, session_id)[0].extend(messages)
+
+    def clear(self, session_id: str) -> None:
+        """Delete a session from memory and disk."""
+        shard = self._shard(session_id)
+        with shard.lock:
+            shard.sessions.pop(session_id, None)
+            with self._disk_lock:
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._conn.commit()
+
+    def __len__(self) -> int:
+        return sum(len(shard.sessions) for shard in self._shards)
+
+    def stats(self) -> Dict[str, int]:
+        """Return in-memory and spilled session counts and spill/reload counters."""
+        with self._disk_lock:
+            on_disk = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "in_memory": len(self),
+            "on_disk": on_disk,
+            "spills": self.spills,
+            "reloads": self.reloads,
+        }
+
+
+# Tokens OpenAI chat models add per message for role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken missing or its vocabulary could not be downloaded
+        return None
+
+
+@lru_cache(maxsize=16384)
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in a text with the local cl100k tokenizer.
+
+    Falls back to an estimate of four characters per token when the
+    tokenizer is unavailable. Results are cached per text, so history
+    messages are only tokenized once.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    """Count the tokens a message occupies in a chat prompt."""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+class HistoryTrimmer:
+    """
+    Fits conversation history into a token budget before it reaches the prompt.
+
+    The budget is the model context size minus the tokens reserved for the
+    reply (``max_tokens``) and the rest of the prompt. System messages in
+    the history are kept, followed by as many of the most recent turns as
+    fit, starting on a human message. If a ``summarizer`` model is given,
+    the dropped older turns are replaced by a short summary message.
+    """
+
+    def __init__(self, context_tokens: int, max_tokens: int, prompt_reserve: int = 256,
+                 summarizer=None, summary_tokens: int = 256):
+        """
+        Args:
+            context_tokens: Context window size of the model
+            max_tokens: Tokens reserved for the model's reply
+            prompt_reserve: Tokens reserved for the system prompt and template text
+            summarizer: Optional chat model used to summarize dropped turns
+            summary_tokens: Tokens reserved for the summary when summarizer is set
+        """
+        self.context_tokens = context_tokens
+        self.max_tokens = max_tokens
+        self.prompt_reserve = prompt_reserve
+        self.summarizer = summarizer
+        self.summary_tokens = summary_tokens
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def budget(self, input_text: str = "") -> int:
+        """Tokens available for history alongside the given user input."""
+        budget = self.context_tokens - self.max_tokens - self.prompt_reserve - count_tokens(input_text)
+        if self.summarizer is not None:
+            budget -= self.summary_tokens
+        return max(0, budget)
+
+    def _summary(self, dropped: List[BaseMessage]) -> str:
+        key = hashlib.sha256(
+            "\0".join(f"{message.type}:{message.content}" for message in dropped).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            if key in self._summaries:
+                self._summaries.move_to_end(key)
+                return self._summaries[key]
+
+        lines = "\n".join(f"{message.type}: {message.content}" for message in dropped)
+        summary = self.summarizer.invoke(
+            "Summarize the key facts from this earlier part of a conversation in a few sentences:\n\n" + lines
+        ).content
+
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > 256:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def trim(self, messages: Sequence[BaseMessage], input_text: str = "") -> List[BaseMessage]:
+        """
+        Trim history to the budget.
+
+        Args:
+            messages: Full conversation history
+            input_text: Current user input, counted against the budget
+
+        Returns:
+            Messages to inject into the prompt
+        """
+        messages = list(messages)
+        budget = self.budget(input_text)
+        if sum(count_message_tokens(message) for message in messages) <= budget:
+            return messages
+
+        kept = trim_messages(
+            messages,
+            max_tokens=budget,
+            token_counter=count_message_tokens,
+            strategy="last",
+            include_system=True,
+            start_on="human",
+        )
+        if self.summarizer is None:
+            return kept
+
+        kept_ids = {id(message) for message in kept}
+        dropped = [message for message in messages if id(message) not in kept_ids]
+        if not dropped:
+            return kept
+        summary = SystemMessage(content=f"Summary of the earlier conversation: {self._summary(dropped)}")
+        system = [message for message in kept if isinstance(message, SystemMessage)]
+        return system + [summary] + [message for message in kept if not isinstance(message, SystemMessage)]
+
+    def __call__(self, inputs: Dict[str, Any]) -> List[BaseMessage]:
+        """Trim inputs["history"] for use in RunnablePassthrough.assign(history=...)."""
+        return self.trim(inputs.get("history", []), inputs.get("input", ""))
+
+
+# One background worker summarizes for every ConversationSummaryMemory
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+
+
+class _NotifyingHistory(BaseChatMessageHistory):
+    """In-memory chat history that calls back after messages are added."""
+
+    def __init__(self, on_add: Callable[[], None]):
+        self._messages: List[BaseMessage] = []
+        self._on_add = on_add
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return list(self._messages)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self._messages.extend(messages)
+        self._on_add()
+
+    def clear(self) -> None:
+        self._messages = []
+
+
+class ConversationSummaryMemory:
+    """
+    Running conversation summary, updated incrementally in the background.
+
+    A watermark records how many messages are already folded into the
+    summary. When at least ``summarize_every`` new messages arrive, only
+    those lines and the current summary are sent to the LLM, on a
+    background worker, so adding a message never waits for the model.
+    """
+
+    def __init__(self, llm, return_messages: bool = True, summarize_every: int = 2):
+        """
+        Args:
+            llm: Chat model that writes the summary
+            return_messages: Return memory as messages instead of a string
+            summarize_every: Number of new messages that triggers a summary update
+        """
+        self.llm = llm
+        self.return_messages = return_messages
+        self.summarize_every = summarize_every
+        self.summary = ""
+        self.chat_memory = _NotifyingHistory(self._on_add)
+        self.summary_prompt = ChatPromptTemplate.from_template(
+            "Progressively summarize the lines of conversation provided, "
+            "adding onto the previous summary returning a new summary.\n\n"
+            "Current summary:\n{summary}\n\n"
+            "New lines of conversation:\n{new_lines}\n\n"
+            "New summary:"
+        )
+        self._watermark = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+
+    def predict_new_summary(self, messages: Sequence[BaseMessage], existing_summary: str) -> str:
+        """Fold the given messages into an existing summary."""
+        conversation_text = "\n".join([
+            f"{'Human' if isinstance(msg, HumanMessage) else 'AI'}: {msg.content}"
+            for msg in messages
+        ])
+        chain = self.summary_prompt | self.llm | StrOutputParser()
+        return chain.invoke({
+            "summary": existing_summary,
+            "new_lines": conversation_text
+        })
+
+    @property
+    def pending_messages(self) -> int:
+        """Number of messages not yet folded into the summary."""
+        return len(self.chat_memory._messages) - self._watermark
+
+    def _on_add(self) -> None:
+        with self._lock:
+            if self.pending_messages < self.summarize_every:
+                return
+            if self._future is None or self._future.done():
+                self._future = _summary_executor.submit(self._summarize_pending)
+
+    def _summarize_pending(self) -> None:
+        # Keep going until messages added during a summary call are folded in too
+        while True:
+            with self._lock:
+                new_messages = self.chat_memory._messages[self._watermark:]
+                if not new_messages:
+                    return
+                summary = self.summary
+                generation = self._generation
+            try:
+                summary = self.predict_new_summary(new_messages, summary)
+            except Exception as e:
+                print(f"⚠️ Summary update failed: {e}")
+                return
+            with self._lock:
+                if generation != self._generation:
+                    # Memory was cleared while the LLM was summarizing
+                    continue
+                self.summary = summary
+                self._watermark += len(new_messages)
+
+    def flush(self, timeout: Optional[float] = None) -> str:
+        """
+        Summarize any pending messages and wait for the summary to catch up.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The current summary
+        """
+        with self._lock:
+            if self.pending_messages and (self._future is None or self._future.done()):
+                self._future = _summary_executor.submit(self._summarize_pending)
+            future = self._future
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.summary
+
+    def load_memory_variables(self, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Return the summary plus the messages not yet summarized.
+
+        Never waits for a running summary update.
+        """
+        with self._lock:
+            summary = self.summary
+            pending = self.chat_memory._messages[self._watermark:]
+        if self.return_messages:
+            history = [SystemMessage(content=summary)] if summary else []
+            return {"history": history + pending}
+        lines = [f"{message.type}: {message.content}" for message in pending]
+        return {"history": "\n".join(([summary] if summary else []) + lines)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.chat_memory.clear()
+            self.summary = ""
+            self._watermark = 0
+            self._generation += 1
+
+
+_MESSAGE_CLASSES = {"human": HumanMessage, "ai": AIMessage, "system": SystemMessage}
+
+
+class _WindowRecord:
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role, content, tokens):
+        self.role = role
+        self.content = content
+        self.tokens = tokens
+
+
+class WindowMemory:
+    """
+    Sliding window over the last ``k`` messages, optionally capped by tokens.
+
+    Without ``max_tokens`` the messages themselves sit in a ``deque(maxlen=k)``,
+    so an append is a single O(1) push with nothing re-sliced. With
+    ``max_tokens`` set, each message is stored as a slotted record holding an
+    interned role tag, the content string and its token count, turned back
+    into a LangChain message only when read, and the oldest messages are also
+    dropped once the window exceeds that many tokens.
+    """
+
+    __slots__ = ("k", "max_tokens", "_records", "_tokens")
+
+    def __init__(self, k: Optional[int] = 4, max_tokens: Optional[int] = None):
+        """
+        Args:
+            k: Maximum number of messages kept, or None for a token-only window
+            max_tokens: Maximum number of tokens kept, or None for a message-only window
+        """
+        self.k = k
+        self.max_tokens = max_tokens
+        # A message-only window lets the deque drop the oldest message itself
+        self._records = deque(maxlen=k if max_tokens is None else None)
+        self._tokens = 0
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append a message, dropping the oldest ones that fall out of the window."""
+        if self.max_tokens is None:
+            self._records.append(message)
+            return
+
+        if message.type in _MESSAGE_CLASSES and isinstance(message.content, str) and not message.additional_kwargs:
+            record = _WindowRecord(sys.intern(message.type), message.content, count_message_tokens(message))
+        else:
+            # Tool calls, multimodal content etc. are kept as the message itself
+            record = _WindowRecord(None, message, count_message_tokens(message))
+        self._tokens += record.tokens
+
+        records = self._records
+        records.append(record)
+        while (self.k is not None and len(records) > self.k) or \
+                (self._tokens > self.max_tokens and len(records) > 1):
+            self._tokens -= records.popleft().tokens
+
+    def get_messages(self) -> List[BaseMessage]:
+        """Return the window as LangChain messages."""
+        if self.max_tokens is None:
+            return list(self._records)
+        return [
+            record.content if record.role is None else _MESSAGE_CLASSES[record.role](content=record.content)
+            for record in self._records
+        ]
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.get_messages()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._tokens = 0
+
+
+class VectorMemory:
+    """
+    Long-term memory that recalls relevant past turns by embedding similarity.
+
+    The most recent ``window`` messages are always returned. Older
+    human/AI turns are embedded in batches as they leave the window and
+    kept in a per-session FAISS inner-product index; for each new input
+    only the ``k`` most similar past turns are returned alongside the
+    window. Prompt size therefore stays bounded however long the session
+    runs, and no summarization call is needed.
+    """
+
+    def __init__(self, embeddings, k: int = 3, window: int = 4):
+        """
+        Args:
+            embeddings: Embeddings model used for past turns and queries
+            k: Number of relevant past turns to recall
+            window: Number of recent messages always included
+        """
+        self.embeddings = embeddings
+        self.k = k
+        self.recent = WindowMemory(k=window)
+        self._turns: List[List[BaseMessage]] = []
+        self._message_count = 0
+        self._index = None
+        self._indexed = 0
+        self._indexed_messages = 0
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append a message; a human message starts a new turn."""
+        if message.type == "human" or not self._turns:
+            self._turns.append([message])
+        else:
+            self._turns[-1].append(message)
+        self._message_count += 1
+        self.recent.add_message(message)
+
+    def _index_pending(self) -> None:
+        # Index the turns whose messages have all left the recent window
+        window_start = self._message_count - len(self.recent)
+        ready, end = self._indexed, self._indexed_messages
+        while ready < len(self._turns) and end + len(self._turns[ready]) <= window_start:
+            end += len(self._turns[ready])
+            ready += 1
+        if ready == self._indexed:
+            return
+
+        texts = [
+            "\n".join(f"{message.type}: {message.content}" for message in turn)
+            for turn in self._turns[self._indexed:ready]
+        ]
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        if self._index is None:
+            import faiss
+
+            self._index = faiss.IndexFlatIP(vectors.shape[1])
+        # Normalized vectors make inner product equal to cosine similarity
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        self._index.add(vectors)
+        self._indexed, self._indexed_messages = ready, end
+
+    def relevant_turns(self, query: str) -> List[List[BaseMessage]]:
+        """Return up to k past turns most similar to the query, oldest first."""
+        self._index_pending()
+        if self._index is None or not self._index.ntotal or not query:
+            return []
+        vector = np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        _, ids = self._index.search(vector, min(self.k, self._index.ntotal))
+        return [self._turns[i] for i in sorted(int(i) for i in ids[0] if i >= 0)]
+
+    def get_messages(self, query: Optional[str] = None) -> List[BaseMessage]:
+        """Return the relevant past turns for query (if given) followed by the recent window."""
+        recalled = [message for turn in self.relevant_turns(query) for message in turn] if query else []
+        return recalled + self.recent.get_messages()
+
+    def load_memory_variables(self, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return {"history": messages} for the current input."""
+        return {"history": self.get_messages((inputs or {}).get("input"))}
+
+    def __len__(self) -> int:
+        return self._message_count
+
+    def clear(self) -> None:
+        self.recent.clear()
+        self._turns = []
+        self._message_count = 0
+        self._index = None
+        self._indexed = 0
+        self._indexed_messages = 0
+
+
+# Record header: body length, CRC32 of session id + body, session id length.
+# A record with an empty body marks the session as cleared.
+_LOG_HEADER = struct.Struct("<IIH")
+
+
+class LogChatMessageHistory(BaseChatMessageHistory):
+    """Chat history for one session, persisted in a MessageLog."""
+
+    def __init__(self, log: "MessageLog", session_id: str):
+        self.log = log
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.log.get_messages(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.log.add_messages(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.log.clear(self.session_id)
+
+
+class MessageLog:
+    """
+    Persistent chat history for many sessions in a segmented append-only log.
+
+    Every message is appended as a length-prefixed, checksummed record to
+    the active segment, which rolls over after ``segment_bytes``. Startup
+    scans record headers only, to rebuild the session -> record offsets
+    index, and a session's messages are read and checksummed on first
+    access (at most ``max_loaded`` sessions stay loaded). A torn record at
+    the end of the active segment, e.g. after a crash, is truncated away.
+
+    Sealed segments are compacted when cleared sessions make up more than
+    ``compact_ratio`` of their bytes. Compacted output is written to a
+    temporary file and renamed into place; segment file names carry the
+    range of segments they replace, so a crash at any point leaves either
+    the old segments or the compacted one in effect.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024,
+                 compact_ratio: float = 0.5, max_loaded: int = 1000, fsync: bool = False):
+        """
+        Args:
+            directory: Directory holding the log segments
+            segment_bytes: Size after which a new segment is started
+            compact_ratio: Fraction of dead bytes in sealed segments that triggers compaction
+            max_loaded: Number of sessions whose messages are kept in memory
+            fsync: fsync after every append (survives power loss, not just process crashes)
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compact_ratio = compact_ratio
+        self.max_loaded = max_loaded
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._loaded: "OrderedDict[str, List[BaseMessage]]" = OrderedDict()
+        self._active = None
+        self._open()
+
+    def get_session_history(self, session_id: str) -> LogChatMessageHistory:
+        """History factory for RunnableWithMessageHistory."""
+        return LogChatMessageHistory(self, session_id)
+
+    # Segments
+
+    def _segment_path(self, first: int, last: int) -> str:
+        return os.path.join(self.directory, f"{first:08d}-{last:08d}.log")
+
+    def _list_segments(self) -> List[tuple]:
+        segments = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # Unfinished compaction output
+                os.remove(path)
+            elif name.endswith(".log"):
+                first, last = (int(part) for part in name[:-4].split("-"))
+                segments.append((first, last))
+
+        # A segment covered by a wider (compacted) one is left over from a crash after compaction
+        segments.sort(key=lambda segment: (segment[0], -segment[1]))
+        kept = []
+        for first, last in segments:
+            if kept and last <= kept[-1][1]:
+                os.remove(self._segment_path(first, last))
+            else:
+                kept.append((first, last))
+        return kept
+
+    def _scan(self, segment: tuple, truncate: bool) -> None:
+        path = self._segment_path(*segment)
+        size = os.path.getsize(path)
+        offset = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_LOG_HEADER.size)
+                if len(header) < _LOG_HEADER.size:
+                    break
+                body_len, crc, sid_len = _LOG_HEADER.unpack(header)
+                end = offset + _LOG_HEADER.size + sid_len + body_len
+                if end > size:
+                    break
+                session_id = f.read(sid_len).decode("utf-8")
+                f.seek(body_len, os.SEEK_CUR)
+                self._index_record(session_id, segment, offset + _LOG_HEADER.size + sid_len, body_len, crc, end - offset)
+                offset = end
+        self._segment_sizes[segment] = offset
+        if offset < size:
+            if truncate:
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+            print(f"⚠️ Dropped {size - offset} bytes of incomplete records from {os.path.basename(path)}")
+
+    def _index_record(self, session_id: str, segment: tuple, body_offset: int, body_len: int,
+                      crc: int, record_len: int) -> None:
+        records = self._index.setdefault(session_id, [])
+        if body_len:
+            records.append((segment, body_offset, body_len, crc, record_len))
+        else:
+            # Cleared: everything before this marker is dead
+            for record in records:
+                self._dead_bytes[record[0]] = self._dead_bytes.get(record[0], 0) + record[4]
+            self._dead_bytes[segment] = self._dead_bytes.get(segment, 0) + record_len
+            records.clear()
+
+    def _open(self) -> None:
+        self._index: Dict[str, list] = {}
+        self._segment_sizes: Dict[tuple, int] = {}
+        self._dead_bytes: Dict[tuple, int] = {}
+        segments = self._list_segments()
+        for i, segment in enumerate(segments):
+            self._scan(segment, truncate=i == len(segments) - 1)
+        if segments:
+            self._active_segment = segments[-1]
+        else:
+            self._active_segment = (1, 1)
+            self._segment_sizes[self._active_segment] = 0
+        self._active = open(self._segment_path(*self._active_segment), "ab")
+
+    def _roll(self) -> None:
+        self._active.close()
+        number = self._active_segment[1] + 1
+        self._active_segment = (number, number)
+        self._segment_sizes[self._active_segment] = 0
+        self._active = open(self._segment_path(number, number), "ab")
+
+        sealed = [segment for segment in self._segment_sizes if segment != self._active_segment]
+        total = sum(self._segment_sizes[segment] for segment in sealed)
+        dead = sum(self._dead_bytes.get(segment, 0) for segment in sealed)
+        if total and dead / total >= self.compact_ratio:
+            self._compact(sealed)
+
+    # Records
+
+    def _append(self, session_id: str, body: bytes) -> None:
+        sid = session_id.encode("utf-8")
+        crc = zlib.crc32(body, zlib.crc32(sid))
+        record = _LOG_HEADER.pack(len(body), crc, len(sid)) + sid + body
+        offset = self._segment_sizes[self._active_segment]
+        self._active.write(record)
+        self._active.flush()
+        if self.fsync:
+            os.fsync(self._active.fileno())
+        self._segment_sizes[self._active_segment] = offset + len(record)
+        self._index_record(session_id, self._active_segment, offset + _LOG_HEADER.size + len(sid),
+                           len(body), crc, len(record))
+        if self._segment_sizes[self._active_segment] >= self.segment_bytes:
+            self._roll()
+
+    def _read(self, session_id: str) -> List[BaseMessage]:
+        sid = session_id.encode("utf-8")
+        message_dicts = []
+        handles = {}
+        try:
+            for segment, body_offset, body_len, crc, _ in self._index.get(session_id, []):
+                if segment not in handles:
+                    handles[segment] = open(self._segment_path(*segment), "rb")
+                f = handles[segment]
+                f.seek(body_offset)
+                body = f.read(body_len)
+                if zlib.crc32(body, zlib.crc32(sid)) != crc:
+                    print(f"⚠️ Skipping corrupt message record for session {session_id}")
+                    continue
+                message_dicts.append(json.loads(body))
+        finally:
+            for f in handles.values():
+                f.close()
+        return messages_from_dict(message_dicts)
+
+    def _messages(self, session_id: str) -> List[BaseMessage]:
+        # Caller holds self._lock
+        messages = self._loaded.get(session_id)
+        if messages is None:
+            messages = self._read(session_id)
+            self._loaded[session_id] = messages
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        else:
+            self._loaded.move_to_end(session_id)
+        return messages
+
+    def get_messages(self, session_id: str) -> List[BaseMessage]:
+        """Return a session's messages, reading them from the log on first access."""
+        with self._lock:
+            return list(self._messages(session_id))
+
+    def add_messages(self, session_id: str, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to a session."""
+        with self._lock:
+            loaded = self._loaded.get(session_id)
+            for message in messages:
+                self._append(session_id, json.dumps(message_to_dict(message)).encode("utf-8"))
+            if loaded is not None:
+                loaded.extend(messages)
+
+    def clear(self, session_id: str) -> None:
+        """Delete a session's messages."""
+        with self._lock:
+            if self._index.get(session_id):
+                self._append(session_id, b"")
+            self._loaded.pop(session_id, None)
+
+    # Compaction
+
+    def _compact(self, segments: List[tuple]) -> None:
+        # Caller holds self._lock; segments are every sealed segment, oldest first
+        segments = sorted(segments)
+        first, last = segments[0][0], segments[-1][1]
+        path = self._segment_path(first, last)
+        tmp_path = path + ".tmp"
+        handles = {segment: open(self._segment_path(*segment), "rb") for segment in segments}
+        try:
+            with open(tmp_path, "wb") as out:
+                for session_id, records in self._index.items():
+                    sid = session_id.encode("utf-8")
+                    for segment, body_offset, body_len, crc, _ in records:
+                        if segment not in handles:
+                            continue
+                        f = handles[segment]
+                        f.seek(body_offset)
+                        out.write(_LOG_HEADER.pack(body_len, crc, len(sid)) + sid + f.read(body_len))
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            for f in handles.values():
+                f.close()
+
+        # The rename is the commit point; narrower segments are ignored from here on
+        os.replace(tmp_path, path)
+        for segment in segments:
+            if segment != (first, last):
+                os.remove(self._segment_path(*segment))
+        self._rescan()
+
+    def _rescan(self) -> None:
+        self._index = {}
+        self._segment_sizes = {}
+        self._dead_bytes = {}
+        for segment in self._list_segments():
+            self._scan(segment, truncate=False)
+
+    def compact(self) -> None:
+        """Compact every sealed segment now."""
+        with self._lock:
+            sealed = [segment for segment in self._segment_sizes if segment != self._active_segment]
+            if sealed:
+                self._compact(sealed)
+
+    def close(self) -> None:
+        with self._lock:
+            self._active.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Return session, segment and byte counts."""
+        with self._lock:
+            return {
+                "sessions": sum(1 for records in self._index.values() if records),
+                "loaded": len(self._loaded),
+                "segments": len(self._segment_sizes),
+                "bytes": sum(self._segment_sizes.values()),
+                "dead_bytes": sum(self._dead_bytes.values()),
+            }
@@ -0,0 +1,406 @@
+"""
+LangChain Workshop RAG Utilities
+Single-pass retrieval-augmented generation chains shared by Task 6 and Task 7.
+"""
+
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable, RunnablePassthrough
+from langchain_core.runnables.config import run_in_executor
+
+from workshop_config import config
+from workshop_hybrid import tokenize
+from workshop_memory import count_tokens
+
+
+def format_docs(docs):
+    """Format retrieved documents for the prompt"""
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def document_tokens(doc: Document) -> int:
+    """Tokens in a document's text, from its "tokens" metadata when ingestion recorded it."""
+    tokens = doc.metadata.get("tokens")
+    return tokens if isinstance(tokens, int) else count_tokens(doc.page_content)
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    """Word trigrams of a text (its words, if it has fewer than three)."""
+    words = tokenize(text)
+    if len(words) < 3:
+        return {(word,) for word in words}
+    return set(zip(words, words[1:], words[2:]))
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of a that starts b, on word boundaries; 0 if none."""
+    for size in range(min(len(a), len(b)), 0, -1):
+        if (a.endswith(b[:size])
+                and (size == len(a) or not a[-size - 1].isalnum())
+                and (size == len(b) or not b[size].isalnum())):
+            return size
+    return 0
+
+
+class ContextPacker:
+    """
+    Builds the prompt context from retrieved documents within a token budget.
+
+    Chunks of the same source with consecutive ``chunk`` numbers are merged
+    into one passage, with the text they share through the splitter's
+    chunk overlap written once. Passages whose word trigrams are mostly
+    (``duplicate_threshold``) already in the context are dropped as
+    near-duplicates. The rest are added best-ranked first while they fit in
+    ``max_tokens``, using the per-chunk token counts recorded at ingestion.
+    """
+
+    def __init__(self, max_tokens: int = 1500, duplicate_threshold: float = 0.8, separator: str = "\n\n"):
+        """
+        Args:
+            max_tokens: Token budget of the context
+            duplicate_threshold: Share of a passage's trigrams already in the context that makes it a duplicate
+            separator: Text placed between passages
+        """
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.separator = separator
+
+    def passages(self, docs: List[Document]) -> List[Tuple[str, int]]:
+        """
+        Merge adjacent chunks of a source, keeping retrieval order.
+
+        Args:
+            docs: Retrieved documents, best first
+
+        Returns:
+            (text, tokens) per passage, ordered by its best-ranked chunk
+        """
+        ranked = []
+        runs: Dict[Any, List[Tuple[int, int, Document]]] = {}
+        for rank, doc in enumerate(docs):
+            chunk = doc.metadata.get("chunk")
+            if isinstance(chunk, int) and "source" in doc.metadata:
+                runs.setdefault(doc.metadata["source"], []).append((chunk, rank, doc))
+            else:
+                ranked.append((rank, doc.page_content, document_tokens(doc)))
+
+        for chunks in runs.values():
+            chunks.sort(key=lambda item: (item[0], item[1]))
+            run = None
+            for chunk, rank, doc in chunks:
+                if run is not None and chunk == run[0]:
+                    # The same chunk retrieved twice
+                    run[1] = min(run[1], rank)
+                    continue
+                if run is not None and chunk == run[0] + 1:
+                    shared = _overlap(run[2], doc.page_content)
+                    if shared:
+                        run[2] += doc.page_content[shared:]
+                        run[3] += document_tokens(doc) - count_tokens(doc.page_content[:shared])
+                    else:
+                        run[2] += "\n" + doc.page_content
+                        run[3] += document_tokens(doc) + count_tokens("\n")
+                    run[0], run[1] = chunk, min(run[1], rank)
+                    continue
+                if run is not None:
+                    ranked.append((run[1], run[2], run[3]))
+                run = [chunk, rank, doc.page_content, document_tokens(doc)]
+            ranked.append((run[1], run[2], run[3]))
+
+        ranked.sort(key=lambda item: item[0])
+        return [(text, tokens) for _, text, tokens in ranked]
+
+    def pack(self, docs: List[Document]) -> str:
+        """
+        Context text for the retrieved documents.
+
+        Args:
+            docs: Retrieved documents, best first
+
+        Returns:
+            Deduplicated passages joined by the separator, within max_tokens
+        """
+        separator_tokens = count_tokens(self.separator)
+        parts: List[str] = []
+        seen: Set[Tuple[str, ...]] = set()
+        used = 0
+        for text, tokens in self.passages(docs):
+            shingles = _shingles(text)
+            if shingles and len(shingles & seen) >= self.duplicate_threshold * len(shingles):
+                continue
+            cost = tokens + (separator_tokens if parts else 0)
+            if used + cost > self.max_tokens:
+                if not parts:
+                    # Never send an empty context: keep the start of the best passage
+                    parts.append(text[:len(text) * self.max_tokens // max(tokens, 1)])
+                    used = self.max_tokens
+                continue
+            parts.append(text)
+            seen |= shingles
+            used += cost
+        return self.separator.join(parts)
+
+    def __call__(self, docs: List[Document]) -> str:
+        return self.pack(docs)
+
+
+class _Retrieve(Runnable):
+    """Map a question to {"question", "source_documents"}, batching through retriever.batch."""
+
+    def __init__(self, retriever: Runnable):
+        self.retriever = retriever
+
+    @staticmethod
+    def _output(question: str, documents: Any) -> Any:
+        if isinstance(documents, Exception):
+            return documents
+        return {"question": question, "source_documents": documents}
+
+    def invoke(self, question: str, config=None, **kwargs: Any) -> Dict[str, Any]:
+        return self._output(question, self.retriever.invoke(question, config, **kwargs))
+
+    async def ainvoke(self, question: str, config=None, **kwargs: Any) -> Dict[str, Any]:
+        return self._output(question, await self.retriever.ainvoke(question, config, **kwargs))
+
+    def batch(self, questions: List[str], config=None, *, return_exceptions: bool = False,
+              **kwargs: Any) -> List[Any]:
+        documents = self.retriever.batch(questions, config, return_exceptions=return_exceptions, **kwargs)
+        return [self._output(question, docs) for question, docs in zip(questions, documents)]
+
+    async def abatch(self, questions: List[str], config=None, *, return_exceptions: bool = False,
+                     **kwargs: Any) -> List[Any]:
+        documents = await self.retriever.abatch(questions, config, return_exceptions=return_exceptions, **kwargs)
+        return [self._output(question, docs) for question, docs in zip(questions, documents)]
+
+
+def build_rag_chain(retriever, prompt, model,
+                    context_packer: Optional[Callable[[List[Document]], str]] = None) -> Runnable:
+    """
+    Build a RAG chain that retrieves once and returns the answer with its sources.
+
+    The retrieved documents are kept in the chain output and packed into
+    the prompt context from there, so answering a question never retrieves
+    twice. ``batch`` retrieves for all questions with one ``retriever.batch`` call.
+
+    Args:
+        retriever: Retriever used for the question
+        prompt: Prompt template with "context" and "question" variables
+        model: Chat model that generates the answer
+        context_packer: Builds the context from the documents (a ContextPacker, or format_docs
+            to join them unchanged); defaults to config.context_packer()
+
+    Returns:
+        Runnable mapping a question to {"question", "source_documents", "result"}
+    """
+    context_packer = context_packer or config.context_packer()
+    answer_chain = (
+        RunnablePassthrough.assign(context=lambda x: context_packer(x["source_documents"]))
+        | prompt
+        | model
+        | StrOutputParser()
+    )
+    return _Retrieve(retriever) | RunnablePassthrough.assign(result=answer_chain)
+
+
+# Wrapper class to maintain RetrievalQA interface
+class RetrievalQAWrapper:
+    """Wrapper to maintain compatibility with old RetrievalQA interface"""
+
+    def __init__(self, chain: Runnable):
+        """
+        Args:
+            chain: Chain built by build_rag_chain
+        """
+        self.chain = chain
+
+    @staticmethod
+    def _to_result(output: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "result": output["result"],
+            "source_documents": output["source_documents"]
+        }
+
+    def __call__(self, inputs):
+        """Execute chain and return result with source documents"""
+        return self._to_result(self.chain.invoke(inputs.get("query")))
+
+    async def acall(self, inputs):
+        """Async version of __call__"""
+        return self._to_result(await self.chain.ainvoke(inputs.get("query")))
+
+    def batch(self, inputs_list: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Answer several queries concurrently, retrieving for all of them in one batch"""
+        outputs = self.chain.batch([inputs.get("query") for inputs in inputs_list])
+        return [self._to_result(output) for output in outputs]
+
+    async def abatch(self, inputs_list: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Async version of batch"""
+        outputs = await self.chain.abatch([inputs.get("query") for inputs in inputs_list])
+        return [self._to_result(output) for output in outputs]
+
+    def stream(self, inputs) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the answer for a query.
+
+        Yields a {"source_documents": [...]} chunk once retrieval finishes,
+        then {"result": "..."} chunks as the model produces tokens.
+        """
+        for chunk in self.chain.stream(inputs.get("query")):
+            if "source_documents" in chunk or "result" in chunk:
+                yield chunk
+
+    async def astream(self, inputs) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of stream"""
+        async for chunk in self.chain.astream(inputs.get("query")):
+            if "source_documents" in chunk or "result" in chunk:
+                yield chunk
+
+
+def format_sources(source_docs) -> str:
+    """Format the unique sources of the retrieved documents"""
+    sources = [doc.metadata.get('source', 'unknown') for doc in source_docs]
+    unique_sources = list(set(sources))
+    if unique_sources:
+        return f"\n\n*Sources: {', '.join(unique_sources)}*"
+    return ""
+
+
+def log_timing(mode: str, start: float, first_token_at: Optional[float]) -> None:
+    """Log time-to-first-token and total time for a request"""
+    total = time.perf_counter() - start
+    ttft = f"{(first_token_at - start) * 1000:.0f} ms" if first_token_at else "n/a"
+    print(f"⏱️ [{mode}] time to first token: {ttft}, total: {total * 1000:.0f} ms")
+
+
+class _StreamedResponse:
+    """Response text of one request as it streams, with its timing."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.start = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.text = ""
+
+    def add(self, text: str) -> str:
+        """Append generated text and return the response so far."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.text += text
+        return self.text
+
+    def fail(self, error: Exception) -> str:
+        self.text = f"I apologize, but I encountered an error: {str(error)}. Please try again."
+        return self.text
+
+    def log(self) -> None:
+        log_timing(self.mode, self.start, self.first_token_at)
+
+
+def _cached_answer(semantic_cache, question: str) -> Optional[str]:
+    """A cached answer with its sources appended, or None on a miss or without a cache."""
+    if semantic_cache is None:
+        return None
+    cached = semantic_cache.lookup(question)
+    if cached is None:
+        return None
+    return cached["result"] + format_sources(cached["source_documents"])
+
+
+def _finish(semantic_cache, question: str, answer: str, source_docs, started: float) -> str:
+    """Store a finished RAG answer in the semantic cache and return its sources text."""
+    if semantic_cache is not None:
+        semantic_cache.store(question, answer, source_docs, time.perf_counter() - started)
+    return format_sources(source_docs)
+
+
+def stream_response(qa_chain: RetrievalQAWrapper, memory_chain: Runnable, message: str,
+                    use_rag: bool = True, session_id: str = "default_session",
+                    semantic_cache=None) -> Iterator[str]:
+    """
+    Stream an assistant response, yielding the text produced so far.
+
+    Args:
+        qa_chain: RAG wrapper used when use_rag is True
+        memory_chain: Conversational chain with message history
+        message: User message
+        use_rag: Answer from the knowledge base instead of the conversation
+        session_id: Conversation session for the memory chain
+        semantic_cache: Optional SemanticCache consulted before the RAG chain
+
+    Yields:
+        The response text so far; RAG sources are appended at the end
+    """
+    response = _StreamedResponse("rag" if use_rag else "memory")
+    try:
+        cached = _cached_answer(semantic_cache, message) if use_rag else None
+        if cached is not None:
+            response.mode = "rag, cached"
+            yield response.add(cached)
+        elif use_rag:
+            source_docs = []
+            for chunk in qa_chain.stream({"query": message}):
+                if "source_documents" in chunk:
+                    source_docs = chunk["source_documents"]
+                if chunk.get("result"):
+                    yield response.add(chunk["result"])
+
+            # Add source information once the answer is complete
+            sources = _finish(semantic_cache, message, response.text, source_docs, response.start)
+            if sources:
+                response.text += sources
+                yield response.text
+        else:
+            session_config = {"configurable": {"session_id": session_id}}
+            for token in memory_chain.stream({"input": message}, config=session_config):
+                if token:
+                    yield response.add(token)
+
+    except Exception as e:
+        yield response.fail(e)
+
+    response.log()
+
+
+async def astream_response(qa_chain: RetrievalQAWrapper, memory_chain: Runnable, message: str,
+                           use_rag: bool = True, session_id: str = "default_session",
+                           semantic_cache=None) -> AsyncIterator[str]:
+    """
+    Async version of stream_response.
+
+    The model call runs on the event loop; query embedding, cache lookups
+    and FAISS search run in the default executor, so no request blocks the loop.
+    """
+    response = _StreamedResponse("rag" if use_rag else "memory")
+    try:
+        cached = None
+        if use_rag and semantic_cache is not None:
+            cached = await run_in_executor(None, _cached_answer, semantic_cache, message)
+        if cached is not None:
+            response.mode = "rag, cached"
+            yield response.add(cached)
+        elif use_rag:
+            source_docs = []
+            async for chunk in qa_chain.astream({"query": message}):
+                if "source_documents" in chunk:
+                    source_docs = chunk["source_documents"]
+                if chunk.get("result"):
+                    yield response.add(chunk["result"])
+
+            sources = await run_in_executor(None, _finish, semantic_cache, message, response.text,
+                                            source_docs, response.start)
+            if sources:
+                response.text += sources
+                yield response.text
+        else:
+            session_config = {"configurable": {"session_id": session_id}}
+            async for token in memory_chain.astream({"input": message}, config=session_config):
+                if token:
+                    yield response.add(token)
+
+    except Exception as e:
+        yield response.fail(e)
+
+    response.log()
@@ -0,0 +1,325 @@
+"""
+LangChain Workshop Text Splitters
+Drop-in RecursiveCharacterTextSplitter variants for large inputs.
+"""
+
+import codecs
+import itertools
+import logging
+import mmap
+from bisect import bisect_left, bisect_right
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Iterator, List, Optional
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+# Bytes decoded at a time when a range has to be split into single characters
+_DECODE_WINDOW = 1024 * 1024
+
+
+class FastTextSplitter(RecursiveCharacterTextSplitter):
+    """
+    RecursiveCharacterTextSplitter with the same output and less repeated work.
+
+    The base splitter measures every split up to three times (when
+    classifying it, when merging it and again when it drops out of the
+    overlap window), locates separators with a regex search followed by a
+    regex split, and copies the merge window on every pop. This version
+    splits literal separators with ``str.split``, measures each split once
+    through a cached length function and merges over index ranges, which
+    matters most with token-based ``length_function``s.
+
+    Args:
+        length_cache_size: Distinct split lengths memoized per splitter,
+            unused when ``length_function`` is ``len``
+        **kwargs: RecursiveCharacterTextSplitter arguments
+    """
+
+    def __init__(self, *args: Any, length_cache_size: int = 65536, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        if self._length_function is len:
+            self._measure = len
+        else:
+            self._measure = lru_cache(maxsize=length_cache_size)(self._length_function)
+
+    def length_cache_info(self):
+        """Hit/miss counters of the length cache, or None for len()."""
+        return None if self._measure is len else self._measure.cache_info()
+
+    def _split_on(self, text: str, separator: str) -> List[str]:
+        """Literal-separator equivalent of _split_text_with_regex."""
+        if not separator:
+            return list(text)
+        parts = text.split(separator)
+        keep = self._keep_separator
+        if keep == "end":
+            splits = [part + separator for part in parts[:-1]]
+            splits.append(parts[-1])
+        elif keep:
+            splits = parts[:1]
+            splits += [separator + part for part in parts[1:]]
+        else:
+            splits = parts
+        return [s for s in splits if s]
+
+    def _split_text(self, text: str, separators: List[str]) -> List[str]:
+        if self._is_separator_regex:
+            return super()._split_text(text, separators)
+
+        separator = separators[-1]
+        new_separators: List[str] = []
+        for i, s_ in enumerate(separators):
+            if not s_:
+                separator = s_
+                break
+            if s_ in text:
+                separator = s_
+                new_separators = separators[i + 1:]
+                break
+
+        splits = self._split_on(text, separator)
+        lengths = list(map(self._measure, splits))
+        merge_separator = "" if self._keep_separator else separator
+        chunk_size = self._chunk_size
+
+        final_chunks: List[str] = []
+        good_start = 0
+        for i in [i for i, length in enumerate(lengths) if length >= chunk_size]:
+            if good_start < i:
+                final_chunks += self._merge_range(splits, lengths, good_start, i, merge_separator)
+            if not new_separators:
+                final_chunks.append(splits[i])
+            else:
+                final_chunks += self._split_text(splits[i], new_separators)
+            good_start = i + 1
+        if good_start < len(splits):
+            final_chunks += self._merge_range(splits, lengths, good_start, len(splits), merge_separator)
+        return final_chunks
+
+    def _merge_range(self, splits: List[str], lengths: List[int], start: int, end: int,
+                     separator: str) -> List[str]:
+        """_merge_splits over splits[start:end] with precomputed lengths."""
+        separator_len = self._measure(separator)
+        chunk_size, chunk_overlap = self._chunk_size, self._chunk_overlap
+        docs = []
+        if separator_len == 0:
+            return self._merge_prefix(splits, lengths, start, end, separator)
+
+        lo = start  # the merge window is splits[lo:hi]
+        total = 0
+        for hi in range(start, end):
+            len_ = lengths[hi]
+            if total + len_ + (separator_len if hi > lo else 0) > chunk_size:
+                if total > chunk_size:
+                    logger.warning("Created a chunk of size %d, which is longer than the specified %d",
+                                   total, chunk_size)
+                if hi > lo:
+                    doc = self._join_docs(splits[lo:hi], separator)
+                    if doc is not None:
+                        docs.append(doc)
+                    while total > chunk_overlap or (
+                        total + len_ + (separator_len if hi > lo else 0) > chunk_size and total > 0
+                    ):
+                        total -= lengths[lo] + (separator_len if hi - lo > 1 else 0)
+                        lo += 1
+            total += len_ + (separator_len if hi > lo else 0)
+        doc = self._join_docs(splits[lo:end], separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
+
+    def _merge_prefix(self, splits: List[str], lengths: List[int], start: int, end: int,
+                      separator: str) -> List[str]:
+        """
+        _merge_range for a zero-length separator, one step per chunk.
+
+        The window total is then a difference of prefix sums, so the split
+        that overflows the window and the number of splits to pop for the
+        overlap are both found by bisection instead of split by split.
+        """
+        chunk_size, chunk_overlap = self._chunk_size, self._chunk_overlap
+        prefix = list(itertools.accumulate(lengths[start:end], initial=0))
+        docs = []
+        lo = hi = 0  # the merge window is splits[start + lo:start + hi]
+        n = end - start
+        while True:
+            # First h >= hi whose split would overflow the window: prefix[h + 1] - prefix[lo] > chunk_size
+            h = bisect_right(prefix, prefix[lo] + chunk_size, hi + 1, n + 1) - 1
+            if h >= n:
+                break
+            if h > lo:
+                doc = self._join_docs(splits[start + lo:start + h], separator)
+                if doc is not None:
+                    docs.append(doc)
+                # Pop while total > chunk_overlap or (total + len_ > chunk_size and total > 0)
+                floor = max(prefix[h] - chunk_overlap, min(prefix[h + 1] - chunk_size, prefix[h]))
+                lo = bisect_left(prefix, floor, lo, h)
+            hi = h + 1
+        doc = self._join_docs(splits[start + lo:end], separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
+
+
+class _Merger:
+    """Incremental version of TextSplitter._merge_splits for one run of splits."""
+
+    def __init__(self, splitter: RecursiveCharacterTextSplitter, separator: str,
+                 length: Callable[[str], int]):
+        self.splitter = splitter
+        self.separator = separator
+        self.length = length
+        self.separator_len = length(separator)
+        self.current = deque()
+        self.lengths = deque()
+        self.total = 0
+
+    def _join(self) -> Optional[str]:
+        return self.splitter._join_docs(self.current, self.separator)
+
+    def add(self, split: str, len_: int) -> Iterator[str]:
+        chunk_size = self.splitter._chunk_size
+        separator_len = self.separator_len
+        current, lengths = self.current, self.lengths
+        if self.total + len_ + (separator_len if current else 0) > chunk_size:
+            if current:
+                doc = self._join()
+                if doc is not None:
+                    yield doc
+                while self.total > self.splitter._chunk_overlap or (
+                    self.total + len_ + (separator_len if current else 0) > chunk_size
+                    and self.total > 0
+                ):
+                    self.total -= lengths.popleft() + (separator_len if len(current) > 1 else 0)
+                    current.popleft()
+        current.append(split)
+        lengths.append(len_)
+        self.total += len_ + (separator_len if len(current) > 1 else 0)
+
+    def finish(self) -> Iterator[str]:
+        doc = self._join()
+        if doc is not None:
+            yield doc
+
+
+class StreamingTextSplitter(FastTextSplitter):
+    """
+    FastTextSplitter that splits files through mmap, yielding chunks lazily.
+
+    ``iter_split_file`` runs the same recursive algorithm over byte ranges
+    of the memory-mapped file instead of one Python string: separators are
+    located with ``mmap.find``, only the pieces being merged are decoded,
+    and chunks are merged incrementally, so memory use is bounded by a few
+    chunks rather than by the file size. Output is chunk-for-chunk
+    identical to ``split_text(open(path, encoding="utf-8").read())``.
+
+    Regex separators and files containing carriage returns (whose newlines
+    Python would translate on read) fall back to reading the whole file.
+    """
+
+    def iter_split_file(self, path: str) -> Iterator[str]:
+        """
+        Yield the chunks of a UTF-8 text file.
+
+        Args:
+            path: File to split
+
+        Yields:
+            Chunks, in order
+        """
+        with open(path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if self._is_separator_regex or mm.find(b"\r") != -1:
+                    with open(path, encoding="utf-8", errors="replace") as text_file:
+                        yield from self.split_text(text_file.read())
+                    return
+                yield from self._split_range(mm, 0, len(mm), self._separators)
+
+    def split_file(self, path: str) -> List[str]:
+        """List version of iter_split_file."""
+        return list(self.iter_split_file(path))
+
+    def _decode(self, mm: mmap.mmap, start: int, end: int) -> str:
+        return mm[start:end].decode("utf-8", errors="replace")
+
+    def _pieces(self, mm: mmap.mmap, start: int, end: int, separator: str) -> Iterator[tuple]:
+        """Yield the (start, end) byte ranges _split_text_with_regex would produce."""
+        if not separator:
+            yield from self._characters(mm, start, end)
+            return
+
+        sep = separator.encode("utf-8")
+        keep = self._keep_separator
+        piece_start = start
+        position = mm.find(sep, start, end)
+        while position != -1:
+            if keep == "end":
+                piece = (piece_start, position + len(sep))
+                piece_start = position + len(sep)
+            elif keep:
+                piece = (piece_start, position)
+                piece_start = position
+            else:
+                piece = (piece_start, position)
+                piece_start = position + len(sep)
+            if piece[1] > piece[0]:
+                yield piece
+            position = mm.find(sep, position + len(sep), end)
+        if end > piece_start:
+            yield (piece_start, end)
+
+    def _characters(self, mm: mmap.mmap, start: int, end: int) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for window in range(start, end, _DECODE_WINDOW):
+            final = window + _DECODE_WINDOW >= end
+            yield from decoder.decode(mm[window:min(window + _DECODE_WINDOW, end)], final=final)
+
+    def _split_range(self, mm: mmap.mmap, start: int, end: int, separators: List[str]) -> Iterator[str]:
+        # Same separator choice as RecursiveCharacterTextSplitter._split_text
+        separator = separators[-1]
+        new_separators: List[str] = []
+        for i, s_ in enumerate(separators):
+            if not s_:
+                separator = s_
+                break
+            if mm.find(s_.encode("utf-8"), start, end) != -1:
+                separator = s_
+                new_separators = separators[i + 1:]
+                break
+
+        length = self._measure
+        # With len(), a piece of at least 4 * chunk_size UTF-8 bytes is too long without decoding it
+        byte_bound = 4 * self._chunk_size if self._length_function is len else None
+        merger = _Merger(self, "" if self._keep_separator else separator, length)
+        has_good = False
+
+        for piece in self._pieces(mm, start, end, separator):
+            if isinstance(piece, str):
+                # A single character from the "" separator, which is always the last one
+                text = piece
+            elif byte_bound is not None and piece[1] - piece[0] >= byte_bound:
+                text = None
+            else:
+                text = self._decode(mm, *piece)
+            len_ = length(text) if text is not None else None
+            if text is not None and len_ < self._chunk_size:
+                yield from merger.add(text, len_)
+                has_good = True
+                continue
+
+            if has_good:
+                yield from merger.finish()
+                merger = _Merger(self, merger.separator, length)
+                has_good = False
+            if not new_separators:
+                yield text if text is not None else self._decode(mm, *piece)
+            else:
+                yield from self._split_range(mm, piece[0], piece[1], new_separators)
+
+        if has_good:
+            yield from merger.finish()
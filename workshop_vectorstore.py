@@ -0,0 +1,1204 @@
+"""
+LangChain Workshop Vector Store Utilities
+Versioned FAISS snapshots shared across the workshop tasks.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.vectorstores import VectorStoreRetriever
+
+from workshop_cache import RetrievalCache
+from workshop_config import config
+from workshop_embeddings import embed_queries
+from workshop_hybrid import BM25Index, HybridRetriever
+
+# Older faiss releases cannot memory-map flat indexes and read them normally instead
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+# FAISS codec per vector storage option: 4, 2 or 1 bytes per dimension
+STORAGE_CODECS = {"float32": "Flat", "fp16": "SQfp16", "int8": "SQ8"}
+
+
+def choose_index_type(n: int) -> str:
+    """
+    Index type used for index_type="auto".
+
+    Exact search is fast enough below 10k vectors; HNSW gives the best
+    recall/speed up to a few hundred thousand, after which IVF trains and
+    builds faster, and IVF-PQ keeps very large corpora in memory.
+    """
+    if n < 10_000:
+        return "flat"
+    if n < 200_000:
+        return "hnsw"
+    if n < 2_000_000:
+        return "ivf"
+    return "ivfpq"
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """The INDEX_TYPES name of a FAISS index (binary-prefiltered indexes are flat)."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def index_factory_string(n: int, d: int, index_type: str = "auto", nlist: Optional[int] = None,
+                         pq_m: Optional[int] = None, hnsw_m: Optional[int] = None,
+                         storage: Optional[str] = None) -> str:
+    """
+    FAISS index_factory description for a corpus of n vectors of dimension d.
+
+    Options left as None (or 0) come from config; nlist defaults to
+    4 * sqrt(n) and pq_m to the largest divisor of d up to d / 4. Storage
+    (a STORAGE_CODECS key) applies to flat, IVF-Flat and HNSW indexes.
+    """
+    if index_type == "auto":
+        index_type = choose_index_type(n)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES} or 'auto'")
+    storage = storage or config.faiss_storage
+    if storage not in STORAGE_CODECS:
+        raise ValueError(f"Unknown storage {storage!r}, expected one of {tuple(STORAGE_CODECS)}")
+    codec = STORAGE_CODECS[storage]
+    if index_type == "flat":
+        return codec
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m or config.faiss_hnsw_m},{codec}"
+    # At least 39 training points per list, as FAISS k-means asks for
+    nlist = nlist or config.faiss_nlist or int(4 * n ** 0.5)
+    nlist = max(1, min(nlist, n // 39))
+    if index_type == "ivf":
+        return f"IVF{nlist},{codec}"
+    pq_m = pq_m or config.faiss_pq_m or max(m for m in range(1, max(1, d // 4) + 1) if d % m == 0)
+    # 8-bit codes need 256 * 39 training points; small corpora get fewer centroids
+    nbits = 8 if n >= 256 * 39 else max(1, min(8, (n // 39).bit_length() - 1))
+    # "np" skips polysemous training, which multiplies training time and is unused here
+    return f"IVF{nlist},PQ{pq_m}x{nbits}np"
+
+
+def build_index(vectors: np.ndarray, metric: int = faiss.METRIC_L2, index_type: str = "auto",
+                train_size: Optional[int] = None, ef_construction: Optional[int] = None,
+                prefilter: Optional[str] = None, refine_k_factor: Optional[int] = None,
+                seed: int = 0, **options) -> faiss.Index:
+    """
+    Build and fill a FAISS index, training IVF indexes on a random sample.
+
+    With ``prefilter="binary"`` the index scans d-bit LSH codes (random
+    rotation, then one sign bit per dimension) for ``refine_k_factor * k``
+    candidates and reranks them with the stored vectors.
+
+    Args:
+        vectors: float32 array of shape (n, d), in docstore position order
+        metric: faiss.METRIC_L2 or faiss.METRIC_INNER_PRODUCT
+        index_type: One of INDEX_TYPES, or "auto" to choose by size
+        train_size: Vectors sampled for IVF training (FAISS_TRAIN_SIZE)
+        ef_construction: HNSW build-time beam width (FAISS_EF_CONSTRUCTION)
+        prefilter: "none" or "binary" (FAISS_PREFILTER); binary implies a flat index
+        refine_k_factor: Candidates reranked per result (FAISS_REFINE_K_FACTOR)
+        seed: Seed of the training sample
+        **options: nlist, pq_m, hnsw_m and storage, passed to index_factory_string
+
+    Returns:
+        Index with every vector added, positions unchanged
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = vectors.shape
+    prefilter = prefilter or config.faiss_prefilter
+    if prefilter == "binary":
+        if index_type not in ("auto", "flat"):
+            raise ValueError("The binary prefilter replaces the index; use index_type='flat'")
+        refine = faiss.index_factory(d, index_factory_string(n, d, "flat", **options), metric)
+        codes = faiss.IndexLSH(d, d, True, True)
+        # LSH ranks by Hamming distance whatever its metric; IndexRefine requires them to match
+        codes.metric_type = metric
+        index = faiss.IndexRefine(codes, refine)
+        index.k_factor = refine_k_factor or config.faiss_refine_k_factor
+    elif prefilter == "none":
+        index = faiss.index_factory(d, index_factory_string(n, d, index_type, **options), metric)
+    else:
+        raise ValueError(f"Unknown prefilter {prefilter!r}, expected 'none' or 'binary'")
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efConstruction = ef_construction or config.faiss_ef_construction
+    if not index.is_trained:
+        train_size = train_size or config.faiss_train_size
+        sample = vectors
+        if n > train_size:
+            sample = vectors[np.random.default_rng(seed).choice(n, train_size, replace=False)]
+        index.train(sample)
+    if isinstance(index, faiss.IndexIVF):
+        # Keeps reconstruct() working for MMR and compaction
+        index.make_direct_map()
+    index.add(vectors)
+    return index
+
+
+def batch_maximal_marginal_relevance(query_embeddings: np.ndarray, embedding_lists: np.ndarray,
+                                     counts: Optional[np.ndarray] = None, k: int = 4,
+                                     lambda_mult: float = 0.5) -> List[List[int]]:
+    """
+    LangChain's maximal_marginal_relevance for many queries at once.
+
+    Every greedy step scores all candidates of all queries with array
+    operations, keeping each candidate's highest similarity to the
+    documents selected so far instead of recomputing it per step.
+
+    Args:
+        query_embeddings: Array of shape (queries, d)
+        embedding_lists: Candidate embeddings, shape (queries, candidates, d)
+        counts: Valid candidates per query (the first counts[i]); default all
+        k: Number of candidates to select per query
+        lambda_mult: 1 for relevance only, 0 for diversity only
+
+    Returns:
+        Selected candidate indices per query, in selection order
+    """
+    queries, candidates, _ = embedding_lists.shape
+    if counts is None:
+        counts = np.full(queries, candidates)
+    steps = min(k, candidates)
+    if steps <= 0:
+        return [[] for _ in range(queries)]
+    rows = np.arange(queries)
+    valid = np.arange(candidates)[None, :] < np.asarray(counts)[:, None]
+    norms = np.linalg.norm(embedding_lists, axis=2)
+
+    def cosine(vectors: np.ndarray, vector_norms: np.ndarray) -> np.ndarray:
+        # Same arithmetic as langchain_community.utils.math.cosine_similarity
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarity = np.matmul(embedding_lists, vectors[:, :, None])[:, :, 0] / (vector_norms[:, None] * norms)
+        similarity[np.isnan(similarity) | np.isinf(similarity)] = 0.0
+        return similarity
+
+    similarity_to_query = cosine(query_embeddings, np.linalg.norm(query_embeddings, axis=1))
+    redundancy = np.full((queries, candidates), -np.inf, dtype=similarity_to_query.dtype)
+    available = valid.copy()
+    picks = np.empty((queries, steps), dtype=np.int64)
+    for step in range(steps):
+        if step == 0:
+            scores = similarity_to_query.copy()
+        else:
+            scores = lambda_mult * similarity_to_query - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        # argmax keeps the first of equal scores, like the strict > in LangChain's loop
+        pick = np.argmax(scores, axis=1)
+        picks[:, step] = pick
+        available[rows, pick] = False
+        redundancy = np.maximum(redundancy, cosine(embedding_lists[rows, pick], norms[rows, pick]))
+    return [picks[row, :min(steps, int(counts[row]))].tolist() for row in range(queries)]
+
+
+def supports_selector(index: faiss.Index) -> bool:
+    """Whether searches on the index can skip ids through an IDSelector."""
+    # The LSH stage of a binary-prefiltered index accepts no search parameters
+    return not isinstance(index, faiss.IndexRefine)
+
+
+def search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                  selector: Optional[faiss.IDSelector] = None) -> Optional[faiss.SearchParameters]:
+    """Per-search FAISS parameters for an index, or None when the defaults apply."""
+    if not supports_selector(index):
+        return None
+    kwargs = {} if selector is None else {"sel": selector}
+    index_type = index_type_of(index)
+    if index_type in ("ivf", "ivfpq"):
+        return faiss.SearchParametersIVF(nprobe=nprobe or config.faiss_nprobe, **kwargs)
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(efSearch=ef_search or config.faiss_ef_search, **kwargs)
+    return faiss.SearchParameters(**kwargs) if kwargs else None
+
+
+class MetadataIndex:
+    """
+    Inverted index from metadata values to the FAISS positions holding them.
+
+    ``resolve`` turns a LangChain FAISS filter dict into the sorted array of
+    matching positions. Each field condition is evaluated once per distinct
+    value of the field with the store's own filter function, so operators
+    behave exactly as in a post-filter; ``$and``, ``$or`` and ``$not`` become
+    set operations.
+    """
+
+    def __init__(self, store: FAISS, skip: Iterable[int] = ()):
+        skip = set(skip)
+        values: Dict[str, Dict[Any, List[int]]] = {}
+        live = []
+        self.unhashable = set()
+        for i, id_ in sorted(store.index_to_docstore_id.items()):
+            doc = store.docstore.search(id_) if i not in skip else None
+            if not isinstance(doc, Document):
+                continue
+            live.append(i)
+            for field, value in doc.metadata.items():
+                try:
+                    values.setdefault(field, {}).setdefault(value, []).append(i)
+                except TypeError:
+                    self.unhashable.add(field)
+        self.live = np.array(live, dtype=np.int64)
+        self.fields = {field: {value: np.array(positions, dtype=np.int64) for value, positions in by_value.items()}
+                       for field, by_value in values.items()}
+        self._create_filter_func = store._create_filter_func
+        # Resolved filters, as retrievers repeat the same filter on every query
+        self._resolved: Dict[str, Optional[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def resolve(self, filter) -> Optional[np.ndarray]:
+        """Sorted positions matching the filter, or None if it cannot be resolved here."""
+        if callable(filter):
+            return None
+        key = json.dumps(filter, sort_keys=True, default=repr)
+        if key not in self._resolved:
+            # Validates operators the same way a post-filter would
+            self._create_filter_func(filter)
+            if len(self._resolved) >= 256:
+                self._resolved.clear()
+            try:
+                self._resolved[key] = self._resolve(filter)
+            except _Unresolvable:
+                self._resolved[key] = None
+        return self._resolved[key]
+
+    def _resolve(self, filter: Dict[str, Any]) -> np.ndarray:
+        # Same precedence as FAISS._create_filter_func: a logical operator hides the other keys
+        if "$and" in filter:
+            positions = self.live
+            for sub_filter in filter["$and"]:
+                positions = np.intersect1d(positions, self._resolve(sub_filter), assume_unique=True)
+            return positions
+        if "$or" in filter:
+            positions = np.empty(0, dtype=np.int64)
+            for sub_filter in filter["$or"]:
+                positions = np.union1d(positions, self._resolve(sub_filter))
+            return positions
+        if "$not" in filter:
+            return np.setdiff1d(self.live, self._resolve(filter["$not"]), assume_unique=True)
+
+        positions = self.live
+        for field, condition in filter.items():
+            positions = np.intersect1d(positions, self._match(field, condition), assume_unique=True)
+        return positions
+
+    def _match(self, field: str, condition: Any) -> np.ndarray:
+        if field in self.unhashable:
+            raise _Unresolvable(field)
+        by_value = self.fields.get(field, {})
+        if not isinstance(condition, (dict, list)):
+            try:
+                matched = [by_value[condition]] if condition in by_value else []
+            except TypeError:
+                raise _Unresolvable(field) from None
+            if condition is None:
+                # Documents without the field compare as None too
+                matched.append(self._missing(field))
+            return np.sort(np.concatenate(matched)) if matched else np.empty(0, dtype=np.int64)
+
+        test = self._create_filter_func({field: condition})
+        try:
+            matched = [positions for value, positions in by_value.items() if test({field: value})]
+            missing = self._missing(field)
+            if len(missing) and test({}):
+                matched.append(missing)
+        except TypeError:
+            # e.g. $gt between a string and a number; a post-filter reports it if a candidate hits it
+            raise _Unresolvable(field) from None
+        return np.sort(np.concatenate(matched)) if matched else np.empty(0, dtype=np.int64)
+
+    def _missing(self, field: str) -> np.ndarray:
+        """Live positions whose metadata lacks the field."""
+        present = list(self.fields.get(field, {}).values())
+        if not present:
+            return self.live
+        if sum(map(len, present)) == len(self.live):
+            return np.empty(0, dtype=np.int64)
+        return np.setdiff1d(self.live, np.concatenate(present), assume_unique=True)
+
+
+class _Unresolvable(Exception):
+    """A filter the metadata index cannot answer; the caller post-filters instead."""
+
+
+class WorkshopFAISS(FAISS):
+    """
+    FAISS store that can serve a memory-mapped snapshot and soft-delete vectors.
+
+    A memory-mapped index is read-only, so it is copied into memory the
+    first time the store is modified. ``version`` increases on every change
+    so caches built on top of the store can detect stale entries.
+
+    ``mark_deleted`` removes documents without touching the FAISS index:
+    their vectors stay in place and every search skips them through an
+    IDSelector until ``compact`` rewrites the index once.
+
+    ``reindex`` swaps the flat index for an IVF or HNSW one, or changes
+    how vectors are stored; ``nprobe`` and ``ef_search`` set how much of
+    the index each search visits.
+
+    Metadata filters are resolved to positions through a MetadataIndex
+    and ``plan_filter`` picks how to search them: an exact scan of the
+    matching vectors when there are few, an IDSelector prefilter, or a
+    post-filter of a candidate list sized by the filter's selectivity when
+    most documents match. ``filter_strategy`` forces one of the three.
+
+    ``keyword_index`` is a BM25 index over the same documents, by FAISS
+    position. It is saved next to the FAISS index once built, and
+    ``as_hybrid_retriever`` combines the two searches.
+
+    ``retrieval_cache`` (a RetrievalCache, unless RETRIEVAL_CACHE is off)
+    keeps query embeddings and search results for the store's retrievers.
+    """
+
+    # Directory of the BM25 index inside a saved store
+    KEYWORD_INDEX_DIR = "bm25"
+
+    def __init__(self, *args, memory_mapped: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memory_mapped = memory_mapped
+        self.version = 0
+        self.nprobe = config.faiss_nprobe
+        self.ef_search = config.faiss_ef_search
+        # FAISS positions of soft-deleted vectors
+        self._deleted = set()
+        self._search_params = None
+        self.filter_strategy = config.filter_strategy
+        self._metadata_index: Optional[Tuple[int, MetadataIndex]] = None
+        self._keyword_index: Optional[Tuple[int, BM25Index]] = None
+        self.retrieval_cache = RetrievalCache(
+            self, config.query_cache_size, config.retrieval_cache_size
+        ) if config.retrieval_cache else None
+
+    @property
+    def index_type(self) -> str:
+        """The INDEX_TYPES name of the current index."""
+        return index_type_of(self.index)
+
+    def reindex(self, index_type: str = "auto", **options) -> str:
+        """
+        Rebuild the index as another type, keeping every document and position.
+
+        Args:
+            index_type: One of INDEX_TYPES, or "auto" to choose by size
+            **options: build_index options (nlist, pq_m, hnsw_m, storage, prefilter,
+                refine_k_factor, train_size, ef_construction)
+
+        Returns:
+            The index type now in use
+        """
+        self.compact()
+        n = self.index.ntotal
+        if options.get("prefilter", config.faiss_prefilter) == "binary":
+            index_type = "flat"
+        elif index_type == "auto":
+            index_type = choose_index_type(n)
+        plain = (options.get("storage") or config.faiss_storage) == "float32"
+        if not options and index_type == "flat" and plain and isinstance(self.index, faiss.IndexFlat):
+            return index_type
+        vectors = self.index.reconstruct_n(0, n)
+        self.index = build_index(vectors, self.index.metric_type, index_type, **options)
+        self.memory_mapped = False
+        self._search_params = None
+        self.version += 1
+        return index_type
+
+    def _ensure_writable(self) -> None:
+        if self.memory_mapped:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self.memory_mapped = False
+
+    @property
+    def deleted_count(self) -> int:
+        """Number of soft-deleted vectors still in the index."""
+        return len(self._deleted)
+
+    def index_stats(self) -> Dict[str, float]:
+        """Index type, vector count and serialized index size per vector (docstore excluded)."""
+        size = faiss.serialize_index(self.index).nbytes
+        vectors = self.index.ntotal
+        return {
+            "index_type": self.index_type,
+            "vectors": vectors,
+            "deleted": len(self._deleted),
+            "bytes": size,
+            "bytes_per_vector": size / vectors if vectors else 0.0,
+        }
+
+    def mark_deleted(self, ids: Iterable[str]) -> int:
+        """
+        Soft-delete documents by docstore id.
+
+        Args:
+            ids: Docstore ids to delete; unknown ids are ignored
+
+        Returns:
+            Number of documents deleted
+        """
+        ids = set(ids)
+        positions = [i for i, id_ in self.index_to_docstore_id.items() if id_ in ids and i not in self._deleted]
+        if not positions:
+            return 0
+        self.docstore.delete([self.index_to_docstore_id[i] for i in positions])
+        self._deleted.update(positions)
+        self._search_params = None
+        self.version += 1
+        if not supports_selector(self.index):
+            self.compact()
+        return len(positions)
+
+    def compact(self) -> int:
+        """
+        Remove soft-deleted vectors from the index.
+
+        Flat and scalar-quantized indexes remove them in place; other
+        indexes, which cannot renumber positions, are refilled with the
+        remaining vectors (trained centroids and codes are kept).
+
+        Returns:
+            Number of vectors removed
+        """
+        if not self._deleted:
+            return 0
+        self._ensure_writable()
+        removed = np.fromiter(sorted(self._deleted), dtype=np.int64)
+        if isinstance(self.index, faiss.IndexFlatCodes):
+            self.index.remove_ids(removed)
+        else:
+            keep = np.setdiff1d(np.arange(self.index.ntotal, dtype=np.int64), removed)
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)[keep]
+            index = faiss.clone_index(self.index)
+            index.reset()
+            if isinstance(index, faiss.IndexIVF):
+                index.make_direct_map()
+            index.add(vectors)
+            self.index = index
+        remaining = [id_ for i, id_ in sorted(self.index_to_docstore_id.items()) if i not in self._deleted]
+        self.index_to_docstore_id = dict(enumerate(remaining))
+        self._deleted.clear()
+        self._search_params = None
+        self.version += 1
+        return len(removed)
+
+    def _search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """index.search with the store's nprobe/ef_search, skipping soft-deleted vectors."""
+        key = (self.nprobe, self.ef_search)
+        if self._search_params is None or self._search_params[0] != key:
+            selector = batch = None
+            if self._deleted:
+                # The selectors must outlive the parameters that point at them
+                batch = faiss.IDSelectorBatch(np.fromiter(self._deleted, dtype=np.int64))
+                selector = faiss.IDSelectorNot(batch)
+            params = search_params(self.index, self.nprobe, self.ef_search, selector)
+            self._search_params = (key, params, selector, batch)
+        params = self._search_params[1]
+        if params is None:
+            return self.index.search(vectors, k)
+        return self.index.search(vectors, k, params=params)
+
+    def metadata_index(self) -> MetadataIndex:
+        """The inverted metadata index, rebuilt after the store changes."""
+        if self._metadata_index is None or self._metadata_index[0] != self.version:
+            self._metadata_index = (self.version, MetadataIndex(self, skip=self._deleted))
+        return self._metadata_index[1]
+
+    def keyword_index(self) -> BM25Index:
+        """The BM25 index by FAISS position, rebuilt after the store changes."""
+        if self._keyword_index is None or self._keyword_index[0] != self.version:
+            texts = []
+            for i in range(self.index.ntotal):
+                doc = self.docstore.search(self.index_to_docstore_id.get(i)) if i not in self._deleted else None
+                texts.append(doc.page_content if isinstance(doc, Document) else "")
+            self._keyword_index = (self.version, BM25Index.from_texts(texts))
+        return self._keyword_index[1]
+
+    def as_retriever(self, **kwargs: Any) -> "WorkshopRetriever":
+        """VectorStore.as_retriever, with a retriever whose batch() searches all queries at once."""
+        tags = kwargs.pop("tags", None) or [*self._get_retriever_tags()]
+        return WorkshopRetriever(vectorstore=self, tags=tags, **kwargs)
+
+    def as_hybrid_retriever(self, **kwargs: Any) -> HybridRetriever:
+        """
+        Retriever fusing this store's vector and BM25 results.
+
+        Args:
+            **kwargs: HybridRetriever fields (k, fetch_k, rrf_k, filter)
+
+        Returns:
+            HybridRetriever over the store
+        """
+        return HybridRetriever(vector_store=self, **kwargs)
+
+    def plan_filter(self, filter, k: int = 4) -> Tuple[str, Optional[np.ndarray]]:
+        """
+        Choose how to run a filtered search.
+
+        Args:
+            filter: LangChain FAISS filter dict or callable
+            k: Number of results wanted
+
+        Returns:
+            ("scan" | "prefilter" | "postfilter", matching positions), with
+            positions None when the filter cannot be resolved from metadata
+            (callables, unhashable values) and is post-filtered as in FAISS
+        """
+        positions = self.metadata_index().resolve(filter)
+        if positions is None:
+            return "postfilter", None
+        strategy = self.filter_strategy
+        if strategy == "auto":
+            live = len(self.metadata_index())
+            if len(positions) <= max(k, config.filter_scan_max):
+                strategy = "scan"
+            elif len(positions) < config.filter_postfilter_selectivity * live and supports_selector(self.index):
+                strategy = "prefilter"
+            else:
+                # Most documents match, or the index takes no IDSelector and a scan would be long
+                strategy = "postfilter"
+        if strategy == "prefilter" and not supports_selector(self.index):
+            strategy = "scan"
+        return strategy, positions
+
+    def _filtered_search(self, vector: np.ndarray, k: int, filter,
+                         fetch_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top k (score, position) pairs among documents matching the filter, best first."""
+        strategy, positions = self.plan_filter(filter, k)
+        if positions is None:
+            scores, indices = self._search(vector, fetch_k)
+            filter_func = self._create_filter_func(filter)
+            keep = [j for j, i in enumerate(indices[0]) if i != -1 and filter_func(self._document(i).metadata)][:k]
+            return scores[:, keep], indices[:, keep]
+        wanted = min(k, len(positions))
+        if wanted == 0:
+            return np.empty((1, 0), dtype=np.float32), np.empty((1, 0), dtype=np.int64)
+
+        if strategy == "postfilter":
+            # Enough candidates that about 2k of them should match
+            candidates = max(fetch_k, int(2 * k * len(self.metadata_index()) / len(positions)))
+            scores, indices = self._search(vector, min(candidates, self.index.ntotal))
+            keep = np.flatnonzero(np.isin(indices[0], positions))[:k]
+            if len(keep) == wanted:
+                return scores[:, keep], indices[:, keep]
+            strategy = "prefilter" if supports_selector(self.index) else "scan"
+
+        if strategy == "prefilter":
+            mask = np.zeros(self.index.ntotal, dtype=bool)
+            mask[positions] = True
+            # The selector points into bitmap, which must outlive the search
+            bitmap = np.packbits(mask, bitorder="little")
+            selector = faiss.IDSelectorBitmap(self.index.ntotal, faiss.swig_ptr(bitmap))
+            params = search_params(self.index, self.nprobe, self.ef_search, selector)
+            scores, indices = self.index.search(vector, k, params=params)
+            keep = np.flatnonzero(indices[0] != -1)
+            if len(keep) == wanted:
+                return scores[:, keep], indices[:, keep]
+            # The IVF lists or HNSW neighbourhood visited held too few matches
+
+        # Exact search over the matching vectors only
+        scores, top = faiss.knn(vector, self.index.reconstruct_batch(positions), wanted,
+                                metric=self.index.metric_type)
+        return scores, positions[top]
+
+    def _document(self, i: int) -> Document:
+        _id = self.index_to_docstore_id[i]
+        doc = self.docstore.search(_id)
+        if not isinstance(doc, Document):
+            raise ValueError(f"Could not find document for id {_id}, got {doc}")
+        return doc
+
+    def search_positions(self, embedding: List[float], k: int = 4, filter=None,
+                         fetch_k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest FAISS positions for an embedding, as used by every search.
+
+        Returns:
+            (scores, positions) arrays of shape (1, <= k); -1 marks missing results
+        """
+        return self.search_positions_batch([embedding], k, filter, fetch_k)
+
+    def search_positions_batch(self, embeddings: Sequence[List[float]], k: int = 4, filter=None,
+                               fetch_k: int = 20, normalize: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        search_positions for several embeddings in one FAISS search.
+
+        Args:
+            embeddings: Query embeddings
+            k: Results per query
+            filter: Metadata filter; filtered queries are planned one by one
+            fetch_k: Candidates post-filtered when the filter cannot be resolved
+            normalize: L2-normalize the queries; defaults to the store's setting
+
+        Returns:
+            (scores, positions) arrays of shape (len(embeddings), <= k); -1 marks missing results
+        """
+        if not len(embeddings):
+            return np.empty((0, k), dtype=np.float32), np.empty((0, k), dtype=np.int64)
+        vectors = np.array(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        if self._normalize_L2 if normalize is None else normalize:
+            faiss.normalize_L2(vectors)
+        if filter is None:
+            return self._search(vectors, k)
+        if len(vectors) == 1:
+            return self._filtered_search(vectors, k, filter, fetch_k)
+        scores = np.full((len(vectors), k), np.nan, dtype=np.float32)
+        positions = np.full((len(vectors), k), -1, dtype=np.int64)
+        for row in range(len(vectors)):
+            row_scores, row_positions = self._filtered_search(vectors[row:row + 1], k, filter, fetch_k)
+            found = row_positions.shape[1]
+            scores[row, :found], positions[row, :found] = row_scores[0], row_positions[0]
+        return scores, positions
+
+    def _scored_documents(self, scores: np.ndarray, indices: np.ndarray, k: int,
+                          score_threshold: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """(Document, score) pairs for one row of search results."""
+        docs = []
+        for j, i in enumerate(indices):
+            if i == -1:
+                # This happens when not enough docs are returned.
+                continue
+            docs.append((self._document(i), scores[j]))
+
+        if score_threshold is not None:
+            higher_is_better = self.distance_strategy in (DistanceStrategy.MAX_INNER_PRODUCT,
+                                                          DistanceStrategy.JACCARD)
+            docs = [
+                (doc, similarity) for doc, similarity in docs
+                if (similarity >= score_threshold if higher_is_better else similarity <= score_threshold)
+            ]
+        return docs[:k]
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        if isinstance(self.embedding_function, Embeddings):
+            return embed_queries(self.embedding_function, queries)
+        return [self._embed_query(query) for query in queries]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter=None,
+                                               fetch_k: int = 20, **kwargs: Any) -> List[Tuple[Document, float]]:
+        scores, indices = self.search_positions(embedding, k, filter, fetch_k)
+        return self._scored_documents(scores[0], indices[0], k, kwargs.get("score_threshold"))
+
+    def similarity_search_with_score_batch(self, queries: List[str], k: int = 4, filter=None, fetch_k: int = 20,
+                                           **kwargs: Any) -> List[List[Tuple[Document, float]]]:
+        """
+        similarity_search_with_score for several queries, embedded in one model
+        call and searched in one FAISS call.
+
+        Returns:
+            One list of (Document, score) pairs per query
+        """
+        scores, indices = self.search_positions_batch(self._embed_queries(queries), k, filter, fetch_k)
+        return [self._scored_documents(scores[row], indices[row], k, kwargs.get("score_threshold"))
+                for row in range(len(queries))]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4, filter=None, fetch_k: int = 20,
+                                **kwargs: Any) -> List[List[Document]]:
+        """similarity_search for several queries; see similarity_search_with_score_batch."""
+        return [[doc for doc, _ in docs]
+                for docs in self.similarity_search_with_score_batch(queries, k, filter, fetch_k, **kwargs)]
+
+    def max_marginal_relevance_search_batch(self, queries: List[str], k: int = 4, fetch_k: int = 20,
+                                            lambda_mult: float = 0.5, filter=None,
+                                            **kwargs: Any) -> List[List[Document]]:
+        """
+        max_marginal_relevance_search for several queries: one embedding call,
+        one FAISS search and MMR for all queries as NumPy array operations.
+
+        Returns:
+            One list of documents per query
+        """
+        results = self.max_marginal_relevance_search_with_score_by_vectors(
+            self._embed_queries(queries), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter)
+        return [[doc for doc, _ in docs] for docs in results]
+
+    def search_batch(self, queries: List[str], search_type: str = "similarity",
+                     **kwargs: Any) -> List[List[Document]]:
+        """Batch version of VectorStore.search for "similarity" and "mmr"."""
+        if search_type == "similarity":
+            return self.similarity_search_batch(queries, **kwargs)
+        if search_type == "mmr":
+            return self.max_marginal_relevance_search_batch(queries, **kwargs)
+        return [self.search(query, search_type, **kwargs) for query in queries]
+
+    def search_by_vectors(self, embeddings: Sequence[List[float]], search_type: str = "similarity", *,
+                          k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter=None,
+                          **kwargs: Any) -> List[List[Document]]:
+        """search_batch for query embeddings that are already computed."""
+        if search_type == "mmr":
+            results = self.max_marginal_relevance_search_with_score_by_vectors(
+                embeddings, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter)
+            return [[doc for doc, _ in docs] for docs in results]
+        if search_type != "similarity":
+            raise ValueError(f"search_by_vectors supports 'similarity' and 'mmr', got {search_type!r}")
+        scores, indices = self.search_positions_batch(embeddings, k, filter, fetch_k)
+        return [[doc for doc, _ in self._scored_documents(scores[row], indices[row], k,
+                                                          kwargs.get("score_threshold"))]
+                for row in range(len(embeddings))]
+
+    def cached_search(self, queries: List[str], search_type: str = "similarity",
+                      **kwargs: Any) -> List[List[Document]]:
+        """
+        search_batch through the store's RetrievalCache: repeated queries reuse
+        their embedding, and repeated searches their results until the store changes.
+
+        Args:
+            queries: Query texts
+            search_type: "similarity" or "mmr"
+            **kwargs: Search kwargs (k, fetch_k, lambda_mult, filter)
+
+        Returns:
+            One list of documents per query
+        """
+        cache = self.retrieval_cache
+        if cache is None:
+            return self.search_batch(queries, search_type, **kwargs)
+        embeddings = cache.embed(queries, self._embed_queries)
+        # Search settings change results without changing the store's version
+        params = {**kwargs, "nprobe": self.nprobe, "ef_search": self.ef_search,
+                  "filter_strategy": self.filter_strategy}
+        return cache.search(embeddings, search_type, params,
+                            lambda vectors: self.search_by_vectors(vectors, search_type, **kwargs))
+
+    def max_marginal_relevance_search_with_score_by_vector(self, embedding: List[float], *, k: int = 4,
+                                                           fetch_k: int = 20, lambda_mult: float = 0.5,
+                                                           filter=None) -> List[Tuple[Document, float]]:
+        return self.max_marginal_relevance_search_with_score_by_vectors(
+            [embedding], k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter)[0]
+
+    def max_marginal_relevance_search_with_score_by_vectors(
+        self, embeddings: Sequence[List[float]], *, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5,
+        filter=None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """MMR search for several embeddings, selecting with batch_maximal_marginal_relevance."""
+        if not len(embeddings):
+            return []
+        queries = np.array(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        # As in FAISS, MMR neither normalizes the queries nor post-filters more than fetch_k * 2
+        scores, indices = self.search_positions_batch(queries, fetch_k, filter, fetch_k * 2, normalize=False)
+        # -1 happens when not enough docs are returned; FAISS puts them last
+        counts = (indices != -1).sum(axis=1)
+        candidates = np.zeros((*indices.shape, self.index.d), dtype=np.float32)
+        found = indices != -1
+        if found.any():
+            candidates[found] = self.index.reconstruct_batch(indices[found])
+        selected = batch_maximal_marginal_relevance(queries, candidates, counts, k=k, lambda_mult=lambda_mult)
+        return [[(self._document(indices[row][i]), scores[row][i]) for i in picks]
+                for row, picks in enumerate(selected)]
+
+    def add_texts(self, *args, **kwargs) -> List[str]:
+        self._ensure_writable()
+        # Bumped on both sides of the write: searches that overlap it are never cached
+        self.version += 1
+        try:
+            return super().add_texts(*args, **kwargs)
+        finally:
+            self.version += 1
+
+    async def aadd_texts(self, *args, **kwargs) -> List[str]:
+        self._ensure_writable()
+        self.version += 1
+        try:
+            return await super().aadd_texts(*args, **kwargs)
+        finally:
+            self.version += 1
+
+    def add_embeddings(self, *args, **kwargs) -> List[str]:
+        self._ensure_writable()
+        self.version += 1
+        try:
+            return super().add_embeddings(*args, **kwargs)
+        finally:
+            self.version += 1
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs) -> Optional[bool]:
+        # Soft delete then compact, which works for every index type
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        missing_ids = set(ids).difference(self.index_to_docstore_id.values())
+        if missing_ids:
+            raise ValueError(f"Some specified ids do not exist in the current store. Ids not found: {missing_ids}")
+        self.mark_deleted(ids)
+        self.compact()
+        return True
+
+    def merge_from(self, target: FAISS) -> None:
+        self._ensure_writable()
+        self.version += 1
+        try:
+            super().merge_from(target)
+        finally:
+            self.version += 1
+
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        # Soft deletes are not part of the saved format
+        self.compact()
+        super().save_local(folder_path, index_name)
+        keyword_path = os.path.join(folder_path, self.KEYWORD_INDEX_DIR)
+        if self._keyword_index is not None:
+            self.keyword_index().save(keyword_path)
+        else:
+            # Never leave a BM25 index from an earlier save next to different vectors
+            shutil.rmtree(keyword_path, ignore_errors=True)
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings, index_name: str = "index", *,
+                   allow_dangerous_deserialization: bool = False, io_flags: int = 0,
+                   **kwargs: Any) -> "WorkshopFAISS":
+        # Read here rather than through FAISS.load_local, which only accepts io_flags
+        # (memory-mapped loading) in recent langchain-community releases
+        if not allow_dangerous_deserialization:
+            raise ValueError("Loading a saved store unpickles its docstore; pass "
+                             "allow_dangerous_deserialization=True for files you created yourself.")
+        index = faiss.read_index(os.path.join(folder_path, f"{index_name}.faiss"), io_flags)
+        with open(os.path.join(folder_path, f"{index_name}.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        store = cls(embeddings, index, docstore, index_to_docstore_id, **kwargs)
+        keyword_path = os.path.join(folder_path, cls.KEYWORD_INDEX_DIR)
+        if os.path.isdir(keyword_path):
+            store._keyword_index = (store.version, BM25Index.load(keyword_path, mmap=store.memory_mapped))
+        return store
+
+
+class WorkshopRetriever(VectorStoreRetriever):
+    """
+    VectorStoreRetriever whose batch() embeds every query in one model call
+    and searches them in one FAISS call (similarity and MMR search types).
+    These searches go through the store's RetrievalCache when it has one.
+    """
+
+    def _get_relevant_documents(self, query: str, *, run_manager: Any, **kwargs: Any) -> List[Document]:
+        if self.search_type not in ("similarity", "mmr") or self.vectorstore.retrieval_cache is None:
+            return super()._get_relevant_documents(query, run_manager=run_manager, **kwargs)
+        return self.vectorstore.cached_search([query], self.search_type, **{**self.search_kwargs, **kwargs})[0]
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: Any, **kwargs: Any) -> List[Document]:
+        if self.search_type not in ("similarity", "mmr") or self.vectorstore.retrieval_cache is None:
+            return await super()._aget_relevant_documents(query, run_manager=run_manager, **kwargs)
+        return await run_in_executor(None, self._get_relevant_documents, query, run_manager=run_manager, **kwargs)
+
+    def batch(self, inputs: List[str], config=None, *, return_exceptions: bool = False,
+              **kwargs: Any) -> List[Any]:
+        if self.search_type not in ("similarity", "mmr") or not inputs:
+            return super().batch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+        try:
+            return self.vectorstore.cached_search(inputs, self.search_type, **self.search_kwargs)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return [e] * len(inputs)
+
+    async def abatch(self, inputs: List[str], config=None, *, return_exceptions: bool = False,
+                     **kwargs: Any) -> List[Any]:
+        return await run_in_executor(None, self.batch, inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+
+def corpus_key(documents: List[Document], model_name: str) -> str:
+    """
+    Hash a corpus together with the embedding model that indexes it.
+
+    Args:
+        documents: Documents in the corpus
+        model_name: Name of the embedding model
+
+    Returns:
+        Hex digest that changes whenever a document or the model changes
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for doc in documents:
+        digest.update(b"\0")
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chunk_id(doc: Document) -> str:
+    """
+    Deterministic id for a chunk: a hash of its source and content.
+
+    Identical chunks within a source share an id, so they are stored once;
+    metadata such as the chunk number does not affect the id.
+    """
+    digest = hashlib.sha256(str(doc.metadata.get("source", "")).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(doc.page_content.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class IndexManager:
+    """
+    Keeps a WorkshopFAISS store in step with a changing corpus.
+
+    Chunks get content-hash ids and a manifest records the ids of every
+    source, so re-ingesting a source embeds only chunks whose content is
+    new, soft-deletes chunks that disappeared and refreshes metadata of the
+    rest in place. The index is compacted once the deleted fraction passes
+    ``compact_ratio``.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, embeddings: Embeddings, store: Optional[WorkshopFAISS] = None,
+                 manifest: Optional[Dict[str, List[str]]] = None, compact_ratio: Optional[float] = None,
+                 batch_size: Optional[int] = None, index_type: Optional[str] = None):
+        """
+        Args:
+            embeddings: Embeddings model for the corpus
+            store: Existing store to manage, or None to create one on the first update
+            manifest: Source -> chunk ids of ``store``
+            compact_ratio: Deleted fraction that triggers compaction (INDEX_COMPACT_RATIO)
+            batch_size: Chunks embedded per call (INGEST_BATCH_SIZE)
+            index_type: Index type of a store created by the first update (FAISS_INDEX_TYPE)
+        """
+        self.embeddings = embeddings
+        self.store = store
+        self.index_type = index_type or config.faiss_index_type
+        self.manifest: Dict[str, List[str]] = manifest or {}
+        self.compact_ratio = config.index_compact_ratio if compact_ratio is None else compact_ratio
+        self.batch_size = batch_size or config.ingest_batch_size
+
+    @classmethod
+    def load(cls, path: str, embeddings: Embeddings, **kwargs) -> "IndexManager":
+        """Load a manager saved with ``save``, or start an empty one if there is none."""
+        manifest_path = os.path.join(path, cls.MANIFEST)
+        if not os.path.exists(manifest_path):
+            return cls(embeddings, **kwargs)
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        store = None
+        if manifest:
+            store = WorkshopFAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        return cls(embeddings, store=store, manifest=manifest, **kwargs)
+
+    def save(self, path: str) -> None:
+        """Save the index (compacted) and the manifest, which is written last."""
+        os.makedirs(path, exist_ok=True)
+        if self.store is not None:
+            self.store.save_local(path)
+        tmp_path = os.path.join(path, self.MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, os.path.join(path, self.MANIFEST))
+
+    def update(self, documents: Iterable[Document]) -> Dict[str, float]:
+        """
+        Re-ingest the sources present in ``documents``.
+
+        Each source's chunks replace its previous chunks; sources not in
+        ``documents`` are left untouched.
+
+        Returns:
+            Stats with added, deleted, unchanged, metadata_updated, compacted,
+            embed_seconds and seconds
+        """
+        start = time.perf_counter()
+        by_source: Dict[str, Dict[str, Document]] = {}
+        for doc in documents:
+            by_source.setdefault(str(doc.metadata.get("source", "")), {}).setdefault(chunk_id(doc), doc)
+
+        stats = {"added": 0, "deleted": 0, "unchanged": 0, "metadata_updated": 0}
+        to_add: Dict[str, Document] = {}
+        to_delete: List[str] = []
+        refreshed: Dict[str, Document] = {}
+        for source, chunks in by_source.items():
+            old_ids = set(self.manifest.get(source, ()))
+            to_delete.extend(old_ids.difference(chunks))
+            for id_, doc in chunks.items():
+                if id_ not in old_ids:
+                    to_add[id_] = doc
+                    continue
+                stats["unchanged"] += 1
+                stored = self.store.docstore.search(id_)
+                if isinstance(stored, Document) and stored.metadata != doc.metadata:
+                    refreshed[id_] = Document(id=id_, page_content=doc.page_content, metadata=doc.metadata)
+            self.manifest[source] = list(chunks)
+
+        if refreshed:
+            self.store.docstore.delete(list(refreshed))
+            self.store.docstore.add(refreshed)
+            self.store.version += 1
+            stats["metadata_updated"] = len(refreshed)
+        if to_delete:
+            stats["deleted"] = self.store.mark_deleted(to_delete)
+        created = self.store is None
+        stats["embed_seconds"] = self._add(to_add)
+        if created and self.store is not None:
+            self.store.reindex(self.index_type)
+        stats["added"] = len(to_add)
+        stats["compacted"] = self._maybe_compact()
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def sync(self, documents: Iterable[Document]) -> Dict[str, float]:
+        """Make the index match ``documents`` exactly, deleting sources that are no longer present."""
+        documents = list(documents)
+        stats = self.update(documents)
+        present = {str(doc.metadata.get("source", "")) for doc in documents}
+        for source in [source for source in self.manifest if source not in present]:
+            stats["deleted"] += self.delete_source(source, compact=False)
+        stats["compacted"] += self._maybe_compact()
+        return stats
+
+    def delete_source(self, source: str, compact: bool = True) -> int:
+        """Delete every chunk of a source. Returns the number of chunks deleted."""
+        ids = self.manifest.pop(source, [])
+        deleted = self.store.mark_deleted(ids) if ids and self.store is not None else 0
+        if compact:
+            self._maybe_compact()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        """Sources, live chunks and soft-deleted vectors in the index."""
+        return {
+            "sources": len(self.manifest),
+            "chunks": sum(len(ids) for ids in self.manifest.values()),
+            "deleted": self.store.deleted_count if self.store is not None else 0,
+        }
+
+    def _add(self, documents: Dict[str, Document]) -> float:
+        embed_seconds = 0.0
+        items = list(documents.items())
+        for i in range(0, len(items), self.batch_size):
+            batch = items[i:i + self.batch_size]
+            texts = [doc.page_content for _, doc in batch]
+            embed_start = time.perf_counter()
+            vectors = self.embeddings.embed_documents(texts)
+            embed_seconds += time.perf_counter() - embed_start
+            ids = [id_ for id_, _ in batch]
+            metadatas = [doc.metadata for _, doc in batch]
+            if self.store is None:
+                self.store = WorkshopFAISS.from_embeddings(list(zip(texts, vectors)), self.embeddings,
+                                                           metadatas=metadatas, ids=ids)
+            else:
+                self.store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+        return embed_seconds
+
+    def _maybe_compact(self) -> int:
+        if self.store is None or not self.store.index.ntotal:
+            return 0
+        if self.store.deleted_count / self.store.index.ntotal <= self.compact_ratio:
+            return 0
+        return self.store.compact()
+
+
+class IndexRegistry:
+    """
+    Registry of versioned FAISS snapshots keyed by corpus and embedding model.
+
+    Stores are shared within the process, loaded from disk when a matching
+    snapshot exists, and rebuilt (then written atomically) only when the
+    corpus changes. Documents added to a shared store later are visible to
+    every caller that asked for the same corpus.
+    """
+
+    def __init__(self, root: str, keep: int = 2):
+        """
+        Args:
+            root: Directory holding the snapshots
+            keep: Number of snapshots to keep per index name
+        """
+        self.root = root
+        self.keep = keep
+        self._stores: Dict[str, WorkshopFAISS] = {}
+        self._lock = threading.Lock()
+
+    def snapshot_path(self, name: str, key: str) -> str:
+        return os.path.join(self.root, f"{name}-{key[:16]}")
+
+    def load_or_build(self, name: str, documents: List[Document], embeddings: Embeddings,
+                      mmap: bool = True, index_type: Optional[str] = None, **index_options) -> WorkshopFAISS:
+        """
+        Get the vector store for a corpus, building it only if no snapshot matches.
+
+        Args:
+            name: Human-readable index name, used for the snapshot directory
+            documents: Documents to index
+            embeddings: Embeddings model for the corpus and for queries
+            mmap: Memory-map the loaded index where FAISS allows it
+            index_type: One of INDEX_TYPES or "auto" (FAISS_INDEX_TYPE)
+            **index_options: build_index options such as storage="int8" or prefilter="binary"
+
+        Returns:
+            WorkshopFAISS store for the corpus
+        """
+        index_type = index_type or config.faiss_index_type
+        model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+        # Build options are part of the key, so changing them builds a new snapshot
+        build_options = {
+            "nlist": config.faiss_nlist, "pq_m": config.faiss_pq_m, "hnsw_m": config.faiss_hnsw_m,
+            "storage": config.faiss_storage, "prefilter": config.faiss_prefilter,
+            "refine_k_factor": config.faiss_refine_k_factor, "train_size": config.faiss_train_size,
+            "ef_construction": config.faiss_ef_construction, **index_options,
+        }
+        key = corpus_key(documents, f"{model_name}|{index_type}|{json.dumps(build_options, sort_keys=True)}")
+
+        with self._lock:
+            store = self._stores.get(key)
+            if store is not None:
+                if not mmap:
+                    store._ensure_writable()
+                return store
+
+            path = self.snapshot_path(name, key)
+            if os.path.exists(os.path.join(path, "index.pkl")):
+                store = WorkshopFAISS.load_local(
+                    path,
+                    embeddings,
+                    allow_dangerous_deserialization=True,
+                    io_flags=_MMAP_FLAG if mmap else 0,
+                    memory_mapped=mmap,
+                )
+            else:
+                store = WorkshopFAISS.from_documents(documents, embeddings)
+                store.reindex(index_type, **index_options)
+                # Saved with the snapshot, so hybrid retrieval never tokenizes the corpus again
+                store.keyword_index()
+                self._write_snapshot(store, name, path)
+
+            self._stores[key] = store
+            return store
+
+    def _write_snapshot(self, store: FAISS, name: str, path: str) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=f".{name}-", dir=self.root)
+        try:
+            store.save_local(tmp_path)
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process published the same snapshot first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        self._prune(name)
+
+    def _prune(self, name: str) -> None:
+        """Remove all but the newest ``keep`` snapshots for an index name."""
+        snapshots = [
+            os.path.join(self.root, entry)
+            for entry in os.listdir(self.root)
+            if entry.startswith(f"{name}-") and len(entry) == len(name) + 17
+        ]
+        snapshots.sort(key=os.path.getmtime, reverse=True)
+        for old in snapshots[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# Global registry instance
+index_registry = IndexRegistry(config.faiss_index_dir)